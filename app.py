@@ -2,8 +2,12 @@
 import streamlit as st
 import pandas as pd
 import json
-from services.llm_service import extract_from_transcript
-from services.leadsquared_service import post_activity_by_phone # <-- IMPORT THE NEW SERVICE
+import copy
+import time
+from services.pipeline import latency_table
+from services.defaults import DEFAULT_EXTRACTION_SCHEMA, DEFAULT_ACTIVITY_EVENT_CODE, DEFAULT_ACTIVITY_FIELDS
+from services.job_manager import JobManager, FINISHED_STATES, FAILED, STOPPED
+from services import results_store
 import io
 import re
 
@@ -13,141 +17,33 @@ st.set_page_config(page_title="Call Log Analyzer & Activity Logger", page_icon="
 # --- App Title ---
 st.title("📞 Call Log Analyzer & Activity Logger")
 
+
+# --- Background Jobs ---
+# One manager per server process, shared by every session, so jobs keep running
+# across reruns and several users' jobs run side by side in worker processes.
+@st.cache_resource
+def get_job_manager():
+    return JobManager()
+
+
+job_manager = get_job_manager()
+
+with st.sidebar:
+    st.subheader("Background Jobs")
+    for job in job_manager.list_jobs()[:10]:
+        progress = f"{job['done']}/{job['total']}" if job["total"] else ""
+        st.caption(f"{job['name'] or job['job_id']}: {job['state']} {progress}")
+
 # --- Session State Initialization ---
 # (Cleaned up session state for the new workflow)
 if 'extraction_schema' not in st.session_state:
-    st.session_state.extraction_schema = [
-        {
-            "name": "call_outcome", 
-            "prompt": "Analyze the transcript to determine the final outcome. You must select ONLY ONE of the following: Confirmed for Tomorrow’s Workshop, Confirmed for Sunday’s Workshop, Already Attended, Requested Recording, Declined Both, Wrong Number / Ineligible, Voicemail / No Answer. Note, if you encounter someone who just doesn't respond or you encounter a voicemail message, make sure you label it as Voicemail / No Answer", 
-            "type": "string"
-        },
-        {
-            "name": "call_summary", 
-            "prompt": "Write a concise call summary, strictly under 120 words, for a human agent to review. The summary must include: 1. The reason they couldn’t attend. 2. What they were hoping to gain. 3. How Rohan responded. 4. The agreed next step.", 
-            "type": "string"
-        },
-        {
-            "name": "lead_stage", 
-            "prompt": "Based on the call transcript, classify the lead into ONLY ONE of the following stages: Appointment_Booked/Call_Scheduled (Customer explicitly agreed to a call with a Senior Counsellor), Call Again Later (Customer requested a callback or was busy), In Pipeline (Customer is hesitant but agreed to receive more info like a video or case study), Closed Not Interested (Customer explicitly stated they are not interested and to not call back), DNP (Do Not Pursue - Lead is invalid, a wrong number, or abusive), Promised To Pay (Only if the customer has explicitly agreed to make a payment, unlikely for this AI's role).", 
-            "type": "string"
-        },
-        {
-            "name": "customer_goal", 
-            "prompt": "Identify and extract the participant’s primary goal or motivation for registering for the workshop. List them as a concise, comma-separated string. Examples: Learn AI tools for productivity, Career growth, Explore AI basics, Upskill for future jobs.", 
-            "type": "string"
-        },
-        {
-            "name": "objections", 
-            "prompt": "Identify all objections or concerns raised by the customer during the call. List them as a concise, comma-separated string. Examples: Financial cost, Time commitment, Relevance to my field, Already have a similar course, Needs to discuss with family.", 
-            "type": "string"
-        },
-        {
-            "name": "next_step", 
-            "prompt": "Summarize the single clear next action agreed upon at the end of the call in one short sentence. Examples: Customer will join live on Sept 21 at 11 AM, Sending workshop recording via WhatsApp, No further follow-up needed.", 
-            "type": "string"
-        },
-        {
-            "name": "rapport_hooks", 
-            "prompt": "Extract any personal or professional details mentioned that a human agent could use to build rapport on future outreach. List them as a comma-separated string. Examples: preparing for MBA entrance, works in IT, based in Bangalore, new parent.", 
-            "type": "string"
-        },
-        {
-            "name": "call_sentiment", 
-            "prompt": "Analyze the overall tone and mood of the participant throughout the call. Classify as Positive (engaged, appreciative), Neutral (polite but reserved), or Negative (irritated, dismissive). Select only one.", 
-            "type": "string"
-        },
-        {
-            "name": "ai_performance_score", 
-            "prompt": "Rate the AI agent’s performance on a scale of 1 to 10 based on the following rubric: Adherence to Conversation Flow (3 pts), Tone & Empathy (3 pts), Handling Barriers Smoothly (2 pts), Securing a Clear Next Step (2 pts). Provide only the final numeric score.", 
-            "type": "integer" # Note: I've set this to integer as it makes sense for a score.
-        },
-        {
-            "name": "talk_to_listen_ratio", 
-            "prompt": "Analyze the call audio and calculate Rohan’s speaking time versus the participant’s. Express this as a decimal (e.g., 0.4 means Rohan spoke for 40% of the call).", 
-            "type": "float" # Note: I've set this to float for the decimal.
-        }
-    ]
+    st.session_state.extraction_schema = copy.deepcopy(DEFAULT_EXTRACTION_SCHEMA)
 
 if 'activity_event_code' not in st.session_state:
-    st.session_state.activity_event_code = 226 # Replace with your actual code if different
+    st.session_state.activity_event_code = DEFAULT_ACTIVITY_EVENT_CODE
 
 if 'activity_json_template' not in st.session_state:
-    # Pre-configured JSON template based on your provided schema
-    st.session_state.activity_json_template = json.dumps([
-      {
-        "SchemaName": "mx_Custom_2",
-        "Value": "{{call_outcome}}"
-      },
-      {
-        "SchemaName": "mx_Custom_4",
-        "Value": "",
-        "Fields": [
-          {
-            "SchemaName": "mx_CustomObject_121",
-            "Value": "{{call_summary}}"
-          }
-        ]
-      },
-      {
-        "SchemaName": "mx_Custom_3",
-        "Value": "{{recordingUrl}}" # Placeholder from original CSV
-      },
-      {
-        "SchemaName": "mx_Custom_1",
-        "Value": "",
-        "Fields": [
-          {
-            "SchemaName": "mx_CustomObject_121",
-            "Value": "{{transcript}}" # Placeholder from original CSV
-          }
-        ]
-      },
-      {
-        "SchemaName": "Status",
-        "Value": "Active" # Hardcoded value
-      },
-      {
-        "SchemaName": "mx_Custom_5",
-        "Value": "{{lead_stage}}"
-      },
-      {
-        "SchemaName": "mx_Custom_6",
-        "Value": "{{customer_goal}}"
-      },
-      {
-        "SchemaName": "mx_Custom_7",
-        "Value": "{{objections}}"
-      },
-      {
-        "SchemaName": "mx_Custom_8",
-        "Value": "{{next_step}}"
-      },
-      {
-        "SchemaName": "mx_Custom_9",
-        "Value": "{{rapport_hooks}}"
-      },
-      {
-        "SchemaName": "mx_Custom_10",
-        "Value": "{{call_sentiment}}"
-      },
-      {
-        "SchemaName": "mx_Custom_11",
-        "Value": "{{ai_performance_score}}"
-      },
-      {
-        "SchemaName": "mx_Custom_12",
-        "Value": "{{talk_to_listen_ratio}}"
-      },
-      {
-        "SchemaName": "mx_Custom_13",
-        "Value": "Answered" # Hardcoded value
-      },
-      {
-        "SchemaName": "mx_Custom_14",
-        "Value": "Tool Test" # Hardcoded value
-      }
-    ], indent=2)
+    st.session_state.activity_json_template = json.dumps(DEFAULT_ACTIVITY_FIELDS, indent=2)
 
 if 'processing_complete' not in st.session_state:
     st.session_state.processing_complete = False
@@ -189,6 +85,7 @@ if not st.session_state.get('processing_complete', False):
                     st.text_input("Field Name", value=item["name"], key=f"name_{i}")
                     st.selectbox("Data Type", options=["string", "integer", "float"], index=["string", "integer", "float"].index(item.get("type", "string")), key=f"type_{i}")
                     st.text_area("LLM Prompt/Instruction", value=item["prompt"], key=f"prompt_{i}")
+                    st.text_input("Allowed Values (optional, comma-separated)", value=", ".join(item.get("enum") or []), key=f"enum_{i}")
                     st.markdown("---")
                  with row_col2:
                     if st.button("❌", key=f"del_schema_{i}", help="Delete field"):
@@ -227,12 +124,18 @@ elif st.session_state.processing_complete == 'pending':
     
     # 1. Update schema from UI
     current_schema = []
-    for i in range(len(st.session_state.extraction_schema)):
-        current_schema.append({
+    for i, item in enumerate(st.session_state.extraction_schema):
+        allowed_values = [value.strip() for value in st.session_state[f"enum_{i}"].split(",") if value.strip()]
+        field = {
+            **item, # Keeps constraints the UI doesn't edit, such as numeric ranges
             "name": st.session_state[f"name_{i}"],
             "prompt": st.session_state[f"prompt_{i}"],
-            "type": st.session_state[f"type_{i}"]
-        })
+            "type": st.session_state[f"type_{i}"],
+            "enum": allowed_values
+        }
+        if not allowed_values:
+            del field["enum"]
+        current_schema.append(field)
     st.session_state.extraction_schema = current_schema
 
     # 2. Validate JSON template
@@ -244,69 +147,117 @@ elif st.session_state.processing_complete == 'pending':
         st.button("Go Back and Fix")
         st.stop()
 
-    # 3. Process CSV and Push to LSQ
-    with st.spinner('Processing calls and posting activities...'):
-        df = pd.read_csv(st.session_state.uploaded_file)
-        
-        # --- Main Loop ---
-        sync_log = []
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+    # 3. Hand the job to a background worker and follow it from the 'running' state
+    st.session_state.job_id = job_manager.submit(
+        st.session_state.uploaded_file.getvalue(),
+        st.session_state.extraction_schema,
+        st.session_state.activity_json_template,
+        st.session_state.activity_event_code,
+        phone_column=st.session_state.phone_column,
+        transcript_column=st.session_state.transcript_column,
+        name=st.session_state.uploaded_file.name
+    )
+    st.session_state.sync_log = []
+    st.session_state.log_offset = 0
+    st.session_state.processing_complete = 'running'
+    st.rerun()
 
-        for index, row in df.iterrows():
-            status_text.text(f"Processing row {index + 1}/{len(df)}...")
-            
-            # --- AI Extraction Step ---
-            transcript = str(row.get(st.session_state.transcript_column, ""))
-            if transcript.strip():
-                extracted_data = extract_from_transcript(transcript, st.session_state.extraction_schema)
-                if extracted_data:
-                    # Merge extracted data into the row for placeholder replacement
-                    for key, value in extracted_data.items():
-                        row[key] = value
-                else:
-                    sync_log.append(f"Row {index+2}: ⚠️ AI extraction failed. Skipping activity post.")
-                    continue
-            
-            # --- Payload Generation Step ---
-            phone_number = str(row[st.session_state.phone_column]).strip()
-            if not phone_number:
-                sync_log.append(f"Row {index+2}: ❌ Missing phone number. Cannot post activity.")
-                continue
+# The job runs in a worker process; each rerun polls its status and streams new log lines
+elif st.session_state.processing_complete == 'running':
+    job_id = st.session_state.job_id
+    status = job_manager.status(job_id)
+    new_lines, st.session_state.log_offset = job_manager.read_log(job_id, st.session_state.log_offset)
+    st.session_state.sync_log.extend(new_lines)
 
-            # Replace placeholders in the JSON template
-            populated_template = st.session_state.activity_json_template
-            for col_name in row.index:
-                placeholder = f"{{{{{col_name}}}}}"
-                # Handle NaN/None values gracefully
-                value_to_insert = "" if pd.isna(row[col_name]) else str(row[col_name])
-                populated_template = populated_template.replace(placeholder, value_to_insert)
+    if status["state"] == FAILED:
+        st.error(status["error"])
+        st.session_state.processing_complete = False
+        st.button("Go Back and Fix")
+        st.stop()
 
-            try:
-                activity_fields = json.loads(populated_template)
-            except json.JSONDecodeError:
-                sync_log.append(f"Row {index+2}: ❌ Error parsing JSON template after placeholder replacement. Skipping.")
-                continue
+    if status["state"] in FINISHED_STATES:
+        st.session_state.job_stats = job_manager.stats(job_id)
+        st.session_state.job_state = status["state"]
+        # Loaded once; reruns reuse the table, aggregates and exports kept here
+        results = job_manager.results(job_id)
+        if results is not None:
+            csv_buffer = io.StringIO()
+            results.to_csv(csv_buffer)
+            st.session_state.results_summary = results.summary()
+            st.session_state.results_table = results.to_pandas()
+            st.session_state.results_csv = csv_buffer.getvalue()
+            if results_store.pa is not None:
+                parquet_buffer = io.BytesIO()
+                results.to_parquet(parquet_buffer)
+                st.session_state.results_parquet = parquet_buffer.getvalue()
+        st.session_state.processing_complete = 'done'
+        st.rerun()
 
-            activity_payload = {
-                "ActivityEvent": st.session_state.activity_event_code,
-                "Fields": activity_fields
-            }
+    st.header("⏳ Processing calls and posting activities...")
+    if status["total"]:
+        st.progress(min(status["done"] / status["total"], 1.0))
+        st.text(f"Processed row {status['done']}/{status['total']}...")
+    else:
+        st.text("Waiting for a worker..." if status["state"] == "queued" else "Reading the file...")
+    st.caption(status["stages"])
 
-            # --- API Call Step ---
-            success, message = post_activity_by_phone(phone_number, activity_payload)
-            sync_log.append(f"Row {index+2} (Phone: {phone_number}): {'✅' if success else '❌'} {message}")
+    if st.button("⏹️ Stop Job", help="Stops reading new rows and cancels the AI extractions in flight; rows already "
+                                    "extracted still post. Re-run the same file to resume."):
+        job_manager.stop(job_id)
+        st.toast("Stopping: cancelling extractions in flight...")
 
-            progress_bar.progress((index + 1) / len(df))
+    with st.expander("Live Sync Log", expanded=True):
+        for log_entry in st.session_state.sync_log[-50:]:
+            st.write(log_entry)
 
-        st.session_state.sync_log = sync_log
-        st.session_state.processing_complete = 'done'
-        st.rerun()
+    time.sleep(1)
+    st.rerun()
 
 elif st.session_state.processing_complete == 'done':
-    st.header("✅ Process Complete!")
-    st.info("All call logs have been processed and activities have been posted to Leadsquared.")
+    if st.session_state.get("job_state") == STOPPED:
+        st.header("⏹️ Job Stopped")
+        st.info("The job was stopped before every row was processed. Upload the same file again to resume where it stopped.")
+    else:
+        st.header("✅ Process Complete!")
+        st.info("All call logs have been processed and activities have been posted to Leadsquared.")
     
+    stats = st.session_state.get("job_stats")
+    if stats:
+        with st.expander("📊 Run Metrics", expanded=False):
+            counters = stats["metrics"]["counters"]
+            llm_latency = stats["metrics"]["histograms"].get("stage_seconds", {}).get("stage=extract", {})
+            columns = st.columns(4)
+            columns[0].metric("Posted", f"{stats['posted']}/{stats['rows']}")
+            columns[1].metric("Extract p95", f"{(llm_latency.get('p95') or 0) * 1000:.0f} ms")
+            columns[2].metric("LLM Tokens", f"{sum(counters.get('llm_tokens_total', {}).values()):,.0f}")
+            columns[3].metric("Est. LLM Cost", f"${sum(counters.get('llm_cost_usd_total', {}).values()):.4f}")
+            st.dataframe(latency_table(stats), use_container_width=True)
+
+    summary = st.session_state.get("results_summary")
+    if summary:
+        st.subheader("🧾 Review Results")
+        counts = summary["counts"]
+        columns = st.columns(2)
+        if counts.get("call_outcome"):
+            columns[0].caption("Call outcomes")
+            columns[0].bar_chart(pd.Series(counts["call_outcome"], name="rows"))
+        if counts.get("call_sentiment"):
+            columns[1].caption("Sentiment mix")
+            columns[1].bar_chart(pd.Series(counts["call_sentiment"], name="rows"))
+        means = [(name, mean) for name, mean in summary["means"].items() if mean is not None]
+        if means:
+            for column, (name, mean) in zip(st.columns(len(means)), means):
+                column.metric(f"Mean {name}", f"{mean:.2f}")
+        st.dataframe(st.session_state.results_table, use_container_width=True)
+
+        download_columns = st.columns(2)
+        download_columns[0].download_button("📥 Download Enriched CSV", st.session_state.results_csv,
+                                            file_name="enriched_calls.csv", mime="text/csv")
+        if st.session_state.get("results_parquet"):
+            download_columns[1].download_button("📥 Download Parquet", st.session_state.results_parquet,
+                                                file_name="enriched_calls.parquet",
+                                                mime="application/octet-stream")
+
     with st.expander("View Full Sync Log", expanded=True):
         for log_entry in st.session_state.sync_log:
             st.write(log_entry)
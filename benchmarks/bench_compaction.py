@@ -0,0 +1,105 @@
+# benchmarks/bench_compaction.py
+#
+# Measures how much transcript compaction cuts prompt tokens, request latency and
+# input cost on a synthetic corpus of dialer calls, against a local mock OpenRouter
+# endpoint whose latency grows with prompt length. Run from the repo root:
+#
+#     python -m benchmarks.bench_compaction
+
+import argparse
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.mock_servers import start_mock_openrouter
+from services import llm_service
+from services.defaults import DEFAULT_EXTRACTION_SCHEMA
+from services.extraction_cache import ExtractionCache
+from services.llm_service import estimate_tokens
+from services.transcript_compactor import compact_transcript
+
+FILLERS = ["um", "uh", "hmm", "you know"]
+LINES = [
+    "I registered for the workshop but I could not join because of office work",
+    "Can you send me the recording on WhatsApp please",
+    "I want to learn AI tools for my job in marketing",
+    "Sunday works better for me, tomorrow I am travelling",
+    "How much does the full program cost after the workshop",
+    "My manager asked us to upskill on data analysis this quarter",
+]
+
+
+def make_transcript(rng: random.Random, turns: int):
+    lines = [f"Call ID: {rng.randint(10 ** 8, 10 ** 9)}", f"Duration: 00:{turns // 6:02d}:{rng.randint(0, 59):02d}"]
+    lines.append("[00:00:01] Agent: Hello? Hello? Hello? Am I speaking with the participant?")
+    for turn in range(turns):
+        speaker = "Agent" if turn % 2 else "Customer"
+        text = rng.choice(LINES)
+        if rng.random() < 0.5:
+            text = f"{rng.choice(FILLERS)}, {text}"
+        line = f"[00:{turn // 60:02d}:{turn % 60:02d}] {speaker}: {text}"
+        lines.append(line)
+        if rng.random() < 0.1:
+            lines.append(line)  # transcription engines often emit a turn twice
+    lines.append("Agent: So we agreed I will send the recording and call you on Sunday at 11 AM.")
+    return "\n".join(lines)
+
+
+def run_extractions(transcripts: list, workers: int):
+    latencies = []
+
+    def timed(transcript):
+        start = time.perf_counter()
+        result = llm_service.extract_from_transcript(transcript, DEFAULT_EXTRACTION_SCHEMA)
+        latencies.append(time.perf_counter() - start)
+        return result
+
+    # extract_many is not used so each request can be timed individually
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(timed, transcripts))
+    return time.perf_counter() - start, latencies
+
+
+def main(rows: int, min_turns: int, max_turns: int, budget: int, latency: float,
+         latency_per_1k_tokens: float, price_per_mtok: float, workers: int):
+    rng = random.Random(7)
+    raw = [make_transcript(rng, rng.randint(min_turns, max_turns)) for _ in range(rows)]
+    compacted = [compact_transcript(transcript, budget)[0] for transcript in raw]
+
+    server, url = start_mock_openrouter(latency=latency, latency_per_1k_tokens=latency_per_1k_tokens)
+    llm_service.OPENROUTER_API_URL = url
+    llm_service.OPENROUTER_API_KEY = "benchmark"
+    # Both passes must reach the mock server, so run without the extraction cache
+    llm_service.extraction_cache = ExtractionCache(path="")
+
+    print(f"{rows} calls, {min_turns}-{max_turns} turns each, token budget {budget}")
+    print(f"{'transcripts':>12} {'tokens':>10} {'tokens/row':>11} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'seconds':>8} {'input $':>9}")
+    try:
+        for label, transcripts in (("raw", raw), ("compacted", compacted)):
+            tokens = sum(estimate_tokens(transcript) for transcript in transcripts)
+            elapsed, latencies = run_extractions(transcripts, workers)
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(f"{label:>12} {tokens:>10} {tokens / rows:>11.0f} {statistics.median(latencies) * 1000:>8.0f} "
+                  f"{p95 * 1000:>8.0f} {elapsed:>8.2f} {tokens / 1e6 * price_per_mtok:>9.4f}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark transcript compaction.")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--min-turns", type=int, default=20)
+    parser.add_argument("--max-turns", type=int, default=600)
+    parser.add_argument("--budget", type=int, default=2000, help="Token budget for compacted transcripts")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock base latency in seconds")
+    parser.add_argument("--latency-per-1k-tokens", type=float, default=0.05,
+                        help="Mock extra latency per thousand prompt tokens")
+    parser.add_argument("--price-per-mtok", type=float, default=0.15, help="Input price per million tokens")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+    main(args.rows, args.min_turns, args.max_turns, args.budget, args.latency,
+         args.latency_per_1k_tokens, args.price_per_mtok, args.workers)
@@ -0,0 +1,64 @@
+# benchmarks/bench_extraction_concurrency.py
+#
+# Measures extraction throughput against a local mock OpenRouter endpoint
+# at increasing concurrency caps, with a thread per request or, with --async,
+# coroutines on one event loop. Run from the repo root:
+#
+#     python -m benchmarks.bench_extraction_concurrency
+#     python -m benchmarks.bench_extraction_concurrency --async --rows 5000 --concurrency 50 200 1000
+
+import argparse
+import time
+
+from benchmarks.mock_servers import start_mock_openrouter
+from services import llm_service, rate_limiter
+from services.http_client import run_async
+from services.extraction_cache import ExtractionCache
+
+
+def run(rows: int, latency: float, concurrency_levels: list, use_async: bool = False):
+    server, url = start_mock_openrouter(latency=latency)
+    llm_service.OPENROUTER_API_URL = url
+    llm_service.OPENROUTER_API_KEY = "benchmark"
+    # Every level must reach the mock server, so run without the extraction cache
+    llm_service.extraction_cache = ExtractionCache(path="")
+    # Measure the client, not the production request budget
+    rate_limiter.ENDPOINT_RATES["openrouter"] = 100000
+
+    schema = [
+        {"name": "call_outcome", "prompt": "Classify the outcome."},
+        {"name": "call_summary", "prompt": "Summarize the call."},
+    ]
+    transcripts = [f"Agent: Hello, this is call {i}. Customer: Hi there." for i in range(rows)]
+
+    print(f"{rows} rows, mock latency {latency * 1000:.0f} ms/request, {'asyncio' if use_async else 'threads'}")
+    print(f"{'concurrency':>12} {'seconds':>10} {'rows/s':>10} {'speedup':>10}")
+
+    baseline = None
+    try:
+        for concurrency in concurrency_levels:
+            start = time.perf_counter()
+            if use_async:
+                results = run_async(llm_service.extract_many_async(transcripts, schema, max_concurrency=concurrency))
+            else:
+                results = llm_service.extract_many(transcripts, schema, max_workers=concurrency)
+            elapsed = time.perf_counter() - start
+
+            failed = sum(1 for result in results if result is None)
+            throughput = rows / elapsed
+            baseline = baseline or throughput
+            print(f"{concurrency:>12} {elapsed:>10.2f} {throughput:>10.1f} {throughput / baseline:>9.1f}x"
+                  + (f"  ({failed} failed)" if failed else ""))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark extraction throughput by concurrency cap.")
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock response latency in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Use extract_many_async instead of the thread pool")
+    args = parser.parse_args()
+    run(args.rows, args.latency, args.concurrency, args.use_async)
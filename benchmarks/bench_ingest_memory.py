@@ -0,0 +1,91 @@
+# benchmarks/bench_ingest_memory.py
+#
+# Compares peak memory of whole-file pd.read_csv + iterrows with the chunked,
+# column-pruned ingestion in services/ingest.py on a synthetic call-log CSV.
+# Each mode runs in its own subprocess so peak RSS is measured independently.
+# Run from the repo root:
+#
+#     python -m benchmarks.bench_ingest_memory --rows 200000
+
+import argparse
+import csv
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+TEMPLATE = '[{"SchemaName": "mx_Custom_3", "Value": "{{recordingUrl}}"}, {"SchemaName": "mx_Custom_2", "Value": "{{call_outcome}}"}]'
+WORDS = "yes no workshop sunday tomorrow recording busy call back later interested course fees time".split()
+
+
+def write_synthetic_csv(path: str, rows: int, transcript_words: int):
+    rng = random.Random(42)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["callId", "phoneNumber", "transcript", "recordingUrl", "agent", "campaign",
+                         "startedAt", "endedAt", "durationSeconds", "disposition", "notes"])
+        for i in range(rows):
+            transcript = "\n".join(
+                f"{'Agent' if turn % 2 else 'Customer'}: " + " ".join(rng.choices(WORDS, k=12))
+                for turn in range(transcript_words // 12)
+            )
+            writer.writerow([f"call-{i}", 9000000000 + i, transcript, f"https://rec.example.com/{i}.mp3",
+                             "Rohan", "workshop", "2024-09-20T10:00:00", "2024-09-20T10:05:00",
+                             300, "ANSWERED", "synthetic row " * 20])
+
+
+def run_full(path: str):
+    import pandas as pd
+    df = pd.read_csv(path)
+    count = 0
+    for _, row in df.iterrows():
+        count += len(str(row["transcript"])) > 0
+    return count
+
+
+def run_stream(path: str):
+    from services.ingest import iter_rows, required_columns
+    columns = required_columns(path, "phoneNumber", "transcript", TEMPLATE)
+    count = 0
+    for _, row in iter_rows(path, columns):
+        count += len(row["transcript"]) > 0
+    return count
+
+
+def measure(mode: str, path: str):
+    start = time.perf_counter()
+    rows = run_full(path) if mode == "full" else run_stream(path)
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{mode},{rows},{elapsed:.2f},{peak_mb:.0f}")
+
+
+def main(rows: int, transcript_words: int):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "calls.csv")
+        write_synthetic_csv(path, rows, transcript_words)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"Synthetic CSV: {rows} rows, {size_mb:.0f} MB")
+        print(f"{'mode':>8} {'rows':>10} {'seconds':>10} {'peak RSS (MB)':>15}")
+        for mode in ("full", "stream"):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_ingest_memory", "--measure", mode, path],
+                capture_output=True, text=True, check=True
+            ).stdout.strip().splitlines()[-1]
+            _, count, elapsed, peak = output.split(",")
+            print(f"{mode:>8} {count:>10} {elapsed:>10} {peak:>15}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark peak memory of CSV ingestion strategies.")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--transcript-words", type=int, default=400)
+    parser.add_argument("--measure", nargs=2, metavar=("MODE", "CSV"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        measure(*args.measure)
+    else:
+        main(args.rows, args.transcript_words)
@@ -0,0 +1,70 @@
+# benchmarks/bench_phone_normalization.py
+#
+# Normalizes a synthetic phone column the way dialer exports actually look
+# (float artifacts, country codes, trunk zeros, punctuation, blanks) with the
+# per-row normalize_phone loop, normalize_phones (each distinct cell once) and the chunked
+# PhoneIndex build the pipeline uses. Run from the repo root:
+#
+#     python -m benchmarks.bench_phone_normalization --rows 1000000
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from services.ingest import INGEST_CHUNK_SIZE
+from services.phone_utils import PhoneIndex, normalize_phone, normalize_phones
+
+
+def make_column(rows: int, leads: int, seed: int = 42):
+    rng = random.Random(seed)
+    formats = [
+        lambda digits: digits,
+        lambda digits: f"{digits}.0",
+        lambda digits: f"+91 {digits[:5]}-{digits[5:]}",
+        lambda digits: f"91{digits}",
+        lambda digits: f"0{digits}",
+        lambda digits: f"({digits[:3]}) {digits[3:6]} {digits[6:]}",
+        lambda digits: "",
+    ]
+    return [rng.choice(formats)(str(9000000000 + rng.randrange(leads))) for _ in range(rows)]
+
+
+def timed(label: str, func):
+    start = time.perf_counter()
+    value = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<38} {elapsed:>8.2f}s")
+    return value, elapsed
+
+
+def main(rows: int, leads: int):
+    column = make_column(rows, leads)
+    print(f"{rows} rows calling {leads} leads in mixed formats")
+
+    scalar, scalar_seconds = timed("normalize_phone per row", lambda: [normalize_phone(value) for value in column])
+    normalized, normalized_seconds = timed("normalize_phones (distinct cells)", lambda: normalize_phones(column))
+    assert list(normalized) == scalar, "column and per-row normalization disagree"
+    print(f"{'speedup':<38} {scalar_seconds / normalized_seconds:>8.1f}x")
+
+    chunks = [column[start:start + INGEST_CHUNK_SIZE] for start in range(0, rows, INGEST_CHUNK_SIZE)]
+    index, _ = timed(f"PhoneIndex.build ({INGEST_CHUNK_SIZE}-row chunks)", lambda: PhoneIndex.build(chunks))
+    stats = index.stats()
+    raw_distinct = len(set(value for value in column if value))
+    print(f"distinct raw values: {raw_distinct}; distinct numbers after normalization: {stats['unique']} "
+          f"({raw_distinct - stats['unique']} lead lookups saved)")
+    print(f"repeat calls: {stats['repeat_rows']}; rows without a number: {stats['empty']}")
+    print(f"index size: {index.codes.nbytes / 1e6:.1f} MB of row codes for {stats['unique']} numbers")
+
+    sample = np.random.default_rng(1).integers(2, rows + 2, 100000).tolist()
+    timed("100k index.phone(row) lookups", lambda: [index.phone(row) for row in sample])
+    timed("rows_for every number", lambda: [index.rows_for(phone) for phone in index.phones])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark phone normalization and the dedup index.")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--leads", type=int, default=300000, help="Distinct phone numbers in the column")
+    args = parser.parse_args()
+    main(args.rows, args.leads)
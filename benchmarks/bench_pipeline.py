@@ -0,0 +1,186 @@
+# benchmarks/bench_pipeline.py
+#
+# End-to-end throughput benchmark: runs the full pipeline (ingest -> lead lookup ->
+# extraction -> render -> bulk post) on synthetic call logs against local mock
+# OpenRouter and Leadsquared servers, so no tokens are spent and no CRM is touched.
+# Each size runs in its own subprocess so peak RSS is measured independently; the
+# mock servers run in this process and don't count towards it. Run from the repo root:
+#
+#     python -m benchmarks.bench_pipeline --rows 1000 10000 100000
+#     python -m benchmarks.bench_pipeline --rows 10000 --error-rate 0.02 --throttle-rate 0.01
+#     LLM_HEDGING=true python -m benchmarks.bench_pipeline --rows 1000 --slow-rate 0.05
+
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.mock_servers import start_mock_openrouter, start_mock_leadsquared
+
+WORDS = ("yes no workshop sunday tomorrow recording busy call back later interested course fees "
+         "time batch weekend discount brochure whatsapp demo session payment timing").split()
+VOICEMAILS = [
+    "The number you have dialled is currently switched off. Please try again later.",
+    "Hi, you've reached my voicemail. Please leave a message after the beep.",
+    "The subscriber you are trying to reach is not available at the moment.",
+]
+
+
+def _phone(rng: random.Random, lead: int):
+    # The formats dialer exports actually contain: floats from spreadsheets,
+    # country codes, punctuation, and blanks
+    digits = str(9000000000 + lead)
+    return rng.choice([digits, f"{digits}.0", f"+91 {digits[:5]}-{digits[5:]}", f"91{digits}", digits, ""])
+
+
+def _transcript(rng: random.Random, turns: int):
+    return "\n".join(
+        f"{'Agent' if turn % 2 == 0 else 'Customer'}: " + " ".join(rng.choices(WORDS, k=rng.randint(6, 18)))
+        for turn in range(turns)
+    )
+
+
+def write_call_log(path: str, rows: int, seed: int = 42):
+    """
+    Writes a synthetic call-log CSV with a realistic mix of calls: mostly short
+    and medium conversations, some long ones, voicemails, empty transcripts and
+    repeat calls to the same lead.
+    """
+    rng = random.Random(seed)
+    leads = max(rows // 3, 1)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["callId", "phoneNumber", "transcript", "recordingUrl", "agent", "durationSeconds"])
+        for i in range(rows):
+            kind = rng.random()
+            if kind < 0.15:
+                transcript = rng.choice(VOICEMAILS)
+            elif kind < 0.2:
+                transcript = ""
+            elif kind < 0.9:
+                transcript = _transcript(rng, rng.randint(4, 20))
+            else:
+                transcript = _transcript(rng, rng.randint(80, 200))
+            writer.writerow([f"call-{i}", _phone(rng, rng.randrange(leads)), transcript,
+                             f"https://rec.example.com/{i}.mp3", "Rohan", rng.randint(5, 900)])
+
+
+def _percentile(values: list, share: float):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def measure(path: str, llm_workers: int, lead_workers: int):
+    """Runs one job in this process and prints its results as one JSON line."""
+    from services.defaults import DEFAULT_EXTRACTION_SCHEMA, DEFAULT_ACTIVITY_EVENT_CODE, DEFAULT_ACTIVITY_FIELDS
+    from services.pipeline import run_job
+
+    row_seconds = []
+
+    def on_row(result):
+        if result["status"] == "posted" and result["timings"]:
+            row_seconds.append(sum(result["timings"].values()))
+
+    start = time.perf_counter()
+    stats = run_job(path, DEFAULT_EXTRACTION_SCHEMA, json.dumps(DEFAULT_ACTIVITY_FIELDS),
+                    DEFAULT_ACTIVITY_EVENT_CODE, llm_workers=llm_workers, lead_workers=lead_workers,
+                    on_row=on_row)
+    elapsed = time.perf_counter() - start
+
+    llm_latency = stats["metrics"]["histograms"].get("http_request_seconds", {}).get(
+        "endpoint=openrouter,status=200", {})
+    print(json.dumps({
+        "rows": stats["rows"],
+        "seconds": elapsed,
+        "posted": stats["posted"],
+        "failed": stats["failed"] + stats["extraction_failed"],
+        "skipped": stats["skipped"],
+        "row_p50": _percentile(row_seconds, 0.5),
+        "row_p95": _percentile(row_seconds, 0.95),
+        "llm_p95": llm_latency.get("p95") or 0.0,
+        "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def main(args):
+    openrouter, openrouter_url = start_mock_openrouter(
+        latency=args.llm_latency, latency_per_1k_tokens=args.llm_latency_per_1k_tokens,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate, retry_after=args.retry_after,
+        slow_rate=args.slow_rate, slow_latency=args.slow_latency)
+    leadsquared, leadsquared_host = start_mock_leadsquared(
+        latency=args.lead_latency, error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after)
+
+    # The child runs the real services against the mocks, with caches and the journal
+    # off so every row does the full work
+    env = {
+        **os.environ,
+        "OPENROUTER_API_URL": openrouter_url,
+        "OPENROUTER_API_KEY": "benchmark",
+        "LEADSQUARED_HOST": leadsquared_host,
+        "LEADSQUARED_ACCESS_KEY": "benchmark",
+        "LEADSQUARED_SECRET_KEY": "benchmark",
+        "EXTRACTION_CACHE_PATH": "",
+        "JOB_JOURNAL_PATH": "",
+        "LEAD_CACHE_PATH": "",
+        "LEADSQUARED_LOOKUP_RATE": str(args.rate),
+        "LEADSQUARED_ACTIVITY_RATE": str(args.rate),
+        "OPENROUTER_RATE": str(args.rate),
+    }
+
+    print(f"Mock latency: LLM {args.llm_latency * 1000:.0f} ms, Leadsquared {args.lead_latency * 1000:.0f} ms; "
+          f"error rate {args.error_rate:.0%}, throttle rate {args.throttle_rate:.0%}; "
+          f"{args.llm_workers} LLM / {args.lead_workers} lead workers")
+    print(f"{'rows':>8} {'seconds':>9} {'rows/s':>8} {'posted':>8} {'failed':>7} {'skipped':>8} "
+          f"{'row p50':>9} {'row p95':>9} {'LLM p95':>9} {'peak RSS (MB)':>14}")
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for rows in args.rows:
+                path = os.path.join(directory, f"calls_{rows}.csv")
+                write_call_log(path, rows)
+                output = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_pipeline", "--measure", path,
+                     "--llm-workers", str(args.llm_workers), "--lead-workers", str(args.lead_workers)],
+                    capture_output=True, text=True, check=True, env=env
+                ).stdout.strip().splitlines()[-1]
+                result = json.loads(output)
+                print(f"{result['rows']:>8} {result['seconds']:>9.1f} {result['rows'] / result['seconds']:>8.1f} "
+                      f"{result['posted']:>8} {result['failed']:>7} {result['skipped']:>8} "
+                      f"{result['row_p50'] * 1000:>7.0f}ms {result['row_p95'] * 1000:>7.0f}ms "
+                      f"{result['llm_p95'] * 1000:>7.0f}ms {result['peak_mb']:>14.0f}")
+    finally:
+        print(f"Mock OpenRouter: {openrouter.counts}; mock Leadsquared: {leadsquared.counts}")
+        openrouter.shutdown()
+        leadsquared.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the end-to-end pipeline against local mock APIs.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Mock OpenRouter latency in seconds")
+    parser.add_argument("--llm-latency-per-1k-tokens", type=float, default=0.02)
+    parser.add_argument("--lead-latency", type=float, default=0.02, help="Mock Leadsquared latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered with a 429")
+    parser.add_argument("--retry-after", type=float, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--slow-rate", type=float, default=0.0,
+                        help="Share of LLM requests delayed by --slow-latency (set LLM_HEDGING=true to hedge them)")
+    parser.add_argument("--slow-latency", type=float, default=2.0, help="Extra seconds for slow LLM requests")
+    parser.add_argument("--rate", type=float, default=1000,
+                        help="Client-side requests per second per endpoint budget (production defaults are far lower)")
+    parser.add_argument("--llm-workers", type=int, default=32)
+    parser.add_argument("--lead-workers", type=int, default=16)
+    parser.add_argument("--measure", metavar="CSV", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        measure(args.measure, args.llm_workers, args.lead_workers)
+    else:
+        main(args)
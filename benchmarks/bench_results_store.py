@@ -0,0 +1,94 @@
+# benchmarks/bench_results_store.py
+#
+# Compares the columnar ResultsStore with keeping row results as a list of dicts
+# and rebuilding a DataFrame for every aggregate view, on a synthetic job. Run
+# from the repo root:
+#
+#     python -m benchmarks.bench_results_store --rows 100000
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from services.defaults import DEFAULT_EXTRACTION_SCHEMA
+from services.results_store import ResultsStore, pa
+
+
+def make_results(count: int, seed: int = 7):
+    """Row results shaped like run_job's, with a realistic mix of statuses."""
+    rng = random.Random(seed)
+    results = []
+    for i in range(count):
+        status = rng.choices(["posted", "skipped", "failed", "extraction_failed"], [80, 15, 3, 2])[0]
+        extracted = None
+        if status in ("posted", "failed"):
+            extracted = {}
+            for item in DEFAULT_EXTRACTION_SCHEMA:
+                if item.get("enum"):
+                    extracted[item["name"]] = rng.choice(item["enum"])
+                elif item.get("type") == "integer":
+                    extracted[item["name"]] = rng.randint(1, 10)
+                elif item.get("type") == "float":
+                    extracted[item["name"]] = round(rng.random(), 2)
+                else:
+                    extracted[item["name"]] = " ".join(rng.choices(["callback", "fees", "weekend", "career"], k=12))
+        results.append({
+            "row": i + 2, "phone": f"{9000000000 + i}" if status != "skipped" else None, "status": status,
+            "message": "Activity posted." if status == "posted" else "Lead not found.",
+            "extracted": extracted, "timings": {"resolve": 0.02, "extract": 0.8, "post": 0.05},
+            "llm_usage": {"prompt_tokens": 900, "completion_tokens": 150, "cost_usd": 0.0002},
+        })
+    # Rows finish out of order
+    rng.shuffle(results)
+    return results
+
+
+def timed(label: str, func):
+    start = time.perf_counter()
+    value = func()
+    print(f"{label:<42} {time.perf_counter() - start:>8.3f}s")
+    return value
+
+
+def dict_aggregates(results: list):
+    # What a rerun had to do without the store: flatten every row, then aggregate
+    frame = pd.DataFrame([{"row": r["row"], "status": r["status"], **(r["extracted"] or {})} for r in results])
+    return (frame["call_outcome"].value_counts(), frame["call_sentiment"].value_counts(),
+            frame["ai_performance_score"].mean())
+
+
+def main(rows: int):
+    print(f"{rows} row results, {len(DEFAULT_EXTRACTION_SCHEMA)} schema fields")
+    results = make_results(rows)
+
+    timed("list of dicts: DataFrame + aggregates", lambda: dict_aggregates(results))
+
+    store = ResultsStore(DEFAULT_EXTRACTION_SCHEMA)
+    timed("store: append every row", lambda: store.extend(results))
+    timed("store: summary (first, concatenates)", store.summary)
+    summary = timed("store: summary (cached columns)", store.summary)
+    print(f"  outcomes: {summary['counts']['call_outcome']}")
+    print(f"  sentiment: {summary['counts']['call_sentiment']}")
+    print(f"  mean ai_performance_score: {summary['means']['ai_performance_score']:.2f}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        timed("store: to_csv", lambda: store.to_csv(os.path.join(directory, "enriched.csv")))
+        if pa is not None:
+            timed("store: to_parquet", lambda: store.to_parquet(os.path.join(directory, "enriched.parquet")))
+        else:
+            print("store: to_parquet skipped (pyarrow not installed)")
+        path = os.path.join(directory, "results.npz")
+        timed("store: save", lambda: store.save(path))
+        loaded = timed("store: load", lambda: ResultsStore.load(path))
+        timed("loaded store: summary", loaded.summary)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the columnar results store.")
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+    main(args.rows)
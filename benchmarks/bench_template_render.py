@@ -0,0 +1,94 @@
+# benchmarks/bench_template_render.py
+#
+# Micro-benchmark of the compiled activity-template renderer against the
+# original per-column str.replace + json.loads approach. Run from the repo root:
+#
+#     python -m benchmarks.bench_template_render
+
+import argparse
+import json
+import random
+import time
+
+from services.template_renderer import compile_template
+
+TEMPLATE = json.dumps([
+    {"SchemaName": "mx_Custom_2", "Value": "{{call_outcome}}"},
+    {"SchemaName": "mx_Custom_4", "Value": "", "Fields": [{"SchemaName": "mx_CustomObject_121", "Value": "{{call_summary}}"}]},
+    {"SchemaName": "mx_Custom_3", "Value": "{{recordingUrl}}"},
+    {"SchemaName": "mx_Custom_1", "Value": "", "Fields": [{"SchemaName": "mx_CustomObject_121", "Value": "{{transcript}}"}]},
+    {"SchemaName": "Status", "Value": "Active"},
+    {"SchemaName": "mx_Custom_5", "Value": "{{lead_stage}}"},
+    {"SchemaName": "mx_Custom_6", "Value": "{{customer_goal}}"},
+    {"SchemaName": "mx_Custom_7", "Value": "{{objections}}"},
+    {"SchemaName": "mx_Custom_8", "Value": "{{next_step}}"},
+    {"SchemaName": "mx_Custom_9", "Value": "{{rapport_hooks}}"},
+    {"SchemaName": "mx_Custom_10", "Value": "{{call_sentiment}}"},
+    {"SchemaName": "mx_Custom_11", "Value": "{{ai_performance_score}}"},
+    {"SchemaName": "mx_Custom_12", "Value": "{{talk_to_listen_ratio}}"},
+], indent=2)
+
+
+def make_rows(count: int, extra_columns: int, quote_share: float):
+    rng = random.Random(7)
+    rows = []
+    for i in range(count):
+        # Real transcripts contain newlines and, often, quotes
+        quoted = rng.random() < quote_share
+        transcript = "\n".join(
+            f"Agent: turn {turn} " + ('she said "call me later"' if quoted else "call me later")
+            for turn in range(60)
+        )
+        row = {
+            "phoneNumber": f"98765{i:05d}", "transcript": transcript,
+            "recordingUrl": f"https://rec.example.com/{i}.mp3",
+            "call_outcome": "Voicemail / No Answer", "call_summary": "Customer asked for a callback.",
+            "lead_stage": "Call Again Later", "customer_goal": "Career growth", "objections": "Time commitment",
+            "next_step": "Call back tomorrow", "rapport_hooks": "works in IT", "call_sentiment": "Neutral",
+            "ai_performance_score": 7, "talk_to_listen_ratio": 0.4,
+        }
+        row.update({f"extra_{n}": f"value {n}" for n in range(extra_columns)})
+        rows.append(row)
+    return rows
+
+
+def render_legacy(template: str, row: dict):
+    populated_template = template
+    for col_name, value in row.items():
+        placeholder = f"{{{{{col_name}}}}}"
+        populated_template = populated_template.replace(placeholder, "" if value is None else str(value))
+    return json.loads(populated_template)
+
+
+def main(rows: int, extra_columns: int, quote_share: float):
+    data = make_rows(rows, extra_columns, quote_share)
+
+    start = time.perf_counter()
+    legacy_failed = 0
+    for row in data:
+        try:
+            render_legacy(TEMPLATE, row)
+        except json.JSONDecodeError:
+            legacy_failed += 1
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled = compile_template(TEMPLATE)
+    for row in data:
+        compiled.render(row)
+    compiled_seconds = time.perf_counter() - start
+
+    print(f"{rows} rows, {len(data[0])} columns per row")
+    print(f"{'renderer':>10} {'seconds':>10} {'us/row':>10} {'failed rows':>12}")
+    print(f"{'legacy':>10} {legacy_seconds:>10.3f} {legacy_seconds / rows * 1e6:>10.1f} {legacy_failed:>12}")
+    print(f"{'compiled':>10} {compiled_seconds:>10.3f} {compiled_seconds / rows * 1e6:>10.1f} {0:>12}")
+    print(f"speedup: {legacy_seconds / compiled_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark activity template rendering.")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--extra-columns", type=int, default=20, help="Unused CSV columns per row")
+    parser.add_argument("--quote-share", type=float, default=0.3, help="Share of transcripts containing quotes")
+    args = parser.parse_args()
+    main(args.rows, args.extra_columns, args.quote_share)
@@ -0,0 +1,105 @@
+# benchmarks/eval_preclassifier.py
+#
+# Compares the rule-based pre-classifier's labels with LLM labels on a sample of
+# real calls. LLM labels come either from a results.jsonl written by a cli.py run
+# without --preclassify (no extra cost) or from fresh extractions. Run from the repo root:
+#
+#     python -m benchmarks.eval_preclassifier calls.csv --llm-results results/results.jsonl
+
+import argparse
+import json
+import random
+from collections import Counter
+
+from services.defaults import DEFAULT_EXTRACTION_SCHEMA, DEFAULT_TRIVIAL_CALL_VALUES
+from services.ingest import iter_column
+from services import llm_service
+from services.preclassifier import classify_transcript, CATEGORIES
+
+
+def _normalize_label(value):
+    return " ".join(str(value).split()).lower() if value is not None else ""
+
+
+def load_llm_results(path: str):
+    """Reads {row: extracted} from a cli.py results.jsonl, skipping rows without an extraction."""
+    labels = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            result = json.loads(line)
+            if result.get("extracted"):
+                labels[result["row"]] = result["extracted"]
+    return labels
+
+
+def main(csv_path: str, transcript_column: str, llm_results: str, sample: int, seed: int,
+         schema: list, trivial_call_values: dict):
+    transcripts = {row: text for row, text in enumerate(iter_column(csv_path, transcript_column), start=2)}
+    categories = {row: classify_transcript(text) for row, text in transcripts.items()}
+
+    coverage = Counter(category for category in categories.values() if category)
+    print(f"{len(transcripts)} calls, {sum(coverage.values())} pre-classified "
+          f"({sum(coverage.values()) / max(len(transcripts), 1):.0%} of LLM calls saved)")
+    for category in CATEGORIES:
+        print(f"  {category:<12} {coverage[category]:>8}")
+
+    classified_rows = [row for row, category in categories.items() if category in trivial_call_values]
+    if llm_results:
+        labels = load_llm_results(llm_results)
+        classified_rows = [row for row in classified_rows if row in labels]
+    rows = random.Random(seed).sample(classified_rows, min(sample, len(classified_rows)))
+    if not rows:
+        print("No pre-classified rows with LLM labels to compare.")
+        return
+
+    if not llm_results:
+        print(f"Extracting {len(rows)} sampled calls with the LLM...")
+        extracted = llm_service.extract_many([transcripts[row] for row in rows], schema)
+        labels = {row: result for row, result in zip(rows, extracted) if result}
+        rows = [row for row in rows if row in labels]
+
+    # Only fields the configuration gives a value are compared; the rest are left empty by design
+    agreement = Counter()
+    compared = Counter()
+    disagreements = Counter()
+    for row in rows:
+        configured = trivial_call_values[categories[row]]
+        for field, value in configured.items():
+            if field not in labels[row]:
+                continue
+            compared[field] += 1
+            if _normalize_label(value) == _normalize_label(labels[row][field]):
+                agreement[field] += 1
+            else:
+                disagreements[(field, categories[row], str(labels[row][field])[:60])] += 1
+
+    print(f"\nAgreement with LLM labels on {len(rows)} sampled pre-classified calls:")
+    print(f"{'field':<22} {'compared':>9} {'agree':>7}")
+    for field, count in compared.items():
+        print(f"{field:<22} {count:>9} {agreement[field] / count:>6.0%}")
+
+    if disagreements:
+        print("\nMost common disagreements (field, category, LLM label):")
+        for (field, category, label), count in disagreements.most_common(10):
+            print(f"  {count:>5}  {field} / {category}: {label}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate the transcript pre-classifier against LLM labels.")
+    parser.add_argument("csv", help="Call-log CSV file")
+    parser.add_argument("--transcript-column", default="transcript")
+    parser.add_argument("--llm-results", help="results.jsonl from a cli.py run without --preclassify")
+    parser.add_argument("--sample", type=int, default=200, help="Pre-classified calls compared")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--schema", help="Extraction schema JSON file (defaults to the built-in schema)")
+    parser.add_argument("--trivial-defaults", help="JSON file of {category: {field: value}}")
+    args = parser.parse_args()
+
+    def load(path, default):
+        if not path:
+            return default
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    main(args.csv, args.transcript_column, args.llm_results, args.sample, args.seed,
+         load(args.schema, DEFAULT_EXTRACTION_SCHEMA), load(args.trivial_defaults, DEFAULT_TRIVIAL_CALL_VALUES))
@@ -0,0 +1,253 @@
+# benchmarks/mock_servers.py
+
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def _mock_value(field_schema: dict):
+    """A value that passes validation for one structured-output property."""
+    if field_schema.get("enum"):
+        return field_schema["enum"][0]
+    if field_schema.get("type") == "integer":
+        return 7
+    if field_schema.get("type") == "number":
+        return 0.5
+    return "mock value"
+
+
+def _mock_answer(response_format: dict, user_prompt: str):
+    """Answers every requested field, following the JSON schema when one is sent."""
+    schema = response_format.get("json_schema", {}).get("schema")
+    if schema:
+        properties = schema["properties"]
+        if "results" in properties:
+            properties = properties["results"]["items"]["properties"]
+        return {name: _mock_value(field_schema) for name, field_schema in properties.items() if name != "id"}
+    fields = re.findall(r'"([^"]+)": "\.\.\."', user_prompt)
+    return {field: "mock value" for field in fields}
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    """Shared plumbing for the mock servers: JSON replies and injected faults."""
+    protocol_version = "HTTP/1.1"
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, data, status: int = 200, headers: dict = None):
+        response = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(response)
+
+    def _inject_fault(self):
+        """Answers with a 429 or a 500 at the configured rates. Returns True if it did."""
+        with self.server.fault_lock:
+            draw = self.server.random.random()
+        if draw < self.server.throttle_rate:
+            self.server.count("throttled")
+            self._send_json({"error": "Too Many Requests"}, 429,
+                            {"Retry-After": str(self.server.retry_after)})
+            return True
+        if draw < self.server.throttle_rate + self.server.error_rate:
+            self.server.count("errors")
+            self._send_json({"error": "Internal Server Error"}, 500)
+            return True
+        return False
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Benchmarks open hundreds of connections at once; the default backlog of 5 drops them
+    request_queue_size = 1024
+
+    def __init__(self, port: int, handler, latency: float, error_rate: float, throttle_rate: float,
+                 retry_after: float, seed: int):
+        super().__init__(("127.0.0.1", port), handler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.fault_lock = threading.Lock()
+        self.counts = {"requests": 0, "throttled": 0, "errors": 0}
+
+    def count(self, key: str):
+        with self.fault_lock:
+            self.counts[key] += 1
+
+    def handle_error(self, request, client_address):
+        # Clients close connections they give up on, e.g. the slower of two hedged requests
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _MockOpenRouterHandler(_MockHandler):
+    """
+    Emulates /api/v1/chat/completions. Every requested field is answered with a
+    fixed value valid for its structured-output schema (or a placeholder string in
+    plain JSON mode) after a configurable delay, once per transcript for batched prompts.
+    """
+
+    def do_POST(self):
+        body = self._read_json()
+        self.server.count("requests")
+
+        user_prompt = body.get("messages", [{}])[-1].get("content", "")
+        # Longer prompts take longer to process, roughly four characters per token
+        delay = self.server.latency + self.server.latency_per_1k_tokens * len(user_prompt) / 4000
+        with self.server.fault_lock:
+            slow = self.server.slow_rate and self.server.random.random() < self.server.slow_rate
+        if slow:
+            self.server.count("slow")
+            delay += self.server.slow_latency
+        time.sleep(delay)
+        if self._inject_fault():
+            return
+
+        answer = _mock_answer(body.get("response_format", {}), user_prompt)
+        # Batched prompts carry numbered transcripts and expect a "results" array
+        transcript_ids = re.findall(r"--- TRANSCRIPT (\d+) START ---", user_prompt)
+        if transcript_ids:
+            content = json.dumps({"results": [{"id": int(number), **answer} for number in transcript_ids]})
+        else:
+            content = json.dumps(answer)
+
+        self._send_json({
+            "model": body.get("model"),
+            "choices": [{"message": {"role": "assistant", "content": content}}],
+            # Estimated the same way as the client, about four characters per token
+            "usage": {"prompt_tokens": len(user_prompt) // 4 + 1, "completion_tokens": len(content) // 4 + 1},
+        })
+
+
+def start_mock_openrouter(latency: float = 0.2, port: int = 0, latency_per_1k_tokens: float = 0.0,
+                          error_rate: float = 0.0, throttle_rate: float = 0.0, retry_after: float = 1,
+                          slow_rate: float = 0.0, slow_latency: float = 2.0, seed: int = 7):
+    """
+    Starts a mock OpenRouter server on a background thread.
+
+    Args:
+        latency (float): Seconds each request sleeps before responding.
+        latency_per_1k_tokens (float): Extra seconds per thousand prompt tokens.
+        error_rate (float): Share of requests answered with a 500.
+        throttle_rate (float): Share of requests answered with a 429 and Retry-After.
+        retry_after (float): Seconds sent in the Retry-After header of 429s.
+        slow_rate (float): Share of requests delayed by slow_latency extra seconds, for tail latency.
+        port (int): Port to bind on localhost. 0 picks a free port.
+
+    Returns:
+        tuple: (server, url) where url points at the chat completions endpoint.
+               server.counts holds requests/throttled/errors/slow. Call server.shutdown() when done.
+    """
+    server = _MockServer(port, _MockOpenRouterHandler, latency, error_rate, throttle_rate, retry_after, seed)
+    server.latency_per_1k_tokens = latency_per_1k_tokens
+    server.slow_rate = slow_rate
+    server.slow_latency = slow_latency
+    server.counts["slow"] = 0
+    server.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/api/v1/chat/completions"
+    return server, url
+
+
+class _MockLeadsquaredHandler(_MockHandler):
+    """
+    Emulates the Leadsquared endpoints the tool calls: RetrieveLeadByPhoneNumber,
+    ProspectActivity.svc/Create, Bulk/Create and Retrieve. Created activities are
+    kept in memory so resumed jobs can find them again.
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.server.count("requests")
+        time.sleep(self.server.latency)
+        if self._inject_fault():
+            return
+        if not url.path.endswith("/RetrieveLeadByPhoneNumber"):
+            self._send_json({"Status": "Error", "ExceptionMessage": "Not found"}, 404)
+            return
+        phone = parse_qs(url.query).get("phone", [""])[0]
+        # The same phone number always gets the same answer
+        if zlib.crc32(phone.encode()) % 1000 < self.server.missing_lead_rate * 1000:
+            self._send_json([])
+        else:
+            self._send_json([{"ProspectID": f"lead-{zlib.crc32(phone.encode()):08x}", "Phone": phone}])
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = self._read_json()
+        self.server.count("requests")
+        time.sleep(self.server.latency)
+        if self._inject_fault():
+            return
+
+        if url.path.endswith("/ProspectActivity.svc/Bulk/Create"):
+            self._send_json({"Response": [
+                {"RowNumber": number, "ActivityId": self._create(payload)}
+                for number, payload in enumerate(body, start=1)
+            ]})
+        elif url.path.endswith("/ProspectActivity.svc/Create"):
+            self._send_json({"Status": "Success", "Message": {"Id": self._create(body)}})
+        elif url.path.endswith("/ProspectActivity.svc/Retrieve"):
+            lead_id = parse_qs(url.query).get("leadId", [""])[0]
+            event = body.get("Parameter", {}).get("ActivityEvent")
+            with self.server.fault_lock:
+                activities = [activity for activity in self.server.activities.get(lead_id, [])
+                              if event is None or activity["ActivityEvent"] == event]
+            self._send_json({"RecordCount": len(activities), "ProspectActivities": activities})
+        else:
+            self._send_json({"Status": "Error", "ExceptionMessage": "Not found"}, 404)
+
+    def _create(self, payload: dict):
+        activity_id = str(uuid.uuid4())
+        activity = {"Id": activity_id, "ActivityEvent": payload.get("ActivityEvent"),
+                    "ActivityNote": payload.get("ActivityNote")}
+        with self.server.fault_lock:
+            self.server.activities.setdefault(payload.get("RelatedProspectId"), []).append(activity)
+        return activity_id
+
+
+def start_mock_leadsquared(latency: float = 0.05, port: int = 0, missing_lead_rate: float = 0.1,
+                           error_rate: float = 0.0, throttle_rate: float = 0.0, retry_after: float = 1,
+                           seed: int = 7):
+    """
+    Starts a mock Leadsquared API server on a background thread.
+
+    Args:
+        latency (float): Seconds each request sleeps before responding.
+        missing_lead_rate (float): Share of phone numbers with no lead.
+        error_rate (float): Share of requests answered with a 500.
+        throttle_rate (float): Share of requests answered with a 429 and Retry-After.
+        retry_after (float): Seconds sent in the Retry-After header of 429s.
+        port (int): Port to bind on localhost. 0 picks a free port.
+
+    Returns:
+        tuple: (server, host) where host is the value for LEADSQUARED_HOST.
+               server.counts holds requests/throttled/errors and server.activities
+               the created activities by lead. Call server.shutdown() when done.
+    """
+    server = _MockServer(port, _MockLeadsquaredHandler, latency, error_rate, throttle_rate, retry_after, seed)
+    server.missing_lead_rate = missing_lead_rate
+    server.activities = {}
+    server.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
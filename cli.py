@@ -0,0 +1,135 @@
+# cli.py
+#
+# Headless batch runner: processes a call-log CSV end to end without the Streamlit UI.
+#
+#     python cli.py calls.csv --schema schema.json --template template.json --output-dir results/
+#
+# Each run also writes the enriched results table to <output-dir>/enriched.csv
+# (and enriched.parquet with --parquet) and the job's Prometheus metrics to
+# <output-dir>/metrics.prom.
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from services.defaults import DEFAULT_EXTRACTION_SCHEMA, DEFAULT_ACTIVITY_EVENT_CODE, DEFAULT_ACTIVITY_FIELDS
+from services.http_client import close_sessions
+from services.instrumentation import metrics, start_metrics_server
+from services.pipeline import run_job, format_log_entry, summary_lines
+from services.results_store import ResultsStore
+
+
+def load_json_file(path: str):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze call logs and post activities to Leadsquared.")
+    parser.add_argument("csv", help="Call-log CSV file")
+    parser.add_argument("--schema", help="Extraction schema JSON file (defaults to the built-in schema)")
+    parser.add_argument("--template", help="Activity fields JSON template file (defaults to the built-in template)")
+    parser.add_argument("--event-code", type=int, default=DEFAULT_ACTIVITY_EVENT_CODE, help="Leadsquared ActivityEvent code")
+    parser.add_argument("--phone-column", default="phoneNumber")
+    parser.add_argument("--transcript-column", default="transcript")
+    parser.add_argument("--llm-workers", type=int, help="Concurrent LLM extractions")
+    parser.add_argument("--lead-workers", type=int, help="Concurrent lead lookups")
+    parser.add_argument("--chunk-size", type=int, help="CSV rows processed per chunk")
+    parser.add_argument("--bulk-size", type=int, help="Activities per bulk create request")
+    parser.add_argument("--batch-short-transcripts", action="store_true", default=None,
+                        help="Pack short transcripts into shared LLM requests (defaults to LLM_BATCHING)")
+    parser.add_argument("--preclassify", action="store_true", default=None,
+                        help="Answer empty, voicemail and one-sided calls without the LLM (defaults to PRECLASSIFY)")
+    parser.add_argument("--trivial-defaults", help="JSON file of {category: {field: value}} used by the pre-classifier")
+    parser.add_argument("--no-compact", dest="compact", action="store_false", default=None,
+                        help="Send transcripts to the LLM exactly as uploaded")
+    parser.add_argument("--token-budget", type=int, help="Token cap for compacted transcripts")
+    parser.add_argument("--coalesce-same-lead", action="store_true", default=None,
+                        help="Post one activity per phone number, from its last call (defaults to COALESCE_SAME_LEAD)")
+    parser.add_argument("--job-id", help="Journal key for resuming; defaults to a fingerprint of the CSV, schema, options and template")
+    parser.add_argument("--output-dir", default="results", help="Directory for results.jsonl and sync_log.txt")
+    parser.add_argument("--parquet", action="store_true", help="Also write enriched.parquet (needs pyarrow)")
+    parser.add_argument("--metrics-port", type=int, help="Serve live Prometheus metrics on this port while the job runs")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    schema = load_json_file(args.schema) if args.schema else DEFAULT_EXTRACTION_SCHEMA
+    template = json.dumps(load_json_file(args.template) if args.template else DEFAULT_ACTIVITY_FIELDS)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    results_path = os.path.join(args.output_dir, "results.jsonl")
+    log_path = os.path.join(args.output_dir, "sync_log.txt")
+    metrics_path = os.path.join(args.output_dir, "metrics.prom")
+    enriched_path = os.path.join(args.output_dir, "enriched.csv")
+    results_store = ResultsStore(schema)
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+        print(f"Serving metrics on http://localhost:{args.metrics_port}/metrics", file=sys.stderr)
+
+    last_report = {"at": 0.0}
+
+    def on_progress(stage, done, total):
+        # Throttle progress output to roughly once a second
+        now = time.monotonic()
+        if now - last_report["at"] >= 1 or done == total:
+            last_report["at"] = now
+            print(f"[{stage}] {done}/{total}", file=sys.stderr)
+
+    started_at = time.monotonic()
+    with open(results_path, "w", encoding="utf-8") as results_file, \
+            open(log_path, "w", encoding="utf-8") as log_file:
+
+        def on_row(result):
+            results_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+            log_file.write(format_log_entry(result) + "\n")
+
+        try:
+            stats = run_job(
+                args.csv, schema, template, args.event_code,
+                phone_column=args.phone_column,
+                transcript_column=args.transcript_column,
+                llm_workers=args.llm_workers,
+                lead_workers=args.lead_workers,
+                chunk_size=args.chunk_size,
+                bulk_size=args.bulk_size,
+                job_id=args.job_id,
+                batch_short_transcripts=args.batch_short_transcripts,
+                use_preclassifier=args.preclassify,
+                trivial_call_values=load_json_file(args.trivial_defaults) if args.trivial_defaults else None,
+                compact_transcripts=args.compact,
+                transcript_token_budget=args.token_budget,
+                coalesce_same_lead=args.coalesce_same_lead,
+                results_store=results_store,
+                on_row=on_row,
+                on_progress=on_progress
+            )
+        except ValueError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            return 1
+        finally:
+            close_sessions()
+
+        for line in summary_lines(stats):
+            log_file.write(line + "\n")
+    metrics.write_prometheus(metrics_path)
+    results_store.to_csv(enriched_path)
+    if args.parquet:
+        try:
+            results_store.to_parquet(os.path.join(args.output_dir, "enriched.parquet"))
+        except ImportError as e:
+            print(f"WARNING: {e}", file=sys.stderr)
+
+    elapsed = time.monotonic() - started_at
+    print(f"Processed {stats['rows']} rows in {elapsed:.1f}s: {stats['posted']} posted, {stats['failed']} failed, "
+          f"{stats['skipped']} skipped, {stats['extraction_failed']} extraction failures")
+    print(f"Results written to {results_path}, {enriched_path} and {log_path}, metrics to {metrics_path}")
+    return 0 if stats["failed"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+# services/extraction_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# SQLite file holding cached LLM extractions. Set to an empty string to disable caching.
+EXTRACTION_CACHE_PATH = os.getenv("EXTRACTION_CACHE_PATH", ".cache/extraction_cache.sqlite3")
+EXTRACTION_CACHE_MAX_MB = float(os.getenv("EXTRACTION_CACHE_MAX_MB", "256"))
+
+
+def normalize_field(item: dict):
+    """
+    Reduces one schema field to the parts that affect the LLM output, so cosmetic
+    differences such as extra whitespace in the prompt hash the same.
+    """
+    normalized = {
+        "name": str(item.get("name", "")).strip(),
+        "prompt": " ".join(str(item.get("prompt", "")).split()),
+        "type": item.get("type", "string"),
+    }
+    # Validation constraints change which values are accepted, so they're part of the key when set
+    for constraint in ("enum", "minimum", "maximum"):
+        if item.get(constraint) is not None:
+            normalized[constraint] = item[constraint]
+    return normalized
+
+
+def make_key(*parts):
+    """Hashes any JSON-serializable parts into a hex cache key."""
+    encoded = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def field_key(transcript: str, field: dict, model: str, system_prompt: str):
+    """
+    Content address of one extracted field: transcript + normalized field definition
+    + model + system prompt. Fingerprinting fields separately means editing one
+    prompt only invalidates that field's cached values.
+    """
+    return make_key("field", transcript, normalize_field(field), model, system_prompt)
+
+
+class ExtractionCache:
+    """
+    Persistent key -> JSON value store for LLM extractions, backed by SQLite.
+    Values are stored per schema field (see field_key).
+
+    When the stored values exceed max_mb, the least recently used entries are
+    evicted until the cache is back under 90% of the limit.
+    """
+
+    def __init__(self, path: str = EXTRACTION_CACHE_PATH, max_mb: float = EXTRACTION_CACHE_MAX_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = None
+        self._total_bytes = 0
+        if not path:
+            return
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS extractions "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS extractions_last_used ON extractions (last_used)")
+        self._db.commit()
+        self._total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM extractions").fetchone()[0]
+
+    @property
+    def enabled(self):
+        return self._db is not None
+
+    def get_many(self, keys: list):
+        """
+        Looks up several keys at once.
+
+        Returns:
+            dict: {key: value} for the keys that were found. Missing keys are absent,
+                  so a cached None is distinguishable from a miss.
+        """
+        if not self.enabled or not keys:
+            return {}
+        found = {}
+        with self._lock:
+            for key in keys:
+                row = self._db.execute("SELECT value FROM extractions WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    found[key] = json.loads(row[0])
+            if found:
+                now = time.time()
+                self._db.executemany("UPDATE extractions SET last_used = ? WHERE key = ?",
+                                     [(now, key) for key in found])
+                self._db.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set_many(self, values: dict):
+        """Stores {key: value} pairs, evicting old entries if over the size limit."""
+        if not self.enabled or not values:
+            return
+        now = time.time()
+        with self._lock:
+            for key, value in values.items():
+                encoded = json.dumps(value, ensure_ascii=False)
+                size = len(encoded.encode("utf-8"))
+                previous = self._db.execute("SELECT size FROM extractions WHERE key = ?", (key,)).fetchone()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO extractions (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                    (key, encoded, size, now)
+                )
+                self._total_bytes += size - (previous[0] if previous else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict(int(self.max_bytes * 0.9))
+            self._db.commit()
+
+    def _evict(self, target_bytes: int):
+        cursor = self._db.execute("SELECT key, size FROM extractions ORDER BY last_used")
+        evicted = []
+        for key, size in cursor:
+            if self._total_bytes <= target_bytes:
+                break
+            evicted.append((key,))
+            self._total_bytes -= size
+        self._db.executemany("DELETE FROM extractions WHERE key = ?", evicted)
+
+    def stats(self):
+        """Returns field-level hit/miss counters and the stored size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "bytes": self._total_bytes,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,358 @@
+# services/http_client.py
+
+import asyncio
+import concurrent.futures
+import json
+import os
+import threading
+from urllib.parse import urlparse
+
+import aiohttp
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Load environment variables
+load_dotenv()
+
+# Connections kept alive per host. Should be at least the number of worker threads
+# sharing a session, otherwise workers queue for a free connection.
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+
+_lock = threading.Lock()
+_sessions = {}        # service name -> session
+_pool_sizes = {}      # service name -> pool size the session was built with
+_stats = {}           # host -> {"requests": int, "connections": int}
+_async_sessions = {}  # (event loop, service name) -> (aiohttp.ClientSession, pool size)
+_outgrown_sessions = []  # (event loop, aiohttp.ClientSession) replaced by a bigger pool, still to close
+
+
+def _record(host: str, key: str):
+    with _lock:
+        host_stats = _stats.setdefault(host, {"requests": 0, "connections": 0})
+        host_stats[key] += 1
+
+
+# --- Connection pools that count every new socket they open ---
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _record(self.host, "connections")
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _record(self.host, "connections")
+        return super()._new_conn()
+
+
+class _CountingAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+class _PooledSession(requests.Session):
+    """A requests.Session that applies the default connect/read timeouts."""
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+        return super().request(method, url, **kwargs)
+
+
+def _count_response(response, *args, **kwargs):
+    _record(urlparse(response.url).hostname, "requests")
+
+
+def _build_session(pool_size: int):
+    session = _PooledSession()
+    # pool_block keeps the number of open sockets per host at pool_size
+    adapter = _CountingAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=True)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.hooks["response"].append(_count_response)
+    return session
+
+
+def get_session(service: str, pool_size: int = None):
+    """
+    Returns the shared keep-alive session for an external service.
+
+    Sessions are created lazily, one per service name (e.g. "openrouter",
+    "leadsquared"), and reused by every thread. If a larger pool_size is requested
+    than the existing session was built with, the session is rebuilt with the bigger pool.
+
+    Args:
+        service (str): Name identifying the external API.
+        pool_size (int): Minimum number of pooled connections per host.
+                         Defaults to HTTP_POOL_SIZE.
+
+    Returns:
+        requests.Session: A thread-shared session with pooling and default timeouts.
+    """
+    pool_size = max(pool_size or HTTP_POOL_SIZE, 1)
+    with _lock:
+        session = _sessions.get(service)
+        if session is None or _pool_sizes[service] < pool_size:
+            # An outgrown session is dropped rather than closed, so requests other
+            # threads still have in flight on it can finish.
+            session = _build_session(pool_size)
+            _sessions[service] = session
+            _pool_sizes[service] = pool_size
+        return session
+
+
+def get_connection_stats():
+    """
+    Returns per-host connection reuse statistics.
+
+    Returns:
+        dict: {host: {"requests": int, "connections": int, "reused": int}} where
+              "connections" is the number of sockets opened and "reused" the number of
+              requests served over an already-open connection.
+    """
+    with _lock:
+        return {
+            host: {**counts, "reused": max(counts["requests"] - counts["connections"], 0)}
+            for host, counts in _stats.items()
+        }
+
+
+def reset_connection_stats():
+    """Clears the per-host counters, e.g. at the start of a new job."""
+    with _lock:
+        _stats.clear()
+
+
+def close_sessions():
+    """Closes every pooled session and drops it, releasing the open sockets."""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+        _pool_sizes.clear()
+
+
+# --- Async sessions ---
+
+async def _on_request_start(session, context, params):
+    context.host = params.url.host
+
+
+async def _on_connection_created(session, context, params):
+    _record(context.host, "connections")
+
+
+class BufferedResponse:
+    """
+    A fully read aiohttp response exposing the parts of requests.Response the
+    services use (status_code, headers, text, json(), raise_for_status()), so
+    response parsing is shared between the sync and async code paths.
+    """
+
+    def __init__(self, response: aiohttp.ClientResponse, body: bytes):
+        self._response = response
+        self.status_code = response.status
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.text = body.decode(response.charset or "utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise aiohttp.ClientResponseError(
+                self._response.request_info, self._response.history,
+                status=self.status_code, message=self._response.reason or ""
+            )
+
+
+def get_async_session(service: str, pool_size: int = None):
+    """
+    Returns the shared keep-alive aiohttp session for a service on the running event loop.
+
+    The async counterpart of get_session: one session per service and event loop,
+    rebuilt when a larger pool_size is requested. Its per-host connection limit caps
+    the requests in flight, so thousands of waiting coroutines share pool_size sockets.
+
+    Must be called from a coroutine. Close the loop's sessions with close_async_sessions().
+    """
+    pool_size = max(pool_size or HTTP_POOL_SIZE, 1)
+    key = (asyncio.get_running_loop(), service)
+    with _lock:
+        session, built_with = _async_sessions.get(key, (None, 0))
+        if session is None or built_with < pool_size:
+            # An outgrown session is left open for requests still using it; it is
+            # closed with the others by close_async_sessions()
+            if session is not None:
+                _outgrown_sessions.append((key[0], session))
+            trace = aiohttp.TraceConfig()
+            trace.on_request_start.append(_on_request_start)
+            trace.on_connection_create_end.append(_on_connection_created)
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=0, limit_per_host=pool_size),
+                timeout=aiohttp.ClientTimeout(sock_connect=HTTP_CONNECT_TIMEOUT, sock_read=HTTP_READ_TIMEOUT),
+                trace_configs=[trace],
+            )
+            _async_sessions[key] = (session, pool_size)
+        return session
+
+
+async def request_async(service: str, method: str, url: str, **kwargs):
+    """
+    Sends one request on the service's shared async session and reads the whole body.
+
+    Returns:
+        BufferedResponse: The response, with its connection already back in the pool.
+
+    Raises:
+        aiohttp.ClientError, asyncio.TimeoutError: On network failures.
+    """
+    async with get_async_session(service).request(method, url, **kwargs) as response:
+        body = await response.read()
+    _record(response.url.host, "requests")
+    return BufferedResponse(response, body)
+
+
+async def close_async_sessions():
+    """Closes every async session created on the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        keys = [key for key in _async_sessions if key[0] is loop]
+        sessions = [_async_sessions.pop(key)[0] for key in keys]
+        sessions += [session for session_loop, session in _outgrown_sessions if session_loop is loop]
+        _outgrown_sessions[:] = [entry for entry in _outgrown_sessions if entry[0] is not loop]
+    for session in sessions:
+        await session.close()
+
+
+def run_async(coroutine, cancel_event: threading.Event = None, poll_seconds: float = 0.1):
+    """
+    Runs a coroutine to completion on a new event loop, e.g. from a worker thread.
+
+    Args:
+        coroutine: The coroutine to run.
+        cancel_event (threading.Event): When set from any thread, the coroutine is
+                                        cancelled, which abandons its in-flight requests.
+        poll_seconds (float): How often cancel_event is checked.
+
+    Returns:
+        The coroutine's result.
+
+    Raises:
+        asyncio.CancelledError: If cancel_event was set before the coroutine finished.
+    """
+    async def main():
+        task = asyncio.create_task(coroutine)
+        try:
+            while cancel_event is not None and not task.done():
+                if cancel_event.is_set():
+                    task.cancel()
+                    break
+                await asyncio.wait({task}, timeout=poll_seconds)
+            return await task
+        finally:
+            await close_async_sessions()
+
+    return asyncio.run(main())
+
+
+class EventLoopThread:
+    """
+    One event loop on a background thread that worker threads hand coroutines to,
+    so their requests share the loop's async sessions and can be cancelled together.
+
+    The loop runs under run_async: once cancel_event is set, every coroutine in
+    flight is cancelled (abandoning its requests) and run() raises CancelledError
+    for it and for anything submitted later.
+
+    Usage:
+        loop_thread = EventLoopThread(cancel_event)
+        result = loop_thread.run(some_coroutine())  # from any thread
+        loop_thread.close()
+    """
+
+    def __init__(self, cancel_event: threading.Event = None, name: str = "event-loop"):
+        self._loop = None
+        self._closing = None
+        self._accepting = False
+        self._tasks = set()
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._main, args=(cancel_event,), name=name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _main(self, cancel_event):
+        try:
+            run_async(self._serve(), cancel_event)
+        except asyncio.CancelledError:
+            pass
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._closing = asyncio.Event()
+        self._accepting = True
+        self._ready.set()
+        try:
+            await self._closing.wait()
+        finally:
+            with self._lock:
+                self._accepting = False
+            # Coroutines submitted just before shutdown start on the next iteration
+            await asyncio.sleep(0)
+            tasks = list(self._tasks)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _start(self, coroutine, future: concurrent.futures.Future):
+        # Runs on the loop, in the submitting thread's context (so usage_scope follows it)
+        task = self._loop.create_task(coroutine)
+        self._tasks.add(task)
+
+        def finished(task):
+            self._tasks.discard(task)
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+        task.add_done_callback(finished)
+
+    def run(self, coroutine):
+        """
+        Runs a coroutine on the loop, blocking the calling thread until it finishes.
+
+        Returns:
+            The coroutine's result.
+
+        Raises:
+            asyncio.CancelledError: If cancel_event was set or the loop was closed
+                                    before the coroutine finished.
+        """
+        future = concurrent.futures.Future()
+        with self._lock:
+            if not self._accepting:
+                coroutine.close()
+                raise asyncio.CancelledError()
+            self._loop.call_soon_threadsafe(self._start, coroutine, future)
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError:
+            raise asyncio.CancelledError() from None
+
+    def close(self):
+        """Cancels anything still running, closes the loop's sessions and stops the thread."""
+        with self._lock:
+            if self._accepting:
+                self._loop.call_soon_threadsafe(self._closing.set)
+        self._thread.join()
@@ -0,0 +1,91 @@
+# services/ingest.py
+
+import os
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from services.template_renderer import template_placeholders
+
+# Load environment variables
+load_dotenv()
+
+# Rows read from the CSV at a time
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "2000"))
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+def read_header(source):
+    """Returns the CSV's column names without reading any data rows."""
+    _rewind(source)
+    columns = list(pd.read_csv(source, nrows=0).columns)
+    _rewind(source)
+    return columns
+
+
+def required_columns(source, phone_column: str, transcript_column: str, template: str):
+    """
+    Works out which CSV columns the job actually needs: the phone and transcript
+    columns plus any column the activity template references. Everything else is
+    never loaded.
+
+    Returns:
+        list: Column names present in the CSV, in file order.
+
+    Raises:
+        ValueError: If the phone or transcript column is not in the CSV.
+    """
+    header = read_header(source)
+    if phone_column not in header:
+        raise ValueError(f"Phone column '{phone_column}' not found in the CSV.")
+    if transcript_column not in header:
+        raise ValueError(f"Transcript column '{transcript_column}' not found in the CSV.")
+    wanted = {phone_column, transcript_column, *template_placeholders(template)}
+    return [column for column in header if column in wanted]
+
+
+def iter_chunks(source, columns: list, chunksize: int = None):
+    """
+    Streams the CSV as DataFrames of at most `chunksize` rows holding only `columns`.
+
+    Every value is read as a string with empty cells as "", so phone numbers never
+    pick up float artifacts and no NaN handling is needed downstream.
+
+    Yields:
+        tuple: (first_row_number, DataFrame) where row numbers are CSV line numbers
+               (the header is line 1), matching the numbering used in the sync log.
+    """
+    _rewind(source)
+    reader = pd.read_csv(
+        source,
+        usecols=columns,
+        dtype=str,
+        keep_default_na=False,
+        chunksize=chunksize or INGEST_CHUNK_SIZE,
+    )
+    row_number = 2
+    for chunk in reader:
+        yield row_number, chunk
+        row_number += len(chunk)
+
+
+def iter_rows(source, columns: list, chunksize: int = None):
+    """
+    Streams the CSV one row at a time as plain dicts, chunk by chunk.
+
+    Yields:
+        tuple: (row_number, {column: value})
+    """
+    for first_row_number, chunk in iter_chunks(source, columns, chunksize):
+        names = list(chunk.columns)
+        for offset, values in enumerate(chunk.itertuples(index=False, name=None)):
+            yield first_row_number + offset, dict(zip(names, values))
+
+
+def iter_column(source, column: str, chunksize: int = None):
+    """Streams a single column's values, e.g. to collect phone numbers in a pre-pass."""
+    for _, chunk in iter_chunks(source, [column], chunksize):
+        yield from chunk[column]
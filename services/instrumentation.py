@@ -0,0 +1,278 @@
+# services/instrumentation.py
+
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# JSON-lines file receiving one structured event per request and per row. Empty disables it.
+METRICS_LOG_PATH = os.getenv("METRICS_LOG_PATH", "")
+# Print [DEBUG] payload and response dumps. They are large, so they are off by default
+DEBUG_LOG = os.getenv("DEBUG_LOG", "false").lower() in ("1", "true", "yes")
+# Share of per-row debug dumps printed when DEBUG_LOG is on
+DEBUG_SAMPLE_RATE = float(os.getenv("DEBUG_SAMPLE_RATE", "1.0"))
+# LLM prices in USD per million tokens, used when OpenRouter doesn't report the cost itself
+LLM_PRICE_INPUT_PER_MTOK = float(os.getenv("LLM_PRICE_INPUT_PER_MTOK", "0.15"))
+LLM_PRICE_OUTPUT_PER_MTOK = float(os.getenv("LLM_PRICE_OUTPUT_PER_MTOK", "0.60"))
+
+METRIC_PREFIX = "call_analyzer_"
+# Latency histogram bucket bounds in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Samples kept per series for percentiles; older samples are replaced at random
+RESERVOIR_SIZE = 2048
+
+
+def debug(message, sampled: bool = False):
+    """
+    Prints a [DEBUG] line when DEBUG_LOG is on.
+
+    Args:
+        message: The text, or a zero-argument callable producing it, so expensive
+                 dumps (e.g. indented JSON payloads) are only built when printed.
+        sampled (bool): Per-row dumps pass True so only DEBUG_SAMPLE_RATE of them print.
+    """
+    if not DEBUG_LOG or (sampled and random.random() >= DEBUG_SAMPLE_RATE):
+        return
+    print(f"[DEBUG] {message() if callable(message) else message}")
+
+
+class _Series:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.samples = []
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        for position, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[position] += 1
+        if len(self.samples) < RESERVOIR_SIZE:
+            self.samples.append(value)
+        else:
+            slot = random.randrange(self.count)
+            if slot < RESERVOIR_SIZE:
+                self.samples[slot] = value
+
+    def percentile(self, share: float):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def _label_key(labels: dict):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_key: tuple, extra: dict = None):
+    pairs = list(label_key) + sorted((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class Metrics:
+    """
+    Thread-safe in-process registry of counters and latency histograms.
+
+    Histograms keep Prometheus buckets plus a bounded sample reservoir for
+    p50/p95/p99. Export with prometheus_text() or summary().
+
+    Usage:
+        metrics.inc("rows_total", status="posted")
+        with metrics.timed("request_seconds", endpoint="openrouter"):
+            ...
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}    # name -> {label_key: value}
+        self._histograms = {}  # name -> {label_key: _Series}
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        with self._lock:
+            self._histograms.setdefault(name, {}).setdefault(_label_key(labels), _Series()).observe(value)
+
+    @contextmanager
+    def timed(self, name: str, **labels):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - started, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def summary(self):
+        """
+        Returns a JSON-serializable snapshot.
+
+        Returns:
+            dict: {"counters": {name: {labels: value}},
+                   "histograms": {name: {labels: {"count", "sum", "p50", "p95", "p99"}}}}
+                  where labels is a "key=value,..." string ("" when unlabelled).
+        """
+        def label_text(label_key):
+            return ",".join(f"{key}={value}" for key, value in label_key)
+
+        with self._lock:
+            return {
+                "counters": {
+                    name: {label_text(key): value for key, value in series.items()}
+                    for name, series in self._counters.items()
+                },
+                "histograms": {
+                    name: {
+                        label_text(key): {"count": item.count, "sum": item.total, "p50": item.percentile(0.5),
+                                          "p95": item.percentile(0.95), "p99": item.percentile(0.99)}
+                        for key, item in series.items()
+                    }
+                    for name, series in self._histograms.items()
+                },
+            }
+
+    def prometheus_text(self):
+        """Renders every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                metric = METRIC_PREFIX + name
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in series.items():
+                    lines.append(f"{metric}{_format_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                metric = METRIC_PREFIX + name
+                lines.append(f"# TYPE {metric} histogram")
+                for key, item in series.items():
+                    for bound, count in zip(BUCKETS, item.buckets):
+                        lines.append(f"{metric}_bucket{_format_labels(key, {'le': bound})} {count}")
+                    lines.append(f"{metric}_bucket{_format_labels(key, {'le': '+Inf'})} {item.count}")
+                    lines.append(f"{metric}_sum{_format_labels(key)} {item.total}")
+                    lines.append(f"{metric}_count{_format_labels(key)} {item.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Writes prometheus_text() to a file, e.g. for the node_exporter textfile collector."""
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(temporary, path)
+
+
+# Shared registry for the whole process
+metrics = Metrics()
+
+# The usage_scope requests are charged to; a context variable, so it follows the
+# thread that opened it and the asyncio tasks it starts
+_usage = ContextVar("llm_usage_scope", default=None)
+_event_lock = threading.Lock()
+
+
+def record_llm_usage(model: str, usage: dict):
+    """
+    Counts the tokens and cost reported in an OpenRouter response's 'usage' block,
+    and adds them to the current usage_scope, if any.
+    """
+    if not isinstance(usage, dict):
+        return
+    prompt_tokens = usage.get("prompt_tokens") or 0
+    completion_tokens = usage.get("completion_tokens") or 0
+    cost = usage.get("cost")
+    if cost is None:
+        cost = (prompt_tokens * LLM_PRICE_INPUT_PER_MTOK + completion_tokens * LLM_PRICE_OUTPUT_PER_MTOK) / 1e6
+
+    metrics.inc("llm_tokens_total", prompt_tokens, model=model, kind="prompt")
+    metrics.inc("llm_tokens_total", completion_tokens, model=model, kind="completion")
+    metrics.inc("llm_cost_usd_total", cost, model=model)
+
+    scope = _usage.get()
+    if scope is not None:
+        scope["prompt_tokens"] += prompt_tokens
+        scope["completion_tokens"] += completion_tokens
+        scope["cost_usd"] += cost
+
+
+@contextmanager
+def usage_scope():
+    """
+    Collects the LLM usage of every request made inside the block by this thread,
+    or by coroutines it hands to an event loop (e.g. through EventLoopThread.run).
+    """
+    scope = {"prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+    token = _usage.set(scope)
+    try:
+        yield scope
+    finally:
+        _usage.reset(token)
+
+
+def bind_usage_scope(func):
+    """Wraps func so it records into the calling thread's usage_scope when run on another thread."""
+    scope = _usage.get()
+
+    def bound(*args, **kwargs):
+        token = _usage.set(scope)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _usage.reset(token)
+    return bound
+
+
+def log_event(event: str, **fields):
+    """Appends one structured JSON event to METRICS_LOG_PATH, when set."""
+    if not METRICS_LOG_PATH:
+        return
+    line = json.dumps({"ts": round(time.time(), 3), "event": event, **fields}, ensure_ascii=False, default=str)
+    with _event_lock:
+        with open(METRICS_LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int):
+    """Serves /metrics for Prometheus scraping on a background thread. Returns the server."""
+    server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
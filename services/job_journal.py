@@ -0,0 +1,152 @@
+# services/job_journal.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# SQLite file recording every row's progress. Set to an empty string to disable journaling.
+JOB_JOURNAL_PATH = os.getenv("JOB_JOURNAL_PATH", ".cache/job_journal.sqlite3")
+
+# Row stages, in the order a row moves through them. "rendered" is written just
+# before the activity is sent, so a row left in that stage may or may not have
+# been posted when the job stopped.
+STAGE_EXTRACTED = "extracted"
+STAGE_RENDERED = "rendered"
+STAGE_POSTED = "posted"
+STAGE_FAILED = "failed"
+
+
+def _iter_blocks(f):
+    while True:
+        block = f.read(1 << 20)
+        if not block:
+            return
+        yield block if isinstance(block, bytes) else block.encode("utf-8")
+
+
+def job_fingerprint(source, activity_json_template: str, activity_event_code: int, phone_column: str,
+                    schema: list = None, extraction_options: dict = None):
+    """
+    Derives a stable job ID from the CSV contents, the extraction inputs and the
+    posting configuration, so re-running the same upload finds the journal of the
+    interrupted run, while changing the schema or anything else that shapes the
+    LLM input (extraction_options: transcript column, compaction, pre-classifier
+    settings) starts a fresh one, since journaled extractions are only valid for
+    the inputs they were made from.
+    """
+    digest = hashlib.sha256()
+    if hasattr(source, "read"):
+        source.seek(0)
+        for block in _iter_blocks(source):
+            digest.update(block)
+        source.seek(0)
+    else:
+        with open(source, "rb") as f:
+            for block in _iter_blocks(f):
+                digest.update(block)
+    digest.update(json.dumps([activity_json_template, activity_event_code, phone_column, schema, extraction_options],
+                             sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def idempotency_marker(job_id: str, row_number: int):
+    """The ActivityNote written on each posted activity, used to detect it after a crash."""
+    return f"call-analyzer:{job_id}:{row_number}"
+
+
+class JobJournal:
+    """
+    Append-mostly per-row state journal for jobs, backed by SQLite.
+
+    Each (job_id, row) holds the row's latest stage along with the resolved lead,
+    the extracted values and, once posted, the Leadsquared activity ID.
+    """
+
+    def __init__(self, path: str = JOB_JOURNAL_PATH):
+        self._lock = threading.Lock()
+        self._db = None
+        if not path:
+            return
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # Rows are journaled one at a time by the pipeline stages; with WAL this
+        # still survives a crash of the process, only an OS crash can lose the tail
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS job_rows ("
+            "job_id TEXT NOT NULL, row INTEGER NOT NULL, stage TEXT NOT NULL, phone TEXT, lead_id TEXT, "
+            "extracted TEXT, activity_id TEXT, message TEXT, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (job_id, row))"
+        )
+        self._db.commit()
+
+    @property
+    def enabled(self):
+        return self._db is not None
+
+    def record_many(self, job_id: str, entries: list):
+        """
+        Records the latest stage for several rows in one transaction.
+
+        Args:
+            entries (list): Dicts with 'row' and 'stage', plus any of 'phone',
+                            'lead_id', 'extracted', 'activity_id' and 'message'.
+                            Fields left out keep their previously journaled value.
+        """
+        if not self.enabled or not entries:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO job_rows (job_id, row, stage, phone, lead_id, extracted, activity_id, message, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (job_id, row) DO UPDATE SET stage = excluded.stage, "
+                "phone = COALESCE(excluded.phone, phone), lead_id = COALESCE(excluded.lead_id, lead_id), "
+                "extracted = COALESCE(excluded.extracted, extracted), "
+                "activity_id = COALESCE(excluded.activity_id, activity_id), "
+                "message = COALESCE(excluded.message, message), updated_at = excluded.updated_at",
+                [
+                    (job_id, entry["row"], entry["stage"], entry.get("phone"), entry.get("lead_id"),
+                     json.dumps(entry["extracted"], ensure_ascii=False) if entry.get("extracted") is not None else None,
+                     entry.get("activity_id"), entry.get("message"), now)
+                    for entry in entries
+                ]
+            )
+            self._db.commit()
+
+    def record(self, job_id: str, row: int, stage: str, **fields):
+        """Records the latest stage for a single row."""
+        self.record_many(job_id, [{"row": row, "stage": stage, **fields}])
+
+    def get_rows(self, job_id: str, first_row: int, last_row: int):
+        """
+        Returns journaled state for a range of rows.
+
+        Returns:
+            dict: {row: {"stage", "phone", "lead_id", "extracted", "activity_id", "message"}}
+        """
+        if not self.enabled:
+            return {}
+        with self._lock:
+            cursor = self._db.execute(
+                "SELECT row, stage, phone, lead_id, extracted, activity_id, message FROM job_rows "
+                "WHERE job_id = ? AND row BETWEEN ? AND ?", (job_id, first_row, last_row)
+            )
+            return {
+                row: {"stage": stage, "phone": phone, "lead_id": lead_id,
+                      "extracted": json.loads(extracted) if extracted else None,
+                      "activity_id": activity_id, "message": message}
+                for row, stage, phone, lead_id, extracted, activity_id, message in cursor
+            }
@@ -0,0 +1,294 @@
+# services/job_manager.py
+
+import json
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from dotenv import load_dotenv
+
+from services.results_store import ResultsStore
+
+# Load environment variables
+load_dotenv()
+
+# Jobs run at the same time, each in its own worker process. Every job has its own
+# rate limiters, so N parallel jobs may send up to N times the per-endpoint rates.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Directory holding each job's uploaded CSV, streamed sync log, results and status
+JOB_SPOOL_DIR = os.getenv("JOB_SPOOL_DIR", ".cache/jobs")
+# Finished job directories older than this many hours are deleted on the next submit
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "72"))
+
+# Job states, as reported by JobManager.status()
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+STOPPED = "stopped"
+FAILED = "failed"
+FINISHED_STATES = (DONE, STOPPED, FAILED)
+
+# Seconds between status.json rewrites and between checks for a stop request
+_STATUS_INTERVAL = 0.5
+
+
+def _write_json(path: str, data: dict):
+    # Written to a temporary file and renamed, so pollers never read half a file
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, default=str)
+    os.replace(temporary, path)
+
+
+def _read_json(path: str):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _run_job_process(job_dir: str, config: dict):
+    """
+    Runs one job in a worker process, streaming its progress into job_dir.
+
+    Writes sync_log.txt and results.jsonl line by line as rows finish, keeps
+    status.json current, and writes results.npz (a saved ResultsStore) and
+    stats.json at the end. A 'stop' file in
+    job_dir makes the job stop reading rows and cancel its extractions in flight;
+    rows already extracted finish posting.
+    """
+    # Imported here so the parent process (e.g. Streamlit) doesn't load the pipeline
+    from services.http_client import close_sessions
+    from services.pipeline import run_job, format_log_entry, format_stage_stats, summary_lines
+
+    status_path = os.path.join(job_dir, "status.json")
+    stop_path = os.path.join(job_dir, "stop")
+    status = {"state": RUNNING, "started_at": time.time(), "done": 0, "total": None, "stages": "", "error": None}
+    last = {"status": 0.0, "stop_check": 0.0, "stop": False}
+
+    def write_status(force: bool = False):
+        now = time.monotonic()
+        if force or now - last["status"] >= _STATUS_INTERVAL:
+            last["status"] = now
+            _write_json(status_path, status)
+
+    def should_stop():
+        now = time.monotonic()
+        if now - last["stop_check"] >= _STATUS_INTERVAL:
+            last["stop_check"] = now
+            last["stop"] = os.path.exists(stop_path)
+        return last["stop"]
+
+    def on_progress(stage, done, total):
+        status["done"], status["total"] = done, total
+        write_status()
+
+    def on_stage_stats(stages):
+        status["stages"] = format_stage_stats(stages)
+
+    write_status(force=True)
+    results_store = ResultsStore(config["schema"])
+    # Line-buffered, so every row is visible to pollers as soon as it finishes
+    with open(os.path.join(job_dir, "sync_log.txt"), "a", encoding="utf-8", buffering=1) as log_file, \
+            open(os.path.join(job_dir, "results.jsonl"), "a", encoding="utf-8", buffering=1) as results_file:
+
+        def on_row(result):
+            results_file.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+            log_file.write(format_log_entry(result) + "\n")
+
+        try:
+            stats = run_job(
+                os.path.join(job_dir, "input.csv"), config["schema"], config["activity_json_template"],
+                config["activity_event_code"], phone_column=config["phone_column"],
+                transcript_column=config["transcript_column"], on_row=on_row, on_progress=on_progress,
+                results_store=results_store, on_stage_stats=on_stage_stats, should_stop=should_stop
+            )
+        except Exception as e:
+            # Configuration errors (ValueError) are shown as is; anything else with its traceback
+            status.update(state=FAILED, error=str(e) if isinstance(e, ValueError) else traceback.format_exc(),
+                          finished_at=time.time())
+            write_status(force=True)
+            return
+        finally:
+            # Worker processes are reused; don't keep the job's sockets open while idle
+            close_sessions()
+
+        for line in summary_lines(stats):
+            log_file.write(line + "\n")
+    results_store.save(os.path.join(job_dir, "results.npz"))
+    _write_json(os.path.join(job_dir, "stats.json"), stats)
+    status.update(state=STOPPED if stats["stopped"] else DONE, finished_at=time.time())
+    write_status(force=True)
+
+
+class JobManager:
+    """
+    Runs jobs in a pool of worker processes so callers (e.g. Streamlit sessions)
+    never block on a job and several jobs can run side by side.
+
+    Each job gets a directory under spool_dir holding its input CSV and, as it
+    runs, its status, sync log, per-row results and final stats. Callers poll
+    status() and read_log(); all state lives in files, so any session can
+    follow any job.
+
+    Usage:
+        manager = JobManager()
+        job_id = manager.submit(csv_bytes, schema, template, event_code)
+        while manager.status(job_id)["state"] not in FINISHED_STATES:
+            lines, offset = manager.read_log(job_id, offset)
+    """
+
+    def __init__(self, workers: int = None, spool_dir: str = None):
+        self.workers = max(1, workers or JOB_WORKERS)
+        self.spool_dir = spool_dir or JOB_SPOOL_DIR
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._executor = self._new_executor()
+
+    def _new_executor(self):
+        # "spawn" starts clean worker processes; forking a threaded web server is unsafe
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _job_dir(self, job_id: str):
+        return os.path.join(self.spool_dir, job_id)
+
+    def submit(self, csv_data: bytes, schema: list, activity_json_template: str, activity_event_code: int,
+               phone_column: str = "phoneNumber", transcript_column: str = "transcript", name: str = None):
+        """
+        Queues a job and returns its ID immediately.
+
+        Args:
+            csv_data (bytes): The uploaded call-log CSV.
+            name (str): Optional label shown by list_jobs(), e.g. the file name.
+            The remaining arguments are passed to run_job.
+
+        Returns:
+            str: The job ID.
+        """
+        self.cleanup()
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = self._job_dir(job_id)
+        os.makedirs(job_dir)
+        with open(os.path.join(job_dir, "input.csv"), "wb") as f:
+            f.write(csv_data)
+
+        config = {
+            "schema": schema,
+            "activity_json_template": activity_json_template,
+            "activity_event_code": activity_event_code,
+            "phone_column": phone_column,
+            "transcript_column": transcript_column,
+        }
+        _write_json(os.path.join(job_dir, "job.json"), {"name": name, "submitted_at": time.time(), **config})
+        _write_json(os.path.join(job_dir, "status.json"), {"state": QUEUED, "done": 0, "total": None,
+                                                          "stages": "", "error": None})
+
+        with self._lock:
+            try:
+                future = self._executor.submit(_run_job_process, job_dir, config)
+            except BrokenProcessPool:
+                # A worker process died (e.g. killed for memory); start a fresh pool
+                self._executor = self._new_executor()
+                future = self._executor.submit(_run_job_process, job_dir, config)
+            self._futures[job_id] = future
+        return job_id
+
+    def status(self, job_id: str):
+        """
+        Returns the job's status.
+
+        Returns:
+            dict: 'state' (queued, running, done, stopped or failed), 'done' and 'total'
+                  rows, 'stages' (live per-stage status line) and 'error' (for failed jobs).
+        """
+        status = _read_json(os.path.join(self._job_dir(job_id), "status.json"))
+        if status is None:
+            return {"state": FAILED, "done": 0, "total": None, "stages": "", "error": f"Unknown job {job_id}"}
+        with self._lock:
+            future = self._futures.get(job_id)
+        # A worker that crashed never gets to record its failure
+        if status["state"] not in FINISHED_STATES and future is not None and future.done() \
+                and future.exception() is not None:
+            status.update(state=FAILED, error=f"The job's worker process failed: {future.exception()}")
+        return status
+
+    def read_log(self, job_id: str, offset: int = 0):
+        """
+        Reads sync log lines written since a previous call.
+
+        Args:
+            offset (int): The offset returned by the previous call, or 0 to start.
+
+        Returns:
+            tuple: (new complete lines, offset to pass next time)
+        """
+        path = os.path.join(self._job_dir(job_id), "sync_log.txt")
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return [], offset
+        # Leave a partially written last line for the next read
+        complete = data[:data.rfind(b"\n") + 1]
+        return complete.decode("utf-8").splitlines(), offset + len(complete)
+
+    def stats(self, job_id: str):
+        """Returns the finished job's run_job statistics, or None while it runs."""
+        return _read_json(os.path.join(self._job_dir(job_id), "stats.json"))
+
+    def results(self, job_id: str):
+        """Returns the finished job's ResultsStore, or None while it runs."""
+        path = os.path.join(self._job_dir(job_id), "results.npz")
+        return ResultsStore.load(path) if os.path.exists(path) else None
+
+    def results_path(self, job_id: str):
+        """Path of the job's results.jsonl (one JSON result per row)."""
+        return os.path.join(self._job_dir(job_id), "results.jsonl")
+
+    def stop(self, job_id: str):
+        """
+        Asks a job to stop. A queued job is cancelled; a running job stops reading rows,
+        finishes the ones in flight and ends as 'stopped'. It can be resumed by
+        submitting the same file again.
+        """
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            _write_json(os.path.join(self._job_dir(job_id), "status.json"),
+                        {"state": STOPPED, "done": 0, "total": None, "stages": "", "error": None,
+                         "finished_at": time.time()})
+            return
+        open(os.path.join(self._job_dir(job_id), "stop"), "w").close()
+
+    def list_jobs(self):
+        """Returns [{'job_id', 'name', 'submitted_at', **status}] for every spooled job, newest first."""
+        jobs = []
+        for job_id in os.listdir(self.spool_dir):
+            info = _read_json(os.path.join(self._job_dir(job_id), "job.json"))
+            if info is not None:
+                jobs.append({"job_id": job_id, "name": info.get("name"), "submitted_at": info.get("submitted_at"),
+                             **self.status(job_id)})
+        return sorted(jobs, key=lambda job: job["submitted_at"] or 0, reverse=True)
+
+    def cleanup(self, max_age_hours: float = None):
+        """Deletes finished job directories older than max_age_hours (default JOB_RETENTION_HOURS)."""
+        cutoff = time.time() - (max_age_hours if max_age_hours is not None else JOB_RETENTION_HOURS) * 3600
+        for job_id in os.listdir(self.spool_dir):
+            job_dir = self._job_dir(job_id)
+            status = _read_json(os.path.join(job_dir, "status.json")) or {}
+            if status.get("state") in FINISHED_STATES and status.get("finished_at", 0) < cutoff:
+                shutil.rmtree(job_dir, ignore_errors=True)
+                with self._lock:
+                    self._futures.pop(job_id, None)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
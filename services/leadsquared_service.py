@@ -2,10 +2,18 @@
 
 import os
 import requests
+import sqlite3
+import threading
 import time
+from collections import OrderedDict
+from urllib3.exceptions import NewConnectionError
 from dotenv import load_dotenv
 from datetime import datetime
 import json 
+from services.http_client import get_session
+from services.instrumentation import debug
+from services.phone_utils import lookup_number
+from services.rate_limiter import NON_IDEMPOTENT_RETRY_STATUS_CODES, send_with_retry
 
 # Load environment variables
 load_dotenv()
@@ -14,43 +22,133 @@ LEADSQUARED_ACCESS_KEY = os.getenv("LEADSQUARED_ACCESS_KEY")
 LEADSQUARED_SECRET_KEY = os.getenv("LEADSQUARED_SECRET_KEY")
 LEADSQUARED_HOST = os.getenv("LEADSQUARED_HOST")
 
-def get_lead_by_phone(phone_number: str):
+# Lead lookup cache settings. "No lead found" answers expire sooner than found leads
+# so that a lead created during the day is picked up on the next run.
+LEAD_CACHE_SIZE = int(os.getenv("LEAD_CACHE_SIZE", "50000"))
+LEAD_CACHE_TTL = float(os.getenv("LEAD_CACHE_TTL", str(12 * 60 * 60)))
+LEAD_CACHE_NEGATIVE_TTL = float(os.getenv("LEAD_CACHE_NEGATIVE_TTL", str(15 * 60)))
+LEAD_CACHE_PATH = os.getenv("LEAD_CACHE_PATH")  # SQLite file; unset keeps the cache in memory only
+
+# Lead resolution workers a job runs in parallel (see pipeline.run_job)
+LEADSQUARED_MAX_CONCURRENCY = int(os.getenv("LEADSQUARED_MAX_CONCURRENCY", "4"))
+
+# Activities sent per ProspectActivity.svc/Bulk/Create request
+LEADSQUARED_BULK_SIZE = int(os.getenv("LEADSQUARED_BULK_SIZE", "25"))
+
+
+class LeadCache:
+    """
+    Thread-safe phone -> ProspectID cache: an in-memory LRU with per-entry expiry,
+    optionally backed by a SQLite file so repeat jobs can skip lookups entirely.
+
+    A cached lead_id of None records that Leadsquared had no lead for the phone.
+    """
+
+    def __init__(self, max_size: int = LEAD_CACHE_SIZE, ttl: float = LEAD_CACHE_TTL,
+                 negative_ttl: float = LEAD_CACHE_NEGATIVE_TTL, db_path: str = LEAD_CACHE_PATH):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # phone -> (lead_id, expires_at)
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS lead_cache "
+                "(phone TEXT PRIMARY KEY, lead_id TEXT, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM lead_cache WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+
+    def get(self, phone_number: str):
+        """
+        Looks up a phone number.
+
+        Returns:
+            tuple: (found, lead_id). found is False on a miss or expired entry;
+                   lead_id is None for a cached "No lead found".
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(phone_number)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT lead_id, expires_at FROM lead_cache WHERE phone = ?", (phone_number,)
+                ).fetchone()
+                if row:
+                    entry = row
+                    self._remember(phone_number, entry)
+
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    self._entries.pop(phone_number, None)
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(phone_number)
+            self.hits += 1
+            return True, entry[0]
+
+    def set(self, phone_number: str, lead_id):
+        """Caches a lookup result. Pass lead_id=None to cache a negative result."""
+        expires_at = time.time() + (self.ttl if lead_id else self.negative_ttl)
+        with self._lock:
+            self._remember(phone_number, (lead_id, expires_at))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO lead_cache (phone, lead_id, expires_at) VALUES (?, ?, ?)",
+                    (phone_number, lead_id, expires_at)
+                )
+                self._db.commit()
+
+    def _remember(self, phone_number: str, entry: tuple):
+        self._entries[phone_number] = entry
+        self._entries.move_to_end(phone_number)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        """Returns the hit/miss counters as a dict."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+# Shared cache used by get_lead_by_phone
+lead_cache = LeadCache()
+
+
+def get_lead_by_phone(phone_number: str, use_cache: bool = True):
     """
     Retrieves a lead's ProspectID from Leadsquared using their phone number.
-    (This function remains unchanged as it's still needed)
+
+    Results, including "No lead found", are served from and stored in lead_cache
+    unless use_cache is False. Network and API errors are never cached.
     """
-    # ... (code for this function is unchanged, but included for completeness)
+    cached = _cached_lead(phone_number) if use_cache else None
+    if cached:
+        return cached
+
     if not all([LEADSQUARED_ACCESS_KEY, LEADSQUARED_SECRET_KEY, LEADSQUARED_HOST]):
         message = "ERROR: Leadsquared credentials are not fully configured."
         print(message)
         return None, message
 
-    url = f"{LEADSQUARED_HOST}/v2/LeadManagement.svc/RetrieveLeadByPhoneNumber"
-    params = {
-        'accessKey': LEADSQUARED_ACCESS_KEY,
-        'secretKey': LEADSQUARED_SECRET_KEY,
-        'phone': phone_number
-    }
-    
-    time.sleep(0.2)
-    
+    url, params = _lead_lookup_request(phone_number)
     try:
-        response = requests.get(url, params=params)
+        response = send_with_retry(
+            "leadsquared_lookup",
+            lambda: get_session("leadsquared").get(url, params=params)
+        )
         response.raise_for_status()
-
-        response_data = response.json()
-        
-        if not response_data:
-            message = f"No lead found with phone number: {phone_number}"
-            return None, message
-        
-        lead_data = response_data[0]
-        lead_id = lead_data.get("ProspectID")
-
-        if lead_id:
-            return lead_id, f"Successfully found ProspectID: {lead_id}"
-        else:
-            return None, "Lead found, but ProspectID was missing in the response."
+        return _lead_from_response(phone_number, response.json(), use_cache)
 
     except requests.exceptions.RequestException as e:
         message = f"Network error while fetching lead by phone {phone_number}: {e}"
@@ -62,30 +160,91 @@ def get_lead_by_phone(phone_number: str):
         return None, message
 
 
-def post_activity_by_phone(phone_number: str, activity_payload: dict):
+def _cached_lead(phone_number: str):
+    """Returns (lead_id, message) for a phone number answered by lead_cache, or None."""
+    found, cached_lead_id = lead_cache.get(phone_number)
+    if not found:
+        return None
+    if cached_lead_id:
+        return cached_lead_id, f"Successfully found ProspectID: {cached_lead_id} (cached)"
+    return None, f"No lead found with phone number: {phone_number} (cached)"
+
+
+def _lead_lookup_request(phone_number: str):
+    url = f"{LEADSQUARED_HOST}/v2/LeadManagement.svc/RetrieveLeadByPhoneNumber"
+    params = {
+        'accessKey': LEADSQUARED_ACCESS_KEY,
+        'secretKey': LEADSQUARED_SECRET_KEY,
+        'phone': lookup_number(phone_number)
+    }
+    return url, params
+
+
+def _lead_from_response(phone_number: str, response_data, use_cache: bool):
+    """Reads (lead_id, message) from a RetrieveLeadByPhoneNumber reply and caches the answer."""
+    if not response_data:
+        if use_cache:
+            lead_cache.set(phone_number, None)
+        message = f"No lead found with phone number: {phone_number}"
+        return None, message
+
+    lead_data = response_data[0]
+    lead_id = lead_data.get("ProspectID")
+
+    if lead_id:
+        if use_cache:
+            lead_cache.set(phone_number, lead_id)
+        return lead_id, f"Successfully found ProspectID: {lead_id}"
+    else:
+        return None, "Lead found, but ProspectID was missing in the response."
+
+
+def post_activity(lead_id: str, activity_payload: dict, phone_number: str = None):
     """
-    Orchestrator function: Fetches a lead by phone number and then posts a custom activity.
-    This is the new primary function for interacting with Leadsquared.
-    
+    Posts a custom activity on a lead whose ProspectID is already known.
+
     Args:
-        phone_number (str): The phone number to look up the lead.
+        lead_id (str): The ProspectID to attach the activity to.
         activity_payload (dict): The dictionary representing the activity JSON body.
                                  This function will add the 'RelatedProspectId'.
+        phone_number (str): The lead's phone number, used only in messages.
 
     Returns:
         tuple: A tuple containing (bool, str) for success status and a message.
+               The status is None if the outcome is unknown (see create_activity).
     """
-    # Step 1: Get the Lead ID
-    print(f"\n--- [DEBUG] Attempting to find lead with phone: {phone_number} ---")
-    lead_id, message = get_lead_by_phone(phone_number)
-    
-    if not lead_id:
-        print(f"[DEBUG] Lead lookup failed for {phone_number}. Reason: {message}")
-        return False, message # Return the message from the lookup (e.g., "No lead found")
-    
-    print(f"[DEBUG] Found ProspectID: {lead_id} for phone {phone_number}")
-        
-    # Step 2: Prepare the final payload
+    success, message, _ = create_activity(lead_id, activity_payload, phone_number)
+    return success, message
+
+
+def create_activity(lead_id: str, activity_payload: dict, phone_number: str = None):
+    """
+    Same as post_activity, but also returns the ID of the created activity.
+
+    Returns:
+        tuple: (success, message, activity_id) where activity_id is None on failure
+               or if Leadsquared didn't return one. success is None when the outcome
+               is unknown: the request failed after reaching Leadsquared (a read
+               timeout, a 5xx or an unreadable reply), so the activity may exist.
+    """
+    phone_number = phone_number or lead_id
+    url, params = _activity_create_request(lead_id, activity_payload)
+
+    try:
+        # Creating an activity is not idempotent, so only retry attempts the server rejected
+        response = send_with_retry(
+            "leadsquared_activity",
+            lambda: get_session("leadsquared").post(url, params=params, json=activity_payload),
+            idempotent=False
+        )
+        return _activity_from_response(response, lead_id, phone_number)
+
+    except requests.exceptions.RequestException as e:
+        message = f"A network error occurred while posting activity for phone {phone_number}: {e}"
+        return (False if _never_sent(e) else None), message, None
+
+
+def _activity_create_request(lead_id: str, activity_payload: dict):
     activity_payload["RelatedProspectId"] = lead_id
 
     url = f"{LEADSQUARED_HOST}/v2/ProspectActivity.svc/Create"
@@ -94,37 +253,288 @@ def post_activity_by_phone(phone_number: str, activity_payload: dict):
         'secretKey': LEADSQUARED_SECRET_KEY
     }
 
-    # --- ADDED FOR DEBUGGING ---
-    print(f"[DEBUG] Preparing to POST activity for ProspectID {lead_id}.")
-    print(f"[DEBUG] Full JSON payload being sent:\n{json.dumps(activity_payload, indent=2)}")
-    # --- END DEBUGGING ADDITION ---
+    # Payload dumps are large, so they only print with DEBUG_LOG on and are sampled per row
+    debug(lambda: f"Preparing to POST activity for ProspectID {lead_id}. Full JSON payload being sent:\n"
+                  f"{json.dumps(activity_payload, indent=2)}", sampled=True)
+    return url, params
 
-    time.sleep(0.2)
+
+def _activity_from_response(response, lead_id: str, phone_number: str):
+    """Reads (success, message, activity_id) from a ProspectActivity.svc/Create response."""
+    debug(lambda: f"LSQ Response Status Code: {response.status_code}\nLSQ Response Body:\n{response.text}",
+          sampled=True)
+
+    if response.status_code != 200:
+        message = f"Error: Received HTTP {response.status_code} for lead {lead_id}. Response: {response.text}"
+        # A 5xx other than a throttling rejection may come after the activity was created
+        unknown = response.status_code >= 500 and response.status_code not in NON_IDEMPOTENT_RETRY_STATUS_CODES
+        return (None if unknown else False), message, None
 
     try:
-        response = requests.post(url, params=params, json=activity_payload)
-        
-        # --- ADDED FOR DEBUGGING ---
-        print(f"[DEBUG] LSQ Response Status Code: {response.status_code}")
-        print(f"[DEBUG] LSQ Response Body:\n{response.text}")
-        # --- END DEBUGGING ADDITION ---
-        
-        if response.status_code != 200:
-            message = f"Error: Received HTTP {response.status_code} for lead {lead_id}. Response: {response.text}"
-            return False, message
+        response_data = response.json()
+    except ValueError:
+        return None, f"Could not read the activity create response for lead {lead_id}: {response.text}", None
+    if not isinstance(response_data, dict):
+        return None, f"Unexpected activity create response for lead {lead_id}: {response.text}", None
+    if response_data.get("Status") == "Success":
+        result = response_data.get("Message")
+        activity_id = result.get("Id") if isinstance(result, dict) else None
+        return True, f"Successfully posted activity on lead with phone {phone_number}.", activity_id
+    else:
+        error_message = response_data.get("ExceptionMessage", "Unknown API error")
+        message = f"Failed to post activity for phone {phone_number}. Reason: {error_message}"
+        return False, message, None
+
+
+# Activities read per Retrieve page while looking for a marker, and the most pages
+# read before giving up (the lookup then reports "unknown" rather than "not found")
+_NOTE_LOOKUP_PAGE_SIZE = 100
+_NOTE_LOOKUP_MAX_PAGES = 50
+
+
+def find_activity_by_note(lead_id: str, activity_event_code: int, note: str):
+    """
+    Searches a lead's activities of one type for an exact ActivityNote.
+
+    Used to check whether an activity tagged with an idempotency marker was
+    created before a job was interrupted. Pages through every activity of the
+    type, since a busy lead can have more than one page of them.
+
+    Returns:
+        tuple: (found, activity_id, message). found is None if the lookup itself
+               failed or the activities couldn't all be read, in which case the
+               caller can't tell either way.
+    """
+    url = f"{LEADSQUARED_HOST}/v2/ProspectActivity.svc/Retrieve"
+    params = {
+        'accessKey': LEADSQUARED_ACCESS_KEY,
+        'secretKey': LEADSQUARED_SECRET_KEY,
+        'leadId': lead_id
+    }
+
+    for page in range(_NOTE_LOOKUP_MAX_PAGES):
+        body = {
+            "Parameter": {"ActivityEvent": activity_event_code},
+            "Paging": {"Offset": page * _NOTE_LOOKUP_PAGE_SIZE, "RowCount": _NOTE_LOOKUP_PAGE_SIZE},
+            "Sorting": {"ColumnName": "CreatedOn", "Direction": 1}
+        }
+        try:
+            response = send_with_retry(
+                "leadsquared_lookup",
+                lambda: get_session("leadsquared").post(url, params=params, json=body)
+            )
+            response.raise_for_status()
+            activities = response.json().get("ProspectActivities") or []
+        except (requests.exceptions.RequestException, ValueError, AttributeError) as e:
+            return None, None, f"Could not retrieve activities for lead {lead_id}: {e}"
+
+        for activity in activities:
+            if activity.get("ActivityNote") == note:
+                activity_id = activity.get("Id") or activity.get("ProspectActivityId")
+                return True, activity_id, f"Found existing activity {activity_id}"
+        if len(activities) < _NOTE_LOOKUP_PAGE_SIZE:
+            return False, None, "No matching activity found"
+
+    return None, None, (f"Lead {lead_id} has more than {_NOTE_LOOKUP_MAX_PAGES * _NOTE_LOOKUP_PAGE_SIZE} "
+                        f"activities of this type; stopped searching for the marker.")
+
+
+def _bulk_item_result(item: dict):
+    """Reads (success, message, activity_id) from one entry of a bulk create response."""
+    activity_id = item.get("ActivityId") or item.get("ProspectActivityId") or item.get("Id")
+    status = str(item.get("Status", "")).lower()
+    if activity_id or status == "success" or item.get("IsSuccess") is True:
+        return True, "Successfully posted activity" + (f" (ActivityId: {activity_id})" if activity_id else ""), activity_id
+    reason = item.get("ExceptionMessage") or item.get("Message") or "Unknown API error"
+    return False, f"Bulk create rejected the activity. Reason: {reason}", None
+
+
+def _never_sent(error: requests.exceptions.RequestException):
+    """Whether a request failed before any of it could reach the server."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError):
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        return isinstance(reason, NewConnectionError)
+    return False
+
+
+def post_activities_bulk(items: list):
+    """
+    Posts several activities in one ProspectActivity.svc/Bulk/Create request.
+
+    Args:
+        items (list): (lead_id, activity_payload) tuples. 'RelatedProspectId' is
+                      added to each payload.
+
+    Returns:
+        list or None: One (success, message, activity_id) per item in input order, or None if the
+                      request provably never reached Leadsquared (the connection failed or it
+                      was throttled), so nothing was created. If the request failed in a way
+                      that leaves the outcome unknown (a read timeout, a 5xx or an error
+                      body), success is None for every item: some may have been created.
+                      Items the response doesn't account for (or a 200 without a readable
+                      result list) are also reported with success None.
+    """
+    payloads = []
+    for lead_id, activity_payload in items:
+        activity_payload["RelatedProspectId"] = lead_id
+        payloads.append(activity_payload)
+
+    url = f"{LEADSQUARED_HOST}/v2/ProspectActivity.svc/Bulk/Create"
+    params = {
+        'accessKey': LEADSQUARED_ACCESS_KEY,
+        'secretKey': LEADSQUARED_SECRET_KEY
+    }
+
+    try:
+        response = send_with_retry(
+            "leadsquared_activity",
+            lambda: get_session("leadsquared").post(url, params=params, json=payloads),
+            idempotent=False
+        )
+    except requests.exceptions.RequestException as e:
+        print(f"Network error during bulk activity create: {e}")
+        if _never_sent(e):
+            return None
+        return [(None, f"The bulk create request failed after it was sent ({e}).", None)] * len(items)
 
+    if response.status_code in NON_IDEMPOTENT_RETRY_STATUS_CODES:
+        print(f"Bulk activity create was rejected with HTTP {response.status_code}: {response.text}")
+        return None
+    if response.status_code != 200:
+        print(f"Bulk activity create returned HTTP {response.status_code}: {response.text}")
+        return [(None, f"The bulk create request returned HTTP {response.status_code}.", None)] * len(items)
+
+    try:
         response_data = response.json()
-        if response_data.get("Status") == "Success":
-            return True, f"Successfully posted activity on lead with phone {phone_number}."
+    except ValueError:
+        response_data = None
+    if isinstance(response_data, dict):
+        if str(response_data.get("Status", "")).lower() == "error":
+            print(f"Bulk activity create failed: {response_data.get('ExceptionMessage')}")
+            return [(None, f"The bulk create request failed: {response_data.get('ExceptionMessage')}", None)] \
+                * len(items)
+        response_data = response_data.get("Response") or response_data.get("Responses")
+
+    unknown = (None, "The bulk create response did not include a result for this activity.", None)
+    results = [unknown] * len(items)
+    if not isinstance(response_data, list):
+        return results
+
+    # Prefer the RowNumber Leadsquared echoes back (1-based); fall back to position
+    for position, item in enumerate(response_data):
+        if not isinstance(item, dict):
+            continue
+        row_number = item.get("RowNumber")
+        index = int(row_number) - 1 if str(row_number).isdigit() else position
+        if 0 <= index < len(items):
+            results[index] = _bulk_item_result(item)
+    return results
+
+
+class ActivityBatchPoster:
+    """
+    Buffers built activity payloads and posts them in chunks through the bulk
+    create endpoint, reporting one result per source row.
+
+    Rows in a chunk whose bulk request never reached Leadsquared, and rows the
+    bulk response reports as rejected, are re-posted one at a time with
+    create_activity. When a bulk request fails after it may have been processed,
+    each row is only re-posted once its ActivityNote marker confirms it wasn't
+    created.
+
+    Each row's result is three-way: success True (posted), False (not posted) or
+    None (unknown: it may have been created but couldn't be confirmed). Unknown
+    rows must be checked by marker before anyone posts them again.
+
+    Usage:
+        poster = ActivityBatchPoster(on_result=lambda key, ok, msg, activity_id: ...)
+        for row in rows:
+            poster.add(row_key, lead_id, payload, phone_number)
+        poster.flush()
+    """
+
+    def __init__(self, chunk_size: int = LEADSQUARED_BULK_SIZE, on_result=None):
+        self.chunk_size = max(1, chunk_size)
+        self.on_result = on_result
+        self.requests_sent = 0
+        self.rows_posted = 0
+        self._buffer = []  # (row_key, lead_id, payload, phone_number)
+
+    def add(self, row_key, lead_id: str, activity_payload: dict, phone_number: str = None):
+        """Queues one activity, flushing automatically when a chunk is full."""
+        self._buffer.append((row_key, lead_id, activity_payload, phone_number))
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Posts everything buffered and reports each row through on_result."""
+        chunk, self._buffer = self._buffer, []
+        if not chunk:
+            return
+
+        if len(chunk) == 1:
+            results = None
         else:
-            error_message = response_data.get("ExceptionMessage", "Unknown API error")
-            message = f"Failed to post activity for phone {phone_number}. Reason: {error_message}"
-            return False, message
+            results = post_activities_bulk([(lead_id, payload) for _, lead_id, payload, _ in chunk])
+            self.requests_sent += 1
+
+        for position, (row_key, lead_id, payload, phone_number) in enumerate(chunk):
+            if results is not None and results[position][0] is None:
+                success, message, activity_id = self._confirm_or_repost(lead_id, payload, phone_number,
+                                                                        results[position][1])
+            elif results is None or not results[position][0]:
+                success, message, activity_id = create_activity(lead_id, payload, phone_number)
+                self.requests_sent += 1
+            else:
+                success, message, activity_id = results[position]
+                message = f"{message} on lead with phone {phone_number or lead_id}."
+            self.rows_posted += success is True
+            if self.on_result:
+                self.on_result(row_key, success, message, activity_id)
+
+
+    def _confirm_or_repost(self, lead_id: str, activity_payload: dict, phone_number: str, bulk_message: str):
+        """Re-posts a row of a failed bulk request only if its marker shows it wasn't created."""
+        note = activity_payload.get("ActivityNote")
+        if not note:
+            return None, f"{bulk_message} The activity may have been created, so it was not posted again.", None
+        found, activity_id, message = find_activity_by_note(lead_id, activity_payload["ActivityEvent"], note)
+        self.requests_sent += 1
+        if found:
+            return True, f"Posted by the failed bulk request (ActivityId: {activity_id}).", activity_id
+        if found is None:
+            return None, (f"{bulk_message} Could not confirm whether the activity was created, "
+                           f"so it was not posted again. {message}"), None
+        self.requests_sent += 1
+        return create_activity(lead_id, activity_payload, phone_number)
 
-    except requests.exceptions.RequestException as e:
-        message = f"A network error occurred while posting activity for phone {phone_number}: {e}"
-        return False, message
 
+def post_activity_by_phone(phone_number: str, activity_payload: dict):
+    """
+    Orchestrator function: Fetches a lead by phone number and then posts a custom activity.
+    
+    Args:
+        phone_number (str): The phone number to look up the lead.
+        activity_payload (dict): The dictionary representing the activity JSON body.
+                                 This function will add the 'RelatedProspectId'.
+
+    Returns:
+        tuple: A tuple containing (bool, str) for success status and a message.
+    """
+    # Step 1: Get the Lead ID
+    debug(f"Attempting to find lead with phone: {phone_number}")
+    lead_id, message = get_lead_by_phone(phone_number)
+    
+    if not lead_id:
+        debug(f"Lead lookup failed for {phone_number}. Reason: {message}")
+        return False, message # Return the message from the lookup (e.g., "No lead found")
+    
+    debug(f"Found ProspectID: {lead_id} for phone {phone_number}")
+        
+    # Step 2: Post the activity
+    return post_activity(lead_id, activity_payload, phone_number)
 
 
 # This block allows us to test the new workflow directly
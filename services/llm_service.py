@@ -1,37 +1,234 @@
 # services/llm_service.py
 
+import asyncio
 import os
+import aiohttp
 import requests
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from dotenv import load_dotenv
+from services.http_client import get_session, get_async_session, request_async
+from services.rate_limiter import send_with_retry, send_with_retry_async
+from services.extraction_cache import ExtractionCache, field_key
+from services.schema_validation import compile_schema
+from services.instrumentation import record_llm_usage, bind_usage_scope
+from services.model_router import model_router
 
 # Load environment variables from the .env file in the root directory
 load_dotenv()
 
 # Retrieve the API key from environment variables
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+OPENROUTER_API_URL = os.getenv("OPENROUTER_API_URL", "https://openrouter.ai/api/v1/chat/completions")
 
-def extract_from_transcript(transcript: str, schema: list, model: str = "openai/gpt-4o-mini"):
+# Maximum number of extractions kept in flight at once by extract_many
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+# Send the schema as a strict JSON Schema response_format instead of plain JSON mode
+LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "true").lower() in ("1", "true", "yes")
+# Times fields that fail local validation are re-requested before being left empty
+LLM_VALIDATION_RETRIES = int(os.getenv("LLM_VALIDATION_RETRIES", "1"))
+
+# Opt-in packing of several short transcripts into one request (see extract_batch)
+LLM_BATCHING = os.getenv("LLM_BATCHING", "false").lower() in ("1", "true", "yes")
+# Estimated transcript tokens packed into one batched request
+LLM_BATCH_TOKEN_BUDGET = int(os.getenv("LLM_BATCH_TOKEN_BUDGET", "4000"))
+# Transcripts estimated above this many tokens are always extracted on their own
+LLM_BATCH_MAX_TRANSCRIPT_TOKENS = int(os.getenv("LLM_BATCH_MAX_TRANSCRIPT_TOKENS", "400"))
+# Upper bound on transcripts per batched request, which keeps the reply short
+LLM_BATCH_MAX_ROWS = int(os.getenv("LLM_BATCH_MAX_ROWS", "10"))
+
+# Threads available to the duplicates of hedged requests (see model_router); caps hedges in flight
+LLM_HEDGE_WORKERS = int(os.getenv("LLM_HEDGE_WORKERS", "64"))
+
+SYSTEM_PROMPT = (
+    "You are an expert AI assistant for call analysis. Your task is to analyze the "
+    "provided call transcript and extract specific information based on the instructions. "
+    "You must respond ONLY with a single, valid JSON object. Do not include any "
+    "introductory text, explanations, or markdown formatting like ```json."
+)
+
+# With hedging on, a request's first attempt runs on _primary_pool while the caller
+# waits, and only the duplicate goes to the shared _hedge_pool. The primary pool is
+# sized to the callers (see size_primary_pool), so hedging never caps concurrency.
+_hedge_pool = ThreadPoolExecutor(max_workers=LLM_HEDGE_WORKERS, thread_name_prefix="llm-hedge")
+_primary_pool = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="llm-primary")
+_primary_pool_size = LLM_MAX_CONCURRENCY
+_primary_pool_lock = threading.Lock()
+
+# Shared cache of previously extracted field values, keyed per field on
+# transcript + field definition + model + system prompt
+extraction_cache = ExtractionCache()
+
+def extract_from_transcript(transcript: str, schema: list, model: str = None,
+                            use_cache: bool = True):
     """
     Analyzes a transcript using an LLM via OpenRouter to extract structured data.
 
     This function constructs a single prompt to the LLM, asking it to return a JSON
     object with all the requested fields, making it efficient.
 
+    Extraction is incremental: each field's result is cached under its own
+    fingerprint, so when the schema changes only the added or edited fields are
+    sent to the LLM (in a reduced prompt) and merged with the cached values.
+
+    Replies are coerced to each field's type (and allowed values, for enum
+    fields). Fields whose value fails validation are re-requested on their own;
+    any still invalid after LLM_VALIDATION_RETRIES attempts come back as None
+    and are not cached.
+
     Args:
         transcript (str): The call transcript text to analyze.
         schema (list): A list of dictionaries defining the data to extract.
                        Each dict should have 'name' and 'prompt' keys.
                        Example: [{'name': 'sentiment', 'prompt': 'Rate the sentiment'}]
-        model (str): The OpenRouter model identifier to use for the analysis.
+        model (str): The OpenRouter model identifier to use for the analysis. When None,
+                     model_router picks the models to try (with fallbacks and hedging).
+        use_cache (bool): Serve unchanged inputs from extraction_cache and store new results.
 
     Returns:
         dict: A dictionary containing the extracted data, or None if an error occurs.
     """
-    if not OPENROUTER_API_KEY:
-        print("ERROR: OPENROUTER_API_KEY is not set.")
+    models = _route(transcript, model)
+    keys, merged, missing_fields = _cached_fields(transcript, schema, models) if use_cache else ({}, {}, schema)
+    if not missing_fields:
+        return merged
+
+    validated = _extract_valid(transcript, missing_fields, models)
+    if validated is None:
+        return None
+
+    values, invalid = validated
+    if use_cache:
+        _store_fields(keys, missing_fields, values)
+    return {**merged, **values, **{name: None for name in invalid}}
+
+
+def _extract_valid(transcript: str, fields: list, models: list, reply: dict = None):
+    """
+    Validates an extraction reply, re-requesting only the fields that fail.
+
+    Args:
+        reply (dict): A reply already obtained for these fields, e.g. from a batched
+                      request. When None, a fresh extraction request is sent first.
+
+    Returns:
+        tuple: (values, invalid) with the coerced values of the valid fields and the
+               names of fields still invalid after retrying, or None if the first
+               request failed.
+    """
+    if reply is None:
+        reply = _request_extraction(transcript, fields, models)
+        if reply is None:
+            return None
+
+    rounds = _validation_rounds(fields, reply)
+    try:
+        retry_fields = next(rounds)
+        while True:
+            retry_fields = rounds.send(_request_extraction(transcript, retry_fields, models))
+    except StopIteration as finished:
+        return finished.value
+
+
+async def _extract_valid_async(transcript: str, fields: list, models: list):
+    """Async counterpart of _extract_valid, sending its requests on the shared aiohttp session."""
+    reply = await _request_extraction_async(transcript, fields, models)
+    if reply is None:
         return None
 
+    rounds = _validation_rounds(fields, reply)
+    try:
+        retry_fields = next(rounds)
+        while True:
+            retry_fields = rounds.send(await _request_extraction_async(transcript, retry_fields, models))
+    except StopIteration as finished:
+        return finished.value
+
+
+def _validation_rounds(fields: list, reply: dict):
+    """
+    The validate-and-re-request policy shared by the sync and async extractions.
+
+    A generator: it yields the fields to re-request and is sent the reply to each
+    re-request (None if it failed), so the caller decides how requests are sent.
+    It returns (values, invalid) as in _extract_valid.
+    """
+    values, invalid = compile_schema(fields).validate(reply)
+    for _ in range(LLM_VALIDATION_RETRIES):
+        if not invalid:
+            break
+        _record_validation("rerequested", len(invalid))
+        retry_fields = [item for item in fields if item["name"] in invalid]
+        reply = yield retry_fields
+        if reply is None:
+            break
+        retried, invalid = compile_schema(retry_fields).validate(reply)
+        values.update(retried)
+
+    if invalid:
+        _record_validation("invalid", len(invalid))
+        print(f"WARNING: LLM values for {', '.join(invalid)} failed validation and were left empty.")
+    return values, invalid
+
+
+async def extract_from_transcript_async(transcript: str, schema: list, model: str = None,
+                                        use_cache: bool = True):
+    """
+    Async variant of extract_from_transcript, with the same caching, validation
+    and return value. Requests go through the shared aiohttp session for the running
+    event loop, so cancelling the calling task abandons the request in flight.
+    """
+    models = _route(transcript, model)
+    keys, merged, missing_fields = _cached_fields(transcript, schema, models) if use_cache else ({}, {}, schema)
+    if not missing_fields:
+        return merged
+
+    validated = await _extract_valid_async(transcript, missing_fields, models)
+    if validated is None:
+        return None
+
+    values, invalid = validated
+    if use_cache:
+        _store_fields(keys, missing_fields, values)
+    return {**merged, **values, **{name: None for name in invalid}}
+
+
+def _route(transcript: str, model: str = None):
+    """The models to try for a transcript, in order: just `model` when one is given."""
+    return [model] if model else model_router.route(estimate_tokens(transcript))
+
+
+def _cached_fields(transcript: str, schema: list, models: list):
+    """Returns (field keys by name, cached values by name, fields still to extract)."""
+    # Keyed on the first choice, so a routing change re-extracts like a model change
+    keys = {item["name"]: field_key(transcript, item, models[0], SYSTEM_PROMPT) for item in schema}
+    cached = extraction_cache.get_many(list(keys.values()))
+    merged = {name: cached[key] for name, key in keys.items() if key in cached}
+    missing_fields = [item for item in schema if keys[item["name"]] not in cached]
+    return keys, merged, missing_fields
+
+
+def _store_fields(keys: dict, fields: list, extracted_data: dict):
+    extraction_cache.set_many({
+        keys[item["name"]]: extracted_data[item["name"]]
+        for item in fields if item["name"] in extracted_data
+    })
+
+
+def _request_extraction(transcript: str, schema: list, models: list):
+    """Sends one extraction request for the given schema fields and parses the JSON reply."""
+    return _send_chat(_extraction_prompt(transcript, schema), models, compile_schema(schema).response_format())
+
+
+async def _request_extraction_async(transcript: str, schema: list, models: list):
+    return await _send_chat_async(_extraction_prompt(transcript, schema), models,
+                                  compile_schema(schema).response_format())
+
+
+def _extraction_prompt(transcript: str, schema: list):
     # 1. Construct the detailed prompt for the LLM
     prompt_instructions = "\n".join(
         [f"- For the field '{item['name']}', follow this instruction: {item['prompt']}" for item in schema]
@@ -40,13 +237,6 @@ def extract_from_transcript(transcript: str, schema: list, model: str = "openai/
     # This creates a JSON "template" to show the model what to output
     json_template = ", ".join([f'"{item["name"]}": "..."' for item in schema])
 
-    system_prompt = (
-        "You are an expert AI assistant for call analysis. Your task is to analyze the "
-        "provided call transcript and extract specific information based on the instructions. "
-        "You must respond ONLY with a single, valid JSON object. Do not include any "
-        "introductory text, explanations, or markdown formatting like ```json."
-    )
-
     user_prompt = f"""
         Here is the call transcript:
         --- TRANSCRIPT START ---
@@ -59,43 +249,526 @@ def extract_from_transcript(transcript: str, schema: list, model: str = "openai/
         Your response must be a single JSON object with the following structure:
         {{ {json_template} }}
     """
+    return user_prompt
 
-    # 2. Make the API call to OpenRouter
-    try:
-        response = requests.post(
-            url="https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": model,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "response_format": {"type": "json_object"} # Force JSON output
-            }
-        )
 
-        # Raise an exception for bad status codes (4xx or 5xx)
-        response.raise_for_status()
+def _chat_request(user_prompt: str, model: str, response_format: dict = None):
+    """Builds the (headers, body) of a chat completion request in JSON mode."""
+    headers = {
+        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+        "Content-Type": "application/json"
+    }
+    request_body = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ],
+        # Force JSON output, constrained to the schema when structured output is enabled
+        "response_format": response_format if response_format and LLM_STRUCTURED_OUTPUT else {"type": "json_object"}
+    }
+    return headers, request_body
 
+
+def _parse_chat_response(response, model: str):
+    """Reads the JSON reply out of a chat completion response (requests or BufferedResponse), or returns None."""
+    try:
         # 3. Parse the response
         response_data = response.json()
+        record_llm_usage(model, response_data.get("usage"))
         message_content = response_data['choices'][0]['message']['content']
-        
+
         # The content itself should be a JSON string, so we parse it again
         extracted_data = json.loads(message_content)
         return extracted_data
 
+    except (KeyError, IndexError, TypeError, json.JSONDecodeError) as e:
+        print(f"Error parsing LLM response: {e}")
+        print(f"Raw response content: {response.text}")
+        return None
+
+
+def _send_chat(user_prompt: str, models: list, response_format: dict = None):
+    """
+    Sends one chat completion in JSON mode and returns the parsed JSON reply, or None.
+
+    Models are tried in order until one answers. When hedging is on, a request
+    still running past its model's latency threshold is duplicated to the next
+    model (or the same one, if it is the last) and the first reply wins.
+    """
+    if not OPENROUTER_API_KEY:
+        print("ERROR: OPENROUTER_API_KEY is not set.")
+        return None
+
+    for position, model in enumerate(models):
+        if position:
+            model_router.record(model, "fallback")
+        hedge_model = models[position + 1] if position + 1 < len(models) else model
+        reply = _send_hedged(user_prompt, model, hedge_model, response_format)
+        if reply is not None:
+            return reply
+    return None
+
+
+def size_primary_pool(workers: int):
+    """
+    Lets `workers` threads send hedged requests at once without their first attempts
+    queueing for a thread. Call with the number of concurrent extractions.
+    """
+    global _primary_pool, _primary_pool_size
+    with _primary_pool_lock:
+        if workers <= _primary_pool_size:
+            return
+        # Attempts already on the old pool finish there
+        _primary_pool.shutdown(wait=False)
+        _primary_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-primary")
+        _primary_pool_size = workers
+
+
+def _send_hedged(user_prompt: str, model: str, hedge_model: str, response_format: dict = None):
+    delay = model_router.hedge_delay(model)
+    if delay is None:
+        return _send_chat_once(user_prompt, model, response_format)
+
+    started = threading.Event()
+
+    def send_primary():
+        started.set()
+        return _send_chat_once(user_prompt, model, response_format)
+
+    with _primary_pool_lock:
+        primary = _primary_pool.submit(bind_usage_scope(send_primary))
+    # The hedge delay counts from when the request is sent, not from any wait for a thread
+    started.wait()
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+
+    model_router.record(model, "hedged")
+    hedge = _hedge_pool.submit(bind_usage_scope(_send_chat_once), user_prompt, hedge_model, response_format)
+    pending = {primary, hedge}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            reply = future.result()
+            if reply is not None:
+                # The slower request can't be interrupted; it finishes in the background and is dropped
+                if future is hedge:
+                    model_router.record(hedge_model, "hedge_won")
+                return reply
+    return None
+
+
+def _send_chat_once(user_prompt: str, model: str, response_format: dict = None):
+    # 2. Make the API call to OpenRouter
+    headers, request_body = _chat_request(user_prompt, model, response_format)
+    start = time.perf_counter()
+    try:
+        response = send_with_retry(
+            "openrouter",
+            lambda: get_session("openrouter").post(url=OPENROUTER_API_URL, headers=headers, json=request_body)
+        )
+
+        # Raise an exception for bad status codes (4xx or 5xx)
+        response.raise_for_status()
     except requests.exceptions.RequestException as e:
         print(f"Error calling OpenRouter API: {e}")
+        model_router.observe(model, time.perf_counter() - start, ok=False)
         return None
-    except (KeyError, IndexError, json.JSONDecodeError) as e:
-        print(f"Error parsing LLM response: {e}")
-        print(f"Raw response content: {response.text if 'response' in locals() else 'No response object'}")
+    reply = _parse_chat_response(response, model)
+    model_router.observe(model, time.perf_counter() - start, ok=reply is not None)
+    return reply
+
+
+async def _send_chat_async(user_prompt: str, models: list, response_format: dict = None):
+    """Async counterpart of _send_chat on the shared aiohttp session. Hedging losers are cancelled."""
+    if not OPENROUTER_API_KEY:
+        print("ERROR: OPENROUTER_API_KEY is not set.")
+        return None
+
+    for position, model in enumerate(models):
+        if position:
+            model_router.record(model, "fallback")
+        hedge_model = models[position + 1] if position + 1 < len(models) else model
+        reply = await _send_hedged_async(user_prompt, model, hedge_model, response_format)
+        if reply is not None:
+            return reply
+    return None
+
+
+async def _send_hedged_async(user_prompt: str, model: str, hedge_model: str, response_format: dict = None):
+    delay = model_router.hedge_delay(model)
+    if delay is None:
+        return await _send_chat_once_async(user_prompt, model, response_format)
+
+    primary = asyncio.create_task(_send_chat_once_async(user_prompt, model, response_format))
+    tasks = {primary}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done:
+            return primary.result()
+
+        model_router.record(model, "hedged")
+        hedge = asyncio.create_task(_send_chat_once_async(user_prompt, hedge_model, response_format))
+        tasks.add(hedge)
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                reply = task.result()
+                if reply is not None:
+                    if task is hedge:
+                        model_router.record(hedge_model, "hedge_won")
+                    return reply
         return None
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _send_chat_once_async(user_prompt: str, model: str, response_format: dict = None):
+    headers, request_body = _chat_request(user_prompt, model, response_format)
+    start = time.perf_counter()
+    try:
+        response = await send_with_retry_async(
+            "openrouter",
+            lambda: request_async("openrouter", "POST", OPENROUTER_API_URL, headers=headers, json=request_body)
+        )
+        response.raise_for_status()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"Error calling OpenRouter API: {e}")
+        model_router.observe(model, time.perf_counter() - start, ok=False)
+        return None
+    reply = _parse_chat_response(response, model)
+    model_router.observe(model, time.perf_counter() - start, ok=reply is not None)
+    return reply
+
+
+def extract_many(transcripts: list, schema: list, model: str = None,
+                 max_workers: int = None, on_result=None):
+    """
+    Runs extract_from_transcript over many transcripts concurrently.
+
+    Each transcript is submitted to a thread pool so up to `max_workers` OpenRouter
+    requests are in flight at once. Results come back in the same order as the input,
+    regardless of the order in which the requests finish.
+
+    Args:
+        transcripts (list): The transcript strings to analyze.
+        schema (list): The extraction schema, passed through to extract_from_transcript.
+        model (str): The OpenRouter model identifier to use, or None to let model_router choose.
+        max_workers (int): Concurrency cap. Defaults to LLM_MAX_CONCURRENCY.
+        on_result (callable): Optional callback invoked as on_result(index, result, completed)
+                              from the calling thread each time an extraction finishes.
+
+    Returns:
+        list: One entry per transcript, either the extracted dict or None on failure.
+    """
+    results = [None] * len(transcripts)
+    if not transcripts:
+        return results
+
+    max_workers = max(1, max_workers or LLM_MAX_CONCURRENCY)
+    # Size the keep-alive pool so every worker can hold its own connection
+    get_session("openrouter", pool_size=max_workers)
+    size_primary_pool(max_workers)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(extract_from_transcript, transcript, schema, model): index
+            for index, transcript in enumerate(transcripts)
+        }
+        for completed, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                print(f"Unexpected error extracting transcript {index}: {e}")
+                results[index] = None
+            if on_result:
+                on_result(index, results[index], completed)
+
+    return results
+
+
+async def extract_many_async(transcripts: list, schema: list, model: str = None,
+                             max_concurrency: int = None, on_result=None):
+    """
+    Async variant of extract_many: max_concurrency coroutines share the work on one
+    thread, instead of a thread per request. Pending transcripts are plain list
+    entries, so memory doesn't grow with the number of rows queued.
+
+    If the calling task is cancelled, every pending and in-flight extraction is
+    cancelled with it.
+
+    Args:
+        max_concurrency (int): Requests in flight at once. Defaults to LLM_MAX_CONCURRENCY.
+        on_result (callable): Optional callback invoked as on_result(index, result, completed)
+                              on the event loop each time an extraction finishes.
+
+    Returns:
+        list: One entry per transcript, either the extracted dict or None on failure.
+    """
+    results = [None] * len(transcripts)
+    if not transcripts:
+        return results
+
+    max_concurrency = max(1, max_concurrency or LLM_MAX_CONCURRENCY)
+    get_async_session("openrouter", pool_size=max_concurrency)
+    pending = enumerate(transcripts)
+    completed = 0
+
+    async def worker():
+        nonlocal completed
+        for index, transcript in pending:
+            try:
+                results[index] = await extract_from_transcript_async(transcript, schema, model)
+            except Exception as e:
+                print(f"Unexpected error extracting transcript {index}: {e}")
+            completed += 1
+            if on_result:
+                on_result(index, results[index], completed)
+
+    tasks = [asyncio.create_task(worker()) for _ in range(min(max_concurrency, len(transcripts)))]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+    return results
+
+
+# --- Validation Stats ---
+
+_validation_lock = threading.Lock()
+_validation_stats = {"rerequested": 0, "invalid": 0}
+
+
+def _record_validation(key: str, count: int):
+    with _validation_lock:
+        _validation_stats[key] += count
+
+
+def get_validation_stats():
+    """
+    Returns validation counters.
+
+    Returns:
+        dict: {"rerequested": field values re-requested after failing validation,
+               "invalid": field values still invalid after retrying, left empty}
+    """
+    with _validation_lock:
+        return dict(_validation_stats)
+
+
+def reset_validation_stats():
+    with _validation_lock:
+        _validation_stats.update(rerequested=0, invalid=0)
+
+
+# --- Batched Prompting ---
+
+_batch_lock = threading.Lock()
+_batch_stats = {"requests": 0, "rows": 0, "retried_singly": 0}
+
+
+def estimate_tokens(text: str):
+    """Rough token count (about four characters per token), good enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+def is_batchable(transcript: str):
+    """Whether a transcript is short enough to share a request with others."""
+    return estimate_tokens(transcript) <= LLM_BATCH_MAX_TRANSCRIPT_TOKENS
+
+
+def get_batch_stats():
+    """
+    Returns batched prompting counters.
+
+    Returns:
+        dict: {"requests": batched requests sent, "rows": rows answered by them,
+               "retried_singly": rows that came back missing or malformed}
+    """
+    with _batch_lock:
+        return dict(_batch_stats)
+
+
+def reset_batch_stats():
+    with _batch_lock:
+        _batch_stats.update(requests=0, rows=0, retried_singly=0)
+
+
+def _pack_batches(entries: list, token_budget: int, max_rows: int):
+    """Splits (position, transcript) pairs into batches within the token and row limits."""
+    batch, used = [], 0
+    for entry in entries:
+        cost = estimate_tokens(entry[1])
+        if batch and (used + cost > token_budget or len(batch) >= max_rows):
+            yield batch
+            batch, used = [], 0
+        batch.append(entry)
+        used += cost
+    if batch:
+        yield batch
+
+
+def _request_batch_extraction(transcripts: list, schema: list, models: list):
+    """
+    Sends several transcripts in one extraction request.
+
+    Returns:
+        dict: {position in transcripts: raw reply entry} for the transcripts the
+              reply answered. Entries are validated by the caller.
+    """
+    prompt_instructions = "\n".join(
+        [f"- For the field '{item['name']}', follow this instruction: {item['prompt']}" for item in schema]
+    )
+    json_template = ", ".join([f'"{item["name"]}": "..."' for item in schema])
+    transcript_blocks = "\n".join(
+        f"--- TRANSCRIPT {number} START ---\n{transcript}\n--- TRANSCRIPT {number} END ---"
+        for number, transcript in enumerate(transcripts, start=1)
+    )
+
+    user_prompt = f"""
+        Here are {len(transcripts)} separate call transcripts, each marked with its ID:
+        {transcript_blocks}
+
+        Analyze each transcript on its own and extract the following information for it:
+        {prompt_instructions}
+
+        Your response must be a single JSON object with a "results" array holding one
+        entry per transcript, identified by its ID:
+        {{ "results": [ {{ "id": 1, {json_template} }} ] }}
+    """
+
+    reply = _send_chat(user_prompt, models, compile_schema(schema).batch_response_format())
+    entries = reply.get("results") if isinstance(reply, dict) else None
+    if not isinstance(entries, list):
+        return {}
+
+    answered = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            position = int(entry.get("id")) - 1
+        except (TypeError, ValueError):
+            continue
+        if 0 <= position < len(transcripts):
+            answered[position] = entry
+    return answered
+
+
+def extract_batch(transcripts: list, schema: list, model: str = None,
+                  use_cache: bool = True, token_budget: int = None, max_rows: int = None):
+    """
+    Extracts several short transcripts with as few requests as possible.
+
+    The schema instructions are sent once per request instead of once per transcript.
+    Transcripts are packed into requests of at most max_rows transcripts and
+    token_budget estimated transcript tokens, and the model answers with a JSON
+    "results" array keyed by transcript ID. A transcript whose entry is missing is
+    retried alone with a normal extraction request; one whose entry has invalid
+    fields gets only those fields re-requested, as in extract_from_transcript.
+
+    Args:
+        transcripts (list): The transcript strings to analyze.
+        schema (list): The extraction schema, as for extract_from_transcript.
+        model (str): The OpenRouter model identifier to use, or None to let model_router choose.
+        use_cache (bool): Serve unchanged inputs from extraction_cache and store new results.
+        token_budget (int): Defaults to LLM_BATCH_TOKEN_BUDGET.
+        max_rows (int): Defaults to LLM_BATCH_MAX_ROWS.
+
+    Returns:
+        list: One entry per transcript, either the extracted dict or None on failure.
+    """
+    token_budget = token_budget or LLM_BATCH_TOKEN_BUDGET
+    max_rows = max(1, max_rows or LLM_BATCH_MAX_ROWS)
+    results = [None] * len(transcripts)
+
+    # Transcripts are grouped by which fields they still need, so every batch shares one schema
+    lookups = {}
+    groups = {}
+    for position, transcript in enumerate(transcripts):
+        keys, merged, missing_fields = (_cached_fields(transcript, schema, _route(transcript, model))
+                                        if use_cache else ({}, {}, schema))
+        if not missing_fields:
+            results[position] = merged
+            continue
+        lookups[position] = (keys, merged, missing_fields)
+        groups.setdefault(tuple(item["name"] for item in missing_fields), []).append((position, transcript))
+
+    for entries in groups.values():
+        fields = lookups[entries[0][0]][2]
+        for batch in _pack_batches(entries, token_budget, max_rows):
+            answered = {}
+            if len(batch) > 1:
+                answered = _request_batch_extraction(
+                    [transcript for _, transcript in batch], fields,
+                    _route("".join(transcript for _, transcript in batch), model)
+                )
+                with _batch_lock:
+                    _batch_stats["requests"] += 1
+                    _batch_stats["rows"] += len(answered)
+                    _batch_stats["retried_singly"] += len(batch) - len(answered)
+
+            for offset, (position, transcript) in enumerate(batch):
+                validated = _extract_valid(transcript, fields, _route(transcript, model),
+                                           reply=answered.get(offset))
+                if validated is None:
+                    continue
+                values, invalid = validated
+                keys, merged, _ = lookups[position]
+                if use_cache:
+                    _store_fields(keys, fields, values)
+                results[position] = {**merged, **values, **{name: None for name in invalid}}
+
+    return results
+
+
+class TranscriptBatcher:
+    """
+    Collects short transcripts from concurrent callers until they fill one batched request.
+
+    Usage:
+        batcher = TranscriptBatcher()
+        batch = batcher.add(key, transcript)  # a full batch of (key, transcript), or None
+        if batch:
+            results = extract_batch([transcript for _, transcript in batch], schema)
+        ...
+        leftover = batcher.drain()
+    """
+
+    def __init__(self, token_budget: int = None, max_rows: int = None):
+        self.token_budget = token_budget or LLM_BATCH_TOKEN_BUDGET
+        self.max_rows = max(1, max_rows or LLM_BATCH_MAX_ROWS)
+        self._pending = []
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def add(self, key, transcript: str):
+        """
+        Holds a transcript. Returns a batch to extract once one is full: the held
+        transcripts if this one would overflow the token budget, or all of them
+        including this one once max_rows is reached.
+        """
+        cost = estimate_tokens(transcript)
+        with self._lock:
+            full = None
+            if self._pending and self._used + cost > self.token_budget:
+                full, self._pending, self._used = self._pending, [], 0
+            self._pending.append((key, transcript))
+            self._used += cost
+            if full is None and len(self._pending) >= self.max_rows:
+                full, self._pending, self._used = self._pending, [], 0
+            return full
+
+    def drain(self):
+        """Returns and clears whatever is still held."""
+        with self._lock:
+            pending, self._pending, self._used = self._pending, [], 0
+            return pending
 
 
 # This block allows us to test the service directly
@@ -0,0 +1,145 @@
+# services/model_router.py
+
+import os
+import threading
+from collections import deque
+
+from dotenv import load_dotenv
+
+from services.instrumentation import metrics
+
+# Load environment variables
+load_dotenv()
+
+# OpenRouter models to try, in order. Later models are fallbacks for requests the
+# earlier ones fail, and hedge targets when a request runs long.
+LLM_MODELS = [model.strip() for model in os.getenv("LLM_MODELS", "openai/gpt-4o-mini").split(",") if model.strip()]
+# Model tried first for transcripts over LLM_LONG_TRANSCRIPT_TOKENS estimated tokens. Empty disables.
+LLM_LONG_CONTEXT_MODEL = os.getenv("LLM_LONG_CONTEXT_MODEL", "")
+LLM_LONG_TRANSCRIPT_TOKENS = int(os.getenv("LLM_LONG_TRANSCRIPT_TOKENS", "30000"))
+# Send a duplicate request when one runs past this latency percentile of its model
+LLM_HEDGING = os.getenv("LLM_HEDGING", "false").lower() in ("1", "true", "yes")
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+# Until a model has this many latency samples, hedge after LLM_HEDGE_INITIAL_DELAY seconds
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_INITIAL_DELAY = float(os.getenv("LLM_HEDGE_INITIAL_DELAY", "10"))
+
+# Recent successful request latencies kept per model
+LATENCY_WINDOW = 500
+
+
+class _LatencyWindow:
+    def __init__(self):
+        self.samples = deque(maxlen=LATENCY_WINDOW)
+        self._sorted = None
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+        self._sorted = None
+
+    def percentile(self, share: float):
+        if not self.samples:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self.samples)
+        return self._sorted[min(len(self._sorted) - 1, int(len(self._sorted) * share))]
+
+
+class ModelRouter:
+    """
+    Chooses which OpenRouter models serve a request and when to hedge it.
+
+    route() gives the candidate models in order: the long-context model first for
+    long transcripts, then the configured list. Callers try them in turn until one
+    answers. hedge_delay() gives how long to wait on a request before sending a
+    duplicate; it follows each model's recent latency percentile, so the threshold
+    adapts as the model speeds up or slows down.
+
+    Latency windows survive reset_stats(), so a new job starts with a warm threshold.
+    """
+
+    def __init__(self, models: list = None, long_context_model: str = None, long_transcript_tokens: int = None,
+                 hedging: bool = None, hedge_percentile: float = None):
+        self.models = models or LLM_MODELS
+        self.long_context_model = LLM_LONG_CONTEXT_MODEL if long_context_model is None else long_context_model
+        self.long_transcript_tokens = long_transcript_tokens or LLM_LONG_TRANSCRIPT_TOKENS
+        self.hedging = LLM_HEDGING if hedging is None else hedging
+        self.hedge_percentile = hedge_percentile or LLM_HEDGE_PERCENTILE
+        self._lock = threading.Lock()
+        self._latency = {}
+        self._stats = {}
+
+    def route(self, transcript_tokens: int):
+        """Returns the models to try for a transcript of this many estimated tokens, in order."""
+        if self.long_context_model and transcript_tokens > self.long_transcript_tokens:
+            return [self.long_context_model] + [model for model in self.models if model != self.long_context_model]
+        return list(self.models)
+
+    def hedge_delay(self, model: str):
+        """Seconds to wait on a request to this model before hedging it, or None to never hedge."""
+        if not self.hedging:
+            return None
+        with self._lock:
+            window = self._latency.get(model)
+            if window is None or len(window.samples) < LLM_HEDGE_MIN_SAMPLES:
+                return LLM_HEDGE_INITIAL_DELAY
+            return window.percentile(self.hedge_percentile)
+
+    def observe(self, model: str, seconds: float, ok: bool):
+        """Records one finished request. Only successful ones feed the latency window."""
+        metrics.observe("llm_model_seconds", seconds, model=model, outcome="ok" if ok else "failed")
+        with self._lock:
+            self._count(model, "requests" if ok else "failures")
+            if ok:
+                self._latency.setdefault(model, _LatencyWindow()).add(seconds)
+
+    def record(self, model: str, event: str):
+        """Counts a routing event for a model: 'hedged', 'hedge_won' or 'fallback'."""
+        metrics.inc(f"llm_{event}_total", model=model)
+        with self._lock:
+            self._count(model, event)
+
+    def _count(self, model: str, key: str):
+        model_stats = self._stats.setdefault(
+            model, {"requests": 0, "failures": 0, "hedged": 0, "hedge_won": 0, "fallback": 0}
+        )
+        model_stats[key] += 1
+
+    def stats(self):
+        """
+        Returns per-model routing statistics.
+
+        Returns:
+            dict: {model: {"requests", "failures", "hedged", "hedge_won", "fallback",
+                   "p50", "p95", "p99"}} with latencies in seconds over the recent window.
+                  "hedged" counts requests to the model that were hedged, "hedge_won"
+                  duplicates sent to it that answered first, "fallback" requests it
+                  served after an earlier model failed.
+        """
+        with self._lock:
+            return {
+                model: {
+                    **model_stats,
+                    **{f"p{round(share * 100)}": (self._latency[model].percentile(share)
+                                                  if model in self._latency else None)
+                       for share in (0.5, 0.95, 0.99)},
+                }
+                for model, model_stats in self._stats.items()
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+
+# Shared router used by llm_service
+model_router = ModelRouter()
+
+
+def get_routing_stats():
+    """Returns the shared router's per-model statistics (see ModelRouter.stats)."""
+    return model_router.stats()
+
+
+def reset_routing_stats():
+    model_router.reset_stats()
@@ -0,0 +1,195 @@
+# services/phone_utils.py
+
+import math
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Country code given to national numbers without one, so "9876543210", "09876543210",
+# "919876543210" and "+91 98765-43210" share one key. Empty disables the defaulting.
+PHONE_DEFAULT_COUNTRY_CODE = os.getenv("PHONE_DEFAULT_COUNTRY_CODE", "91")
+# Digits in a national number of the default country
+PHONE_NATIONAL_DIGITS = int(os.getenv("PHONE_NATIONAL_DIGITS", "10"))
+# Post one activity per lead, from its last call in the file, instead of one per row
+COALESCE_SAME_LEAD = os.getenv("COALESCE_SAME_LEAD", "false").lower() in ("1", "true", "yes")
+
+_NON_DIGITS = re.compile(r"[^0-9]")
+
+
+def _canonical(digits: str, international: bool, country_code: str):
+    """Applies country-code defaulting to a number's digits."""
+    if not digits:
+        return ""
+    if international:
+        return f"+{digits}"
+    if not country_code:
+        return digits
+    if digits.startswith("00"):
+        # International dialling prefix
+        return f"+{digits[2:]}"
+    if len(digits) == PHONE_NATIONAL_DIGITS:
+        return f"+{country_code}{digits}"
+    if len(digits) == PHONE_NATIONAL_DIGITS + 1 and digits.startswith("0"):
+        # Trunk prefix
+        return f"+{country_code}{digits[1:]}"
+    if len(digits) == len(country_code) + PHONE_NATIONAL_DIGITS and digits.startswith(country_code):
+        return f"+{digits}"
+    # Not a recognisable number for the default country; kept as dialled
+    return digits
+
+
+def normalize_phone(value, country_code: str = None) -> str:
+    """
+    Converts a phone number cell from the uploaded CSV into a canonical lookup key.
+
+    Handles the float artifacts pandas introduces when it reads a numeric column
+    ("9876543210.0"), and strips spaces, dashes, brackets and other punctuation.
+    A leading '+' is preserved. National numbers of the default country, with or
+    without a trunk '0' or the bare country code, get a '+<country code>' prefix.
+
+    Args:
+        value: The raw cell value (str, int, float, None or NaN).
+        country_code (str): Defaults to PHONE_DEFAULT_COUNTRY_CODE.
+
+    Returns:
+        str: The normalized phone number, or "" if the cell is empty.
+    """
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+
+    text = str(value).strip()
+    if text.endswith(".0") and text[:-2].lstrip("+").isdigit():
+        text = text[:-2]
+
+    digits = _NON_DIGITS.sub("", text)
+    country_code = PHONE_DEFAULT_COUNTRY_CODE if country_code is None else country_code
+    return _canonical(digits, text.startswith("+"), country_code)
+
+
+def normalize_phones(values, country_code: str = None):
+    """
+    normalize_phone over a whole column. Each distinct raw value is normalized
+    once and the results are mapped back onto the rows, so repeat calls to the
+    same number cost nothing extra.
+
+    Args:
+        values: Array-like of raw cell values.
+        country_code (str): Defaults to PHONE_DEFAULT_COUNTRY_CODE.
+
+    Returns:
+        np.ndarray: Object array of normalized numbers, "" for empty cells.
+    """
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    normalized = np.empty(len(uniques) + 1, dtype=object)
+    normalized[:-1] = [normalize_phone(value, country_code) for value in uniques]
+    normalized[-1] = ""  # Empty cells (NaN/None) are factorized to -1
+    return normalized[codes]
+
+
+def lookup_number(phone_number: str, country_code: str = None) -> str:
+    """
+    The form of a normalized number sent to Leadsquared: the national number for
+    the default country (as dialer exports usually hold it), else unchanged.
+    """
+    country_code = PHONE_DEFAULT_COUNTRY_CODE if country_code is None else country_code
+    prefix = f"+{country_code}"
+    if country_code and phone_number.startswith(prefix) \
+            and len(phone_number) == len(prefix) + PHONE_NATIONAL_DIGITS:
+        return phone_number[len(prefix):]
+    return phone_number
+
+
+class PhoneIndex:
+    """
+    Normalized phone number of every row in a job, plus an index from each
+    number to the rows that carry it.
+
+    Numbers are stored once each, with an int32 code per row, so a million-row
+    column takes a few megabytes beyond its distinct numbers.
+
+    Usage:
+        index = PhoneIndex.build(chunk[phone_column] for _, chunk in iter_chunks(...))
+        index.phone(row)            # normalized number of a CSV row
+        index.rows_for(phone)       # CSV rows calling that number
+        index.last_row(phone)       # the number's last row in the file
+    """
+
+    def __init__(self, phones: list, codes: np.ndarray, first_row: int = 2):
+        self.phones = phones
+        self.codes = codes
+        self.first_row = first_row
+        valid = codes >= 0
+        positions = np.flatnonzero(valid)
+        # Rows grouped by number, in file order within each group
+        self._order = positions[np.argsort(codes[valid], kind="stable")]
+        counts = np.bincount(codes[valid], minlength=len(phones))
+        self._starts = np.concatenate(([0], np.cumsum(counts)))
+        self._counts = counts
+        self._code_of = {phone: code for code, phone in enumerate(phones)}
+
+    @classmethod
+    def build(cls, chunks, first_row: int = 2, country_code: str = None):
+        """
+        Builds the index from the phone column, one chunk at a time.
+
+        Args:
+            chunks: Iterable of array-likes of raw phone cells, in file order.
+            first_row (int): CSV row number of the first value (the header is row 1).
+        """
+        phones, code_of, row_codes = [], {}, []
+        for values in chunks:
+            normalized = normalize_phones(values, country_code)
+            codes, uniques = pd.factorize(normalized)
+            chunk_codes = np.empty(len(uniques), dtype=np.int32)
+            for position, phone in enumerate(uniques):
+                if not phone:
+                    chunk_codes[position] = -1
+                    continue
+                code = code_of.get(phone)
+                if code is None:
+                    code = code_of[phone] = len(phones)
+                    phones.append(phone)
+                chunk_codes[position] = code
+            row_codes.append(chunk_codes[codes])
+        codes = np.concatenate(row_codes) if row_codes else np.empty(0, dtype=np.int32)
+        return cls(phones, codes, first_row)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def phone(self, row_number: int):
+        """Normalized number of a CSV row, or "" if its cell is empty."""
+        code = self.codes[row_number - self.first_row]
+        return self.phones[code] if code >= 0 else ""
+
+    def rows_for(self, phone_number: str):
+        """CSV row numbers carrying a normalized number, in file order."""
+        code = self._code_of.get(phone_number)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        return self._order[self._starts[code]:self._starts[code + 1]] + self.first_row
+
+    def last_row(self, phone_number: str):
+        """The last CSV row carrying a normalized number, or None."""
+        code = self._code_of.get(phone_number)
+        return int(self._order[self._starts[code + 1] - 1]) + self.first_row if code is not None else None
+
+    def stats(self):
+        """
+        Returns phone column statistics.
+
+        Returns:
+            dict: {"rows", "unique": distinct numbers, "repeat_rows": rows whose number
+                   appeared on an earlier row, "empty": rows without a number}
+        """
+        empty = int(np.count_nonzero(self.codes < 0))
+        return {"rows": len(self), "unique": len(self.phones),
+                "repeat_rows": len(self) - empty - len(self.phones), "empty": empty}
@@ -0,0 +1,550 @@
+# services/pipeline.py
+
+import asyncio
+import queue
+import threading
+import time
+
+from services.defaults import DEFAULT_TRIVIAL_CALL_VALUES
+from services.http_client import (EventLoopThread, get_session, get_async_session, get_connection_stats,
+                                  reset_connection_stats)
+from services.instrumentation import metrics, usage_scope, log_event
+from services.ingest import required_columns, iter_chunks
+from services.job_journal import (JobJournal, job_fingerprint, idempotency_marker,
+                                  STAGE_EXTRACTED, STAGE_RENDERED, STAGE_POSTED, STAGE_FAILED)
+from services.leadsquared_service import (ActivityBatchPoster, get_lead_by_phone, find_activity_by_note,
+                                          lead_cache, LEADSQUARED_MAX_CONCURRENCY)
+from services.llm_service import (LLM_MAX_CONCURRENCY, LLM_BATCHING, get_batch_stats, reset_batch_stats,
+                                  get_validation_stats, reset_validation_stats)
+from services import llm_service
+from services.model_router import get_routing_stats, reset_routing_stats
+from services.phone_utils import COALESCE_SAME_LEAD, PhoneIndex
+from services.preclassifier import PRECLASSIFY, preclassify, get_preclassifier_stats, reset_preclassifier_stats
+from services.rate_limiter import get_rate_limit_stats, reset_rate_limit_stats
+from services.stages import Stage, StagedPipeline
+from services.template_renderer import compile_template
+from services.transcript_compactor import TRANSCRIPT_COMPACTION, TRANSCRIPT_TOKEN_BUDGET, compact_transcript
+
+# Shared per-row journal that lets an interrupted job resume where it stopped
+job_journal = JobJournal()
+
+
+def format_log_entry(result: dict):
+    """Formats one row result as a sync log line."""
+    icon = {"posted": "✅", "failed": "❌", "skipped": "❌", "extraction_failed": "⚠️"}[result["status"]]
+    if result.get("phone"):
+        return f"Row {result['row']} (Phone: {result['phone']}): {icon} {result['message']}"
+    return f"Row {result['row']}: {icon} {result['message']}"
+
+
+def summary_lines(stats: dict):
+    """Formats the job statistics returned by run_job as sync log lines."""
+    lines = []
+    if stats.get("stopped"):
+        processed = sum(stats[status] for status in ("posted", "failed", "skipped", "extraction_failed"))
+        lines.append(f"⏹️ Stopped early: {processed} of {stats['rows']} rows processed. "
+                     f"Run the same file again to resume.")
+    if stats.get("resumed"):
+        lines.append(f"♻️ Resumed job {stats['job_id']}: {stats['resumed']} rows were already posted by a previous run")
+    cache_stats = stats["extraction_cache"]
+    lines.append(f"🧠 Extraction cache: {cache_stats['hits']} field values reused, "
+                 f"{cache_stats['misses']} re-requested ({cache_stats['hit_rate']:.0%} hit rate)")
+    compaction = stats.get("compaction", {})
+    if compaction.get("transcripts"):
+        saved = 1 - compaction["tokens_after"] / max(compaction["tokens_before"], 1)
+        lines.append(f"✂️ Transcript compaction: {compaction['tokens_before']} -> {compaction['tokens_after']} "
+                     f"estimated tokens over {compaction['transcripts']} transcripts ({saved:.0%} saved)")
+    preclassified = stats.get("preclassified", {})
+    if any(preclassified.values()):
+        breakdown = ", ".join(f"{count} {category}" for category, count in preclassified.items() if count)
+        lines.append(f"⚡ Pre-classifier: {sum(preclassified.values())} calls answered without the LLM ({breakdown})")
+    validation = stats.get("validation", {})
+    if validation.get("rerequested") or validation.get("invalid"):
+        lines.append(f"🧪 Validation: {validation['rerequested']} field values re-requested after failing "
+                     f"type checks, {validation['invalid']} still invalid and left empty")
+    batch_stats = stats.get("batching", {})
+    if batch_stats.get("requests"):
+        lines.append(f"📦 Batched prompting: {batch_stats['rows']} short transcripts answered by "
+                     f"{batch_stats['requests']} requests, {batch_stats['retried_singly']} retried on their own")
+    for model, model_stats in stats.get("routing", {}).items():
+        if model_stats["hedged"] or model_stats["hedge_won"] or model_stats["fallback"] or model_stats["failures"]:
+            latency = f", p95 {model_stats['p95']:.2f}s" if model_stats["p95"] is not None else ""
+            lines.append(f"🔀 {model}: {model_stats['requests']} answered, {model_stats['failures']} failed, "
+                         f"{model_stats['hedged']} hedged, {model_stats['hedge_won']} hedges won, "
+                         f"{model_stats['fallback']} fallbacks{latency}")
+    phones = stats.get("phones", {})
+    if phones.get("repeat_rows") or phones.get("coalesced"):
+        lines.append(f"☎️ Phone numbers: {phones['unique']} distinct across {phones['rows']} rows, "
+                     f"{phones['repeat_rows']} repeat calls ({phones['coalesced']} coalesced), "
+                     f"{phones['empty']} rows without a number")
+    cache_stats = stats["lead_cache"]
+    lines.append(f"🗂️ Lead lookup cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    for endpoint, endpoint_stats in stats["rate_limits"].items():
+        lines.append(f"⏱️ {endpoint}: {endpoint_stats['requests']} requests, {endpoint_stats['retries']} retries, "
+                     f"{endpoint_stats['throttled']} throttled, {endpoint_stats['waited_seconds']:.1f}s waiting for quota")
+    for host, host_stats in stats["connections"].items():
+        lines.append(f"🔌 {host}: {host_stats['requests']} requests over {host_stats['connections']} connections "
+                     f"({host_stats['reused']} reused)")
+    for name, stage_stats in stats.get("stages", {}).items():
+        lines.append(f"🧵 {name} stage: {stage_stats['processed']} rows at {stage_stats['throughput']:.1f} rows/s "
+                     f"on {stage_stats['workers']} workers ({stage_stats['utilization']:.0%} busy, "
+                     f"peak queue {stage_stats['max_queue_depth']})")
+    counters = stats.get("metrics", {}).get("counters", {})
+    tokens = counters.get("llm_tokens_total", {})
+    if tokens:
+        prompt_tokens = sum(value for labels, value in tokens.items() if "kind=prompt" in labels)
+        completion_tokens = sum(value for labels, value in tokens.items() if "kind=completion" in labels)
+        cost = sum(counters.get("llm_cost_usd_total", {}).values())
+        lines.append(f"💰 LLM usage: {prompt_tokens:.0f} prompt + {completion_tokens:.0f} completion tokens, "
+                     f"~${cost:.4f} estimated cost")
+    for entry in latency_table(stats):
+        lines.append(f"⏲️ {entry['metric']}: {entry['count']} timed, p50 {entry['p50_ms']} ms, "
+                     f"p95 {entry['p95_ms']} ms, p99 {entry['p99_ms']} ms")
+    return lines
+
+
+def latency_table(stats: dict):
+    """
+    Flattens the latency histograms of a run into table rows.
+
+    Returns:
+        list: One dict per request endpoint/status and per stage, with the count
+              and p50/p95/p99 in milliseconds.
+    """
+    histograms = stats.get("metrics", {}).get("histograms", {})
+    rows = []
+    for name, prefix in (("http_request_seconds", "request"), ("stage_seconds", "stage")):
+        for labels, series in sorted(histograms.get(name, {}).items()):
+            rows.append({
+                "metric": f"{prefix} {labels.replace(',', ' ')}",
+                "count": series["count"],
+                **{f"{share}_ms": round(series[share] * 1000) for share in ("p50", "p95", "p99")},
+            })
+    return rows
+
+
+def format_stage_stats(stages: dict):
+    """Formats live per-stage stats as one status line, e.g. for a progress display."""
+    return " | ".join(
+        f"{name}: {stage_stats['processed']} done, {stage_stats['queue_depth']} queued"
+        for name, stage_stats in stages.items()
+    )
+
+
+def run_job(source, schema: list, activity_json_template: str, activity_event_code: int,
+            phone_column: str = "phoneNumber", transcript_column: str = "transcript",
+            llm_workers: int = None, lead_workers: int = None, chunk_size: int = None,
+            bulk_size: int = None, job_id: str = None, batch_short_transcripts: bool = None,
+            use_preclassifier: bool = None, trivial_call_values: dict = None,
+            compact_transcripts: bool = None, transcript_token_budget: int = None,
+            coalesce_same_lead: bool = None, results_store=None, on_row=None, on_progress=None, on_stage_stats=None, should_stop=None):
+    """
+    Runs a full job as a staged pipeline: ingest -> resolve lead -> extract -> render -> post.
+
+    This is the engine behind both the Streamlit app and cli.py. Each stage has its
+    own worker pool and a bounded input queue, so lead lookups, LLM calls and
+    activity posts for different rows overlap and the slowest stage sets the pace
+    without unbounded buffering. Leads are resolved before extraction, so rows
+    whose lead can't be found never spend LLM tokens.
+
+    Every row's progress is written to job_journal. Re-running the same job skips
+    rows that were already posted and reuses journaled extractions. Each activity
+    carries an ActivityNote marker, so a row interrupted mid-POST is checked
+    against Leadsquared before it is posted again.
+
+    All callbacks run on the calling thread, never on a stage worker.
+
+    Args:
+        source: Path or file-like object of the call-log CSV.
+        schema (list): Extraction schema (name, prompt, type per field).
+        activity_json_template (str): Activity fields JSON template with {{placeholders}}.
+        activity_event_code (int): Leadsquared ActivityEvent code.
+        phone_column (str): CSV column holding the phone number.
+        transcript_column (str): CSV column holding the transcript.
+        llm_workers (int): Extraction stage workers. Defaults to LLM_MAX_CONCURRENCY.
+        lead_workers (int): Lead resolution stage workers. Defaults to LEADSQUARED_MAX_CONCURRENCY.
+        chunk_size (int): CSV rows read per chunk. Defaults to INGEST_CHUNK_SIZE.
+        bulk_size (int): Activities per bulk create request. Defaults to LEADSQUARED_BULK_SIZE.
+        job_id (str): Journal key. Defaults to a fingerprint of the CSV, schema, extraction
+                      options and posting config.
+        batch_short_transcripts (bool): Pack short transcripts into shared extraction
+                                        requests. Defaults to LLM_BATCHING.
+        use_preclassifier (bool): Answer empty, voicemail and one-sided calls with
+                                  trivial_call_values instead of the LLM. Defaults to PRECLASSIFY.
+        trivial_call_values (dict): {category: {field name: value}} for the pre-classifier.
+                                    Defaults to DEFAULT_TRIVIAL_CALL_VALUES.
+        compact_transcripts (bool): Strip filler, timestamps and repeats from transcripts
+                                    and cap their length before extraction. Defaults to
+                                    TRANSCRIPT_COMPACTION.
+        transcript_token_budget (int): Token cap for compacted transcripts. Defaults to
+                                       TRANSCRIPT_TOKEN_BUDGET.
+        coalesce_same_lead (bool): Post one activity per phone number, from its last row
+                                   in the file; earlier rows for the number are skipped
+                                   before any lookup or extraction. Defaults to
+                                   COALESCE_SAME_LEAD.
+        results_store (ResultsStore): Optional columnar store every row's result is
+                                      appended to, for exports and aggregates.
+        on_row (callable): Called as on_row(result) for every row, where result is a dict
+                           with 'row', 'phone', 'status' ('posted', 'failed', 'skipped' or
+                           'extraction_failed'), 'message', 'extracted' and
+                           'transcript_tokens' ({'before', 'after'} estimated tokens when
+                           the transcript was compacted, else None). Rows finish out of order.
+        on_progress (callable): Called as on_progress('processing', done, total) as rows finish.
+        on_stage_stats (callable): Called about every half second with the live per-stage
+                                   stats (see StagedPipeline.stats).
+        should_stop (callable): Checked before each row is read and about every half
+                                second. Once it returns True no more rows are read,
+                                extraction requests in flight are cancelled (those rows
+                                are reported as skipped), the other rows in the pipeline
+                                finish, and the job returns with stats["stopped"] set.
+                                Re-running the job resumes from the journal.
+
+    Returns:
+        dict: Job statistics (row counts by status plus cache, rate limit, connection
+              and per-stage stats), suitable for summary_lines().
+
+    Raises:
+        ValueError: If the phone or transcript column is missing from the CSV.
+        json.JSONDecodeError: If the activity template is not valid JSON.
+    """
+    compiled_template = compile_template(activity_json_template)
+    columns = required_columns(source, phone_column, transcript_column, activity_json_template)
+    llm_workers = max(1, llm_workers or LLM_MAX_CONCURRENCY)
+    if batch_short_transcripts is None:
+        batch_short_transcripts = LLM_BATCHING
+    if use_preclassifier is None:
+        use_preclassifier = PRECLASSIFY
+    if compact_transcripts is None:
+        compact_transcripts = TRANSCRIPT_COMPACTION
+    if coalesce_same_lead is None:
+        coalesce_same_lead = COALESCE_SAME_LEAD
+    lead_workers = max(1, lead_workers or LEADSQUARED_MAX_CONCURRENCY)
+
+    metrics.reset()
+    reset_connection_stats()
+    reset_rate_limit_stats()
+    lead_cache.reset_stats()
+    llm_service.extraction_cache.reset_stats()
+    reset_batch_stats()
+    reset_validation_stats()
+    reset_routing_stats()
+    reset_preclassifier_stats()
+
+    # Size the keep-alive pools so every worker can hold its own connection
+    get_session("openrouter", pool_size=llm_workers)
+    llm_service.size_primary_pool(llm_workers)
+    get_session("leadsquared", pool_size=lead_workers + 1)
+
+    status_counts = {"posted": 0, "failed": 0, "skipped": 0, "extraction_failed": 0, "resumed": 0}
+    counts_lock = threading.Lock()
+    finished_rows = queue.Queue()  # row results handed from stage workers to the calling thread
+
+    # --- Job Journal ---
+    journaling = job_journal.enabled
+    if journaling and not job_id:
+        extraction_options = {
+            "transcript_column": transcript_column,
+            "compact_transcripts": compact_transcripts,
+            "transcript_token_budget": (transcript_token_budget or TRANSCRIPT_TOKEN_BUDGET) if compact_transcripts else None,
+            "use_preclassifier": use_preclassifier,
+            "trivial_call_values": (trivial_call_values or DEFAULT_TRIVIAL_CALL_VALUES) if use_preclassifier else None,
+        }
+        job_id = job_fingerprint(source, activity_json_template, activity_event_code, phone_column, schema,
+                                 extraction_options)
+
+    def report(row_number, phone_number, status, message, extracted=None, resumed=False, item=None):
+        with counts_lock:
+            status_counts[status] += 1
+            status_counts["resumed"] += resumed
+        item = item or {}
+        result = {"row": row_number, "phone": phone_number, "status": status, "message": message,
+                  "extracted": extracted, "transcript_tokens": item.get("transcript_tokens"),
+                  "timings": item.get("timings"), "llm_usage": item.get("llm_usage")}
+        metrics.inc("rows_total", status=status)
+        log_event("row", **result)
+        finished_rows.put(result)
+
+    # A pre-pass over just the phone column normalizes every number at once, sizes
+    # the progress bar and finds rows calling the same number
+    phone_index = PhoneIndex.build(
+        chunk[phone_column] for _, chunk in iter_chunks(source, [phone_column], chunk_size)
+    )
+    total_rows = len(phone_index)
+    coalesced = 0
+
+    # --- Lead Resolution Stage ---
+    # Concurrent rows with the same phone share a lock, so the second waits for
+    # the first lookup and is then answered from lead_cache.
+    lookup_locks = [threading.Lock() for _ in range(64)]
+
+    def resolve_lead(item):
+        phone_number = phone_index.phone(item["row"])
+        if not phone_number:
+            report(item["row"], None, "skipped", "Missing phone number. Cannot post activity.", item=item)
+            return None
+        with lookup_locks[hash(phone_number) % len(lookup_locks)]:
+            lead_id, lead_message = get_lead_by_phone(phone_number)
+        if not lead_id:
+            report(item["row"], phone_number, "skipped", lead_message, item=item)
+            return None
+        item["phone"], item["lead_id"] = phone_number, lead_id
+
+        journaled = item["journaled"]
+        if journaled.get("stage") == STAGE_RENDERED:
+            # The previous run stopped while this activity was being sent. Only
+            # post it again if Leadsquared confirms it doesn't exist.
+            found, activity_id, message = find_activity_by_note(
+                lead_id, activity_event_code, idempotency_marker(job_id, item["row"]))
+            if found:
+                job_journal.record(job_id, item["row"], STAGE_POSTED, activity_id=activity_id)
+                report(item["row"], phone_number, "posted",
+                       f"Posted by the interrupted run (ActivityId: {activity_id}).",
+                       journaled["extracted"], resumed=True, item=item)
+                return None
+            if found is None:
+                report(item["row"], phone_number, "failed",
+                       f"Could not confirm whether the interrupted run posted this activity, "
+                       f"so it was not posted again. {message}", item=item)
+                return None
+        return item
+
+    # --- AI Extraction Stage ---
+    # Only rows with a non-empty, non-trivial transcript and no journaled extraction are sent to the LLM.
+    # With batching on, short transcripts are held until they fill one batched request.
+    # Single-row extractions run on one event loop shared by the extract workers, so
+    # stopping the job cancels the requests in flight instead of waiting for them.
+    stopped = threading.Event()
+    llm_loop = EventLoopThread(cancel_event=stopped, name="llm-loop")
+
+    async def size_llm_pool():
+        get_async_session("openrouter", pool_size=llm_workers)
+    llm_loop.run(size_llm_pool())
+    batcher = llm_service.TranscriptBatcher() if batch_short_transcripts else None
+    compaction_stats = {"transcripts": 0, "tokens_before": 0, "tokens_after": 0}
+
+    def finish_extraction(item, extracted_data):
+        if not extracted_data:
+            report(item["row"], item["phone"], "extraction_failed", "AI extraction failed. Skipping activity post.",
+                   item=item)
+            return None
+        if journaling:
+            job_journal.record(job_id, item["row"], STAGE_EXTRACTED, phone=item["phone"],
+                               lead_id=item["lead_id"], extracted=extracted_data)
+        item["extracted"] = extracted_data
+        return item
+
+    def extract_held(batch):
+        with usage_scope() as usage:
+            try:
+                results = llm_service.extract_batch([transcript for _, transcript in batch], schema)
+            except Exception as e:
+                print(f"Unexpected error in batched extraction: {e}")
+                results = [None] * len(batch)
+        extracted_items = []
+        for (item, _), extracted_data in zip(batch, results):
+            # A batched request's usage is shared evenly by the rows it answered
+            item["llm_usage"] = {key: value / len(batch) for key, value in usage.items()}
+            item = finish_extraction(item, extracted_data)
+            if item is not None:
+                extracted_items.append(item)
+        return extracted_items
+
+    def extract(item):
+        extracted_data = item["journaled"].get("extracted")
+        transcript = item["values"].get(transcript_column, "")
+        if extracted_data is None and compact_transcripts and transcript.strip():
+            # Only the LLM input is compacted; the posted {{transcript}} stays as uploaded
+            transcript, tokens_before, tokens_after = compact_transcript(transcript, transcript_token_budget)
+            item["transcript_tokens"] = {"before": tokens_before, "after": tokens_after}
+            with counts_lock:
+                compaction_stats["transcripts"] += 1
+                compaction_stats["tokens_before"] += tokens_before
+                compaction_stats["tokens_after"] += tokens_after
+        if extracted_data is None and use_preclassifier:
+            # Empty, voicemail and one-sided calls get deterministic defaults without an LLM call
+            extracted_data = preclassify(transcript, schema, trivial_call_values)
+            if extracted_data is not None:
+                return finish_extraction(item, extracted_data)
+        if extracted_data is not None or not transcript.strip():
+            item["extracted"] = extracted_data
+            return item
+        if batcher and llm_service.is_batchable(transcript):
+            batch = batcher.add(item, transcript)
+            return extract_held(batch) if batch else None
+        with usage_scope() as usage:
+            try:
+                extracted_data = llm_loop.run(llm_service.extract_from_transcript_async(transcript, schema))
+            except asyncio.CancelledError:
+                report(item["row"], item["phone"], "skipped",
+                       "Job stopped before this row was extracted; it runs again when the job is resumed.",
+                       item=item)
+                return None
+        item["llm_usage"] = usage
+        return finish_extraction(item, extracted_data)
+
+    # --- Payload Generation Stage ---
+    def render(item):
+        if item["extracted"]:
+            # Merge extracted data into the row for placeholder replacement
+            item["values"].update(item["extracted"])
+        activity_payload = {
+            "ActivityEvent": activity_event_code,
+            "Fields": compiled_template.render(item["values"])
+        }
+        if journaling:
+            activity_payload["ActivityNote"] = idempotency_marker(job_id, item["row"])
+            # Journal the intent to post before anything is sent
+            job_journal.record(job_id, item["row"], STAGE_RENDERED, phone=item["phone"], lead_id=item["lead_id"])
+        item["payload"] = activity_payload
+        del item["values"]
+        return item
+
+    # --- Activity Posting Stage (buffered into bulk create requests) ---
+    def on_activity_posted(item, success, message, activity_id):
+        if journaling:
+            if success is None:
+                # The activity may exist: the row stays rendered, so a resumed run checks
+                # its marker against Leadsquared before posting it again
+                job_journal.record(job_id, item["row"], STAGE_RENDERED, message=message)
+                message = f"{message} Resuming the job checks for it before posting again."
+            else:
+                job_journal.record(job_id, item["row"], STAGE_POSTED if success else STAGE_FAILED,
+                                   activity_id=activity_id, message=message)
+        # Time from entering the post stage, including waiting for the bulk chunk to fill
+        item["timings"]["post"] = round(time.monotonic() - item["stage_started"], 4)
+        report(item["row"], item["phone"], "posted" if success else "failed", message, item["extracted"], item=item)
+
+    poster_options = {"chunk_size": bulk_size} if bulk_size else {}
+    poster = ActivityBatchPoster(on_result=on_activity_posted, **poster_options)
+
+    def post(item):
+        poster.add(item, item["lead_id"], item["payload"], item["phone"])
+        return None
+
+    def on_stage_error(stage_name, item, error):
+        print(f"Unexpected error in {stage_name} stage: {error}")
+        if item is not None:
+            report(item["row"], item.get("phone"), "failed", f"Unexpected error in {stage_name} stage: {error}",
+                   item=item)
+
+    # --- Per-Row Timings ---
+    # Each row records the seconds it spent in every stage, from entering the stage
+    # until it is forwarded, so rows held for a batch are charged their wait.
+    def stamp(stage_name, result):
+        now = time.monotonic()
+        for item in result if isinstance(result, list) else [result] if result is not None else []:
+            item["timings"][stage_name] = round(now - item["stage_started"], 4)
+        return result
+
+    def timed(stage_name, func):
+        def run(item):
+            item["stage_started"] = time.monotonic()
+            return stamp(stage_name, func(item))
+        return run
+
+    pipeline = StagedPipeline([
+        Stage("resolve", timed("resolve", resolve_lead), workers=lead_workers),
+        Stage("extract", timed("extract", extract), workers=llm_workers,
+              on_close=(lambda: stamp("extract", extract_held(batcher.drain()))) if batcher else None),
+        Stage("render", timed("render", render), workers=1),
+        # A single poster thread owns the bulk buffer; the final partial chunk is flushed on close
+        Stage("post", timed("post", post), workers=1, on_close=poster.flush),
+    ], on_error=on_stage_error)
+
+    # --- Ingest Stage ---
+    # The CSV is read one chunk at a time; a full resolve queue pauses reading, so
+    # memory stays bounded by the queue sizes rather than the file size.
+    ingest_errors = []
+
+    def ingest():
+        nonlocal coalesced
+        try:
+            for first_row_number, chunk in iter_chunks(source, columns, chunk_size):
+                if stopped.is_set():
+                    break
+                journaled = job_journal.get_rows(job_id, first_row_number, first_row_number + len(chunk) - 1) \
+                    if journaling else {}
+                for offset, values in enumerate(chunk.to_dict("records")):
+                    if stopped.is_set() or (should_stop and should_stop()):
+                        stopped.set()
+                        break
+                    row_number = first_row_number + offset
+                    entry = journaled.get(row_number, {})
+                    if entry.get("stage") == STAGE_POSTED:
+                        report(row_number, entry["phone"], "posted",
+                               f"Already posted in a previous run (ActivityId: {entry['activity_id']}).",
+                               entry["extracted"], resumed=True)
+                        continue
+                    if coalesce_same_lead:
+                        phone_number = phone_index.phone(row_number)
+                        last_row = phone_index.last_row(phone_number) if phone_number else row_number
+                        if last_row != row_number:
+                            coalesced += 1
+                            report(row_number, phone_number, "skipped",
+                                   f"Coalesced: row {last_row} posts the activity for this number.")
+                            continue
+                    pipeline.put({"row": row_number, "values": values, "journaled": entry,
+                                  "phone": None, "lead_id": None, "extracted": None, "timings": {}})
+        except Exception as e:
+            ingest_errors.append(e)
+        finally:
+            pipeline.close()
+
+    pipeline.start()
+    ingest_thread = threading.Thread(target=ingest, name="ingest", daemon=True)
+    ingest_thread.start()
+
+    rows_done = 0
+
+    def deliver_finished_rows():
+        nonlocal rows_done
+        delivered = False
+        while True:
+            try:
+                result = finished_rows.get_nowait()
+            except queue.Empty:
+                break
+            rows_done += 1
+            delivered = True
+            if results_store is not None:
+                results_store.append(result)
+            if on_row:
+                on_row(result)
+        if delivered and on_progress:
+            on_progress("processing", rows_done, total_rows)
+
+    finished = False
+    try:
+        while not finished:
+            # Stage workers only exit after ingest has closed the pipeline and every queue has drained
+            finished = pipeline.join(timeout=0.5)
+            if should_stop and not stopped.is_set() and should_stop():
+                # Also checked here, since ingest may be blocked on a full queue
+                stopped.set()
+            deliver_finished_rows()
+            if on_stage_stats:
+                on_stage_stats(pipeline.stats())
+    finally:
+        llm_loop.close()
+
+    if ingest_errors:
+        raise ingest_errors[0]
+
+    return {
+        "job_id": job_id,
+        "rows": total_rows,
+        "stopped": stopped.is_set(),
+        **status_counts,
+        "extraction_cache": llm_service.extraction_cache.stats(),
+        "batching": get_batch_stats(),
+        "validation": get_validation_stats(),
+        "routing": get_routing_stats(),
+        "phones": {**phone_index.stats(), "coalesced": coalesced},
+        "preclassified": get_preclassifier_stats(),
+        "compaction": compaction_stats,
+        "lead_cache": lead_cache.stats(),
+        "rate_limits": get_rate_limit_stats(),
+        "connections": get_connection_stats(),
+        "stages": pipeline.stats(),
+        "metrics": metrics.summary(),
+    }
@@ -0,0 +1,109 @@
+# services/preclassifier.py
+
+import os
+import re
+import threading
+
+from dotenv import load_dotenv
+
+from services.defaults import DEFAULT_TRIVIAL_CALL_VALUES
+
+# Load environment variables
+load_dotenv()
+
+# Classify trivial transcripts locally instead of sending them to the LLM (opt-in: its
+# fixed values are posted to the CRM without an extraction)
+PRECLASSIFY = os.getenv("PRECLASSIFY", "false").lower() in ("1", "true", "yes")
+# Transcripts with fewer words than this are treated as empty
+PRECLASSIFY_MIN_WORDS = int(os.getenv("PRECLASSIFY_MIN_WORDS", "4"))
+# Voicemail and one-sided calls longer than this always go to the LLM
+PRECLASSIFY_MAX_WORDS = int(os.getenv("PRECLASSIFY_MAX_WORDS", "60"))
+
+# Voicemail greetings and the carrier / IVR messages played for unreachable numbers
+_VOICEMAIL_PATTERNS = re.compile(
+    r"voice ?mail|mail ?box|leave (?:a|your) (?:message|name)|after the (?:tone|beep)|at the (?:tone|beep)"
+    r"|record your message|not reachable|switched off|out of (?:coverage|service)"
+    r"|(?:number|subscriber|person) you (?:have )?(?:dialled|dialed|called|are calling|are trying)"
+    r"|(?:number|subscriber) (?:is|is currently) (?:not available|unavailable|busy)"
+    r"|please try again later",
+    re.IGNORECASE
+)
+# "Agent: ..." style speaker labels, at the start of a line or mid-line after
+# whitespace (single-line transcripts run every turn together)
+_SPEAKER_LABEL = re.compile(r"(?:^|(?<=\s))\[?([A-Za-z][A-Za-z'_-]{0,30})\]?\s*:(?!\d)", re.MULTILINE)
+
+CATEGORIES = ("empty", "voicemail", "no_response")
+
+_stats_lock = threading.Lock()
+_stats = {category: 0 for category in CATEGORIES}
+
+
+def classify_transcript(transcript: str):
+    """
+    Recognises trivial calls from transcript length, speaker turns and voicemail phrases.
+
+    Any transcript where two sides speak goes to the LLM, however short, and one
+    with a speaker turn is never treated as empty.
+
+    Returns:
+        str: 'empty' for (nearly) blank transcripts without a speaker turn, 'voicemail'
+             for short voicemail greetings and network/IVR messages, 'no_response' for
+             short calls where one side spoke repeatedly and nobody answered, or None
+             if the call needs the LLM.
+    """
+    text = transcript if isinstance(transcript, str) else ""
+    words = len(text.split())
+    turns = [label.strip().lower() for label in _SPEAKER_LABEL.findall(text)]
+    speakers = set(turns)
+    if words < PRECLASSIFY_MIN_WORDS and not turns:
+        return "empty"
+    if words > PRECLASSIFY_MAX_WORDS or len(speakers) > 1:
+        return None
+
+    if _VOICEMAIL_PATTERNS.search(text):
+        return "voicemail"
+
+    # A single turn ("Customer: Not interested.") may well be an answer
+    if len(speakers) == 1 and len(turns) > 1:
+        return "no_response"
+    return None
+
+
+def preclassify(transcript: str, schema: list, trivial_call_values: dict = None):
+    """
+    Answers a trivial transcript's schema fields with configured defaults, skipping the LLM.
+
+    Args:
+        transcript (str): The call transcript text.
+        schema (list): The extraction schema; every field gets a value.
+        trivial_call_values (dict): {category: {field name: value}}. Fields not listed
+                                    for the category are left empty. Categories not
+                                    listed always go to the LLM. Defaults to
+                                    DEFAULT_TRIVIAL_CALL_VALUES.
+
+    Returns:
+        dict: Extracted values for every schema field, or None if the transcript
+              needs a real extraction.
+    """
+    if trivial_call_values is None:
+        trivial_call_values = DEFAULT_TRIVIAL_CALL_VALUES
+
+    category = classify_transcript(transcript)
+    if category is None or category not in trivial_call_values:
+        return None
+
+    with _stats_lock:
+        _stats[category] += 1
+    values = trivial_call_values[category]
+    return {item["name"]: values.get(item["name"], "") for item in schema}
+
+
+def get_preclassifier_stats():
+    """Returns {category: calls answered without the LLM} since the last reset."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_preclassifier_stats():
+    with _stats_lock:
+        _stats.update({category: 0 for category in CATEGORIES})
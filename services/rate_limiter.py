@@ -0,0 +1,277 @@
+# services/rate_limiter.py
+
+import asyncio
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import aiohttp
+import requests
+from dotenv import load_dotenv
+
+from services.instrumentation import metrics, log_event
+
+# Load environment variables
+load_dotenv()
+
+# Requests per second allowed for each endpoint budget
+ENDPOINT_RATES = {
+    "leadsquared_lookup": float(os.getenv("LEADSQUARED_LOOKUP_RATE", "5")),
+    "leadsquared_activity": float(os.getenv("LEADSQUARED_ACTIVITY_RATE", "5")),
+    "openrouter": float(os.getenv("OPENROUTER_RATE", "50")),
+}
+
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "4"))
+BACKOFF_BASE = float(os.getenv("BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("BACKOFF_MAX", "30"))
+
+# Statuses worth retrying. Calls that are not safe to repeat (activity creation)
+# only retry the statuses where the server rejected the request before acting on it.
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+NON_IDEMPOTENT_RETRY_STATUS_CODES = {429, 503}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Callers only wait when the bucket is empty.
+
+    The refill rate adapts: throttle() halves it (at most once per second, so a burst
+    of concurrent 429s counts as one signal) and every success() recovers 5% of the
+    configured rate until it is back at the ceiling.
+    """
+
+    def __init__(self, rate: float, burst: float = None, min_rate: float = None):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate or max(rate / 20, 0.1)
+        self.burst = burst or max(rate, 1)
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+        self._last_throttle = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Takes one token, sleeping until it is available."""
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self):
+        """Like acquire, but waits without blocking the event loop."""
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+    def reserve(self):
+        """Takes one token and returns the seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            # Reserve the token now, even if the balance goes negative, so waiting
+            # callers are served in order without holding the lock while they sleep.
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0
+
+    def throttle(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_throttle >= 1:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self._last_throttle = now
+
+    def success(self):
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+
+_lock = threading.Lock()
+_limiters = {}
+_stats = {}
+
+
+def get_limiter(endpoint: str):
+    """Returns the shared TokenBucket for an endpoint budget, creating it on first use."""
+    with _lock:
+        if endpoint not in _limiters:
+            _limiters[endpoint] = TokenBucket(ENDPOINT_RATES.get(endpoint, 10))
+        return _limiters[endpoint]
+
+
+def _record(endpoint: str, key: str, amount: float = 1):
+    with _lock:
+        endpoint_stats = _stats.setdefault(
+            endpoint, {"requests": 0, "retries": 0, "throttled": 0, "waited_seconds": 0.0}
+        )
+        endpoint_stats[key] += amount
+    metrics.inc(f"http_{key}_total", amount, endpoint=endpoint)
+
+
+def _observe_attempt(endpoint: str, status, started: float, attempt: int, error: str = None):
+    seconds = time.monotonic() - started
+    metrics.observe("http_request_seconds", seconds, endpoint=endpoint, status=status)
+    log_event("request", endpoint=endpoint, status=status, seconds=round(seconds, 4), attempt=attempt, error=error)
+
+
+def get_rate_limit_stats():
+    """
+    Returns per-endpoint counters.
+
+    Returns:
+        dict: {endpoint: {"requests", "retries", "throttled", "waited_seconds", "current_rate"}}
+    """
+    with _lock:
+        return {
+            endpoint: {**counts, "current_rate": _limiters[endpoint].rate if endpoint in _limiters else None}
+            for endpoint, counts in _stats.items()
+        }
+
+
+def reset_rate_limit_stats():
+    with _lock:
+        _stats.clear()
+
+
+def _retry_after_seconds(response):
+    """Parses a Retry-After header given either in seconds or as an HTTP date."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_seconds(attempt: int):
+    # Exponential backoff with full jitter
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def send_with_retry(endpoint: str, send, idempotent: bool = True, max_retries: int = None):
+    """
+    Sends a request under an endpoint's rate budget, retrying throttled and failed attempts.
+
+    Retries use exponential backoff with jitter, or the server's Retry-After when given.
+    A 429 also halves the endpoint's rate until successes bring it back up.
+
+    Args:
+        endpoint (str): Budget name, e.g. "leadsquared_lookup" or "openrouter".
+        send (callable): Zero-argument function performing the request and returning
+                         a requests.Response.
+        idempotent (bool): Whether repeating the request is harmless. Non-idempotent
+                           calls are only retried when the server rejected the attempt
+                           (429/503) or the connection was never established.
+        max_retries (int): Defaults to HTTP_MAX_RETRIES.
+
+    Returns:
+        requests.Response: The final response, which may still carry an error status.
+
+    Raises:
+        requests.exceptions.RequestException: If the last attempt fails at the network level.
+    """
+    limiter = get_limiter(endpoint)
+    max_retries = HTTP_MAX_RETRIES if max_retries is None else max_retries
+    retry_statuses = RETRY_STATUS_CODES if idempotent else NON_IDEMPOTENT_RETRY_STATUS_CODES
+    retryable_errors = (requests.exceptions.ConnectionError, requests.exceptions.Timeout) \
+        if idempotent else (requests.exceptions.ConnectTimeout,)
+
+    for attempt in range(max_retries + 1):
+        _record(endpoint, "waited_seconds", limiter.acquire())
+        _record(endpoint, "requests")
+        started = time.monotonic()
+        try:
+            response = send()
+        except retryable_errors as e:
+            _observe_attempt(endpoint, "error", started, attempt, type(e).__name__)
+            if attempt == max_retries:
+                raise
+            _record(endpoint, "retries")
+            time.sleep(_backoff_seconds(attempt))
+            continue
+        except requests.exceptions.RequestException as e:
+            _observe_attempt(endpoint, "error", started, attempt, type(e).__name__)
+            raise
+        _observe_attempt(endpoint, response.status_code, started, attempt)
+
+        delay = _retry_delay(endpoint, limiter, response, attempt, max_retries, retry_statuses)
+        if delay is None:
+            return response
+        time.sleep(delay)
+
+    return response
+
+
+async def send_with_retry_async(endpoint: str, send, idempotent: bool = True, max_retries: int = None):
+    """
+    Async counterpart of send_with_retry, sharing its endpoint budgets, retry policy and stats.
+
+    Args:
+        send (callable): Zero-argument coroutine function performing the request and
+                         returning a response with status_code and headers, e.g.
+                         http_client.request_async.
+
+    Raises:
+        aiohttp.ClientError, asyncio.TimeoutError: If the last attempt fails at the network level.
+        asyncio.CancelledError: If the calling task is cancelled; an in-flight request
+                                or backoff sleep is abandoned immediately.
+    """
+    limiter = get_limiter(endpoint)
+    max_retries = HTTP_MAX_RETRIES if max_retries is None else max_retries
+    retry_statuses = RETRY_STATUS_CODES if idempotent else NON_IDEMPOTENT_RETRY_STATUS_CODES
+    retryable_errors = (aiohttp.ClientConnectionError, asyncio.TimeoutError) \
+        if idempotent else (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError)
+
+    for attempt in range(max_retries + 1):
+        _record(endpoint, "waited_seconds", await limiter.acquire_async())
+        _record(endpoint, "requests")
+        started = time.monotonic()
+        try:
+            response = await send()
+        except retryable_errors as e:
+            _observe_attempt(endpoint, "error", started, attempt, type(e).__name__)
+            if attempt == max_retries:
+                raise
+            _record(endpoint, "retries")
+            await asyncio.sleep(_backoff_seconds(attempt))
+            continue
+        except aiohttp.ClientError as e:
+            _observe_attempt(endpoint, "error", started, attempt, type(e).__name__)
+            raise
+        _observe_attempt(endpoint, response.status_code, started, attempt)
+
+        delay = _retry_delay(endpoint, limiter, response, attempt, max_retries, retry_statuses)
+        if delay is None:
+            return response
+        await asyncio.sleep(delay)
+
+    return response
+
+
+def _retry_delay(endpoint: str, limiter: TokenBucket, response, attempt: int, max_retries: int,
+                 retry_statuses: set):
+    """Returns the seconds to wait before retrying a response, or None if it is final."""
+    if response.status_code not in retry_statuses:
+        if response.status_code < 400:
+            limiter.success()
+        return None
+
+    if response.status_code == 429:
+        limiter.throttle()
+        _record(endpoint, "throttled")
+    if attempt == max_retries:
+        return None
+
+    _record(endpoint, "retries")
+    delay = _retry_after_seconds(response)
+    return min(delay, BACKOFF_MAX) if delay is not None else _backoff_seconds(attempt)
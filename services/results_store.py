@@ -0,0 +1,345 @@
+# services/results_store.py
+
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+# Parquet export is optional; everything else works with NumPy and pandas alone
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Load environment variables
+load_dotenv()
+
+# Rows per column chunk (and per Parquet row group)
+RESULTS_CHUNK_SIZE = int(os.getenv("RESULTS_CHUNK_SIZE", "10000"))
+
+ROW_STATUSES = ["posted", "failed", "skipped", "extraction_failed"]
+
+# Column kinds and the NumPy dtype each is stored as. "int" columns carry a separate
+# validity mask, "float" columns use NaN and "category" columns code -1 for missing values.
+_DTYPES = {"int": np.int64, "float": np.float64, "category": np.int32, "string": object}
+
+# Columns every store has, ahead of the schema's fields
+_ROW_COLUMNS = [
+    ("row", "int", None),
+    ("phone", "string", None),
+    ("status", "category", ROW_STATUSES),
+    ("message", "string", None),
+    ("seconds", "float", None),
+    ("llm_cost_usd", "float", None),
+]
+
+
+def _field_kind(item: dict):
+    if item.get("type") == "integer":
+        return "int"
+    if item.get("type") == "float":
+        return "float"
+    return "category" if item.get("enum") else "string"
+
+
+class _Column:
+    def __init__(self, name: str, kind: str, categories: list = None):
+        self.name = name
+        self.kind = kind
+        self.categories = list(categories or [])
+        self._codes = {value: code for code, value in enumerate(self.categories)}
+
+    def empty(self, size: int):
+        values = np.empty(size, dtype=_DTYPES[self.kind])
+        return (values, np.zeros(size, dtype=bool)) if self.kind == "int" else (values, None)
+
+    def put(self, values, mask, index: int, value):
+        if self.kind == "int":
+            try:
+                values[index] = int(value)
+                mask[index] = value is not None and not isinstance(value, bool)
+            except (TypeError, ValueError, OverflowError):
+                mask[index] = False
+        elif self.kind == "float":
+            try:
+                values[index] = np.nan if value is None or isinstance(value, bool) else float(value)
+            except (TypeError, ValueError):
+                values[index] = np.nan
+        elif self.kind == "category":
+            if value is None or value == "":
+                values[index] = -1
+                return
+            code = self._codes.get(value)
+            if code is None:
+                # Values outside the enum (e.g. from an older schema) get a category of their own
+                code = self._codes[value] = len(self.categories)
+                self.categories.append(value)
+            values[index] = code
+        else:
+            values[index] = None if value is None else str(value)
+
+    def to_pandas(self, values, mask):
+        if self.kind == "int":
+            return pd.arrays.IntegerArray(values, ~mask)
+        if self.kind == "category":
+            return pd.Categorical.from_codes(values, categories=self.categories)
+        return values
+
+    def to_arrow(self, values, mask):
+        if self.kind == "int":
+            return pa.array(values, mask=~mask, type=pa.int64())
+        if self.kind == "float":
+            return pa.array(values, from_pandas=True, type=pa.float64())
+        if self.kind == "category":
+            return pa.DictionaryArray.from_arrays(pa.array(values, mask=values < 0),
+                                                  pa.array(self.categories, type=pa.string()))
+        return pa.array(values, type=pa.string())
+
+
+class ResultsStore:
+    """
+    Columnar store of a job's per-row results: status, message, timing and cost,
+    plus one typed column per extraction schema field.
+
+    Integer and float fields are kept as NumPy int64/float64 columns, enum fields
+    as int32 category codes and free-text fields as object columns. Rows are
+    written into preallocated chunks of chunk_size rows, so appending never copies
+    earlier rows and a 100k-row job holds a few dozen arrays instead of 100k dicts.
+    Aggregates (value_counts, mean, summary) run on whole columns at once.
+
+    Usage:
+        store = ResultsStore(schema)
+        run_job(..., results_store=store)
+        store.summary()             # {'rows', 'counts', 'means'}
+        store.to_csv("enriched.csv")
+        store.save("results.npz")   # reload later with ResultsStore.load()
+    """
+
+    def __init__(self, schema: list = None, chunk_size: int = None):
+        reserved = {name for name, _, _ in _ROW_COLUMNS}
+        columns = [_Column(name, kind, categories) for name, kind, categories in _ROW_COLUMNS]
+        self.fields = {}
+        for item in schema or []:
+            # A field named like a row column keeps its values under a suffixed column name
+            column_name = f"{item['name']}_extracted" if item["name"] in reserved else item["name"]
+            self.fields[item["name"]] = column_name
+            columns.append(_Column(column_name, _field_kind(item), item.get("enum")))
+        self._init_columns(columns, chunk_size)
+
+    def _init_columns(self, columns: list, chunk_size: int = None):
+        self.chunk_size = max(1, chunk_size or RESULTS_CHUNK_SIZE)
+        self.columns = {column.name: column for column in columns}
+        self._lock = threading.Lock()
+        self._chunks = []  # sealed chunks: {name: (values, mask)}
+        self._current = None
+        self._fill = 0
+        self._rows = 0
+        self._combined = None
+
+    def __len__(self):
+        return self._rows
+
+    def append(self, result: dict):
+        """Adds one row result, as passed to run_job's on_row callback."""
+        extracted = result.get("extracted") or {}
+        timings = result.get("timings") or {}
+        usage = result.get("llm_usage") or {}
+        row_values = {
+            "row": result.get("row"),
+            "phone": result.get("phone"),
+            "status": result.get("status"),
+            "message": result.get("message"),
+            "seconds": sum(timings.values()) if timings else None,
+            "llm_cost_usd": usage.get("cost_usd"),
+            **{column_name: extracted.get(name) for name, column_name in self.fields.items()},
+        }
+        with self._lock:
+            if self._current is None:
+                self._current = {name: column.empty(self.chunk_size) for name, column in self.columns.items()}
+            for name, column in self.columns.items():
+                values, mask = self._current[name]
+                column.put(values, mask, self._fill, row_values[name])
+            self._fill += 1
+            self._rows += 1
+            self._combined = None
+            if self._fill == self.chunk_size:
+                self._chunks.append(self._current)
+                self._current, self._fill = None, 0
+
+    def extend(self, results):
+        for result in results:
+            self.append(result)
+
+    def _iter_chunks(self):
+        """Returns [{name: (values, mask)}] per chunk, with the unfilled tail of the current one trimmed."""
+        with self._lock:
+            chunks = list(self._chunks)
+            if self._fill:
+                chunks.append({name: (values[:self._fill], None if mask is None else mask[:self._fill])
+                               for name, (values, mask) in self._current.items()})
+        return chunks
+
+    def _column(self, name: str):
+        """Returns (values, mask) for a whole column, concatenated once per change."""
+        combined = self._combined
+        if combined is None:
+            chunks = self._iter_chunks()
+            combined = {}
+            for column_name, column in self.columns.items():
+                if not chunks:
+                    combined[column_name] = column.empty(0)
+                    continue
+                values = np.concatenate([chunk[column_name][0] for chunk in chunks])
+                masks = [chunk[column_name][1] for chunk in chunks]
+                combined[column_name] = (values, None if masks[0] is None else np.concatenate(masks))
+            self._combined = combined
+        return combined[self.fields.get(name, name)]
+
+    # --- Aggregates ---
+
+    def value_counts(self, name: str):
+        """Returns {value: rows} for a category or string column, most common first."""
+        column = self.columns[self.fields.get(name, name)]
+        values, _ = self._column(name)
+        if column.kind == "category":
+            counts = np.bincount(values[values >= 0], minlength=len(column.categories))
+            order = np.argsort(-counts, kind="stable")
+            return {column.categories[code]: int(counts[code]) for code in order if counts[code]}
+        return {value: int(count) for value, count in pd.Series(values).value_counts().items()}
+
+    def mean(self, name: str):
+        """Returns the mean of a numeric column over rows that have a value, or None."""
+        column = self.columns[self.fields.get(name, name)]
+        values, mask = self._column(name)
+        if column.kind == "int":
+            values = values[mask]
+        elif column.kind == "float":
+            values = values[~np.isnan(values)]
+        else:
+            raise ValueError(f"Column '{name}' is not numeric.")
+        return float(values.mean()) if len(values) else None
+
+    def summary(self):
+        """
+        Returns aggregate views of the job's results.
+
+        Returns:
+            dict: {"rows": row count,
+                   "counts": {column: {value: rows}} for status and every enum field,
+                   "means": {field: mean} for every integer and float field}
+        """
+        return {
+            "rows": len(self),
+            "counts": {name: self.value_counts(name) for name, column in self.columns.items()
+                       if column.kind == "category"},
+            "means": {field: self.mean(field) for field, name in self.fields.items()
+                      if self.columns[name].kind in ("int", "float")},
+        }
+
+    # --- Export ---
+
+    def _row_order(self):
+        # Rows finish out of order; exports follow the CSV instead
+        return np.argsort(self._column("row")[0], kind="stable")
+
+    def _ordered_blocks(self):
+        """Yields {name: (values, mask)} blocks of up to chunk_size rows, in CSV row order."""
+        order = self._row_order()
+        columns = {name: self._column(name) for name in self.columns}
+        for start in range(0, len(order), self.chunk_size):
+            index = order[start:start + self.chunk_size]
+            yield {name: (values[index], None if mask is None else mask[index])
+                   for name, (values, mask) in columns.items()}
+
+    def _frame(self, block: dict):
+        return pd.DataFrame({name: column.to_pandas(*block[name]) for name, column in self.columns.items()})
+
+    def to_pandas(self):
+        """Returns the results in CSV row order as one DataFrame with nullable integer and categorical columns."""
+        order = self._row_order()
+        return self._frame({name: (values[order], None if mask is None else mask[order])
+                            for name, (values, mask) in ((name, self._column(name)) for name in self.columns)})
+
+    def to_csv(self, path_or_buffer):
+        """Writes the results as CSV in row order, one chunk at a time."""
+        written = False
+        for block in self._ordered_blocks():
+            self._frame(block).to_csv(path_or_buffer, index=False, header=not written, mode="a" if written else "w")
+            written = True
+        if not written:
+            pd.DataFrame(columns=list(self.columns)).to_csv(path_or_buffer, index=False)
+
+    def to_parquet(self, path):
+        """
+        Writes the results as Parquet (to a path or binary file object) in row order,
+        one row group per chunk.
+
+        Raises:
+            ImportError: If pyarrow is not installed.
+        """
+        if pa is None:
+            raise ImportError("Parquet export needs pyarrow (pip install pyarrow).")
+        fields = [(name, column.to_arrow(*column.empty(0)).type) for name, column in self.columns.items()]
+        writer = pq.ParquetWriter(path, pa.schema(fields))
+        try:
+            for block in self._ordered_blocks():
+                writer.write_table(pa.table({name: column.to_arrow(*block[name])
+                                             for name, column in self.columns.items()}))
+        finally:
+            writer.close()
+
+    # --- Persistence ---
+
+    def save(self, path: str):
+        """
+        Saves the store to a NumPy .npz file that load() reads back without
+        re-parsing anything. Text columns are stored as UTF-8 bytes plus offsets.
+        """
+        arrays = {}
+        for name, column in self.columns.items():
+            values, mask = self._column(name)
+            if column.kind == "string":
+                encoded = [b"" if value is None else value.encode("utf-8") for value in values]
+                arrays[f"{name}.data"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+                arrays[f"{name}.offsets"] = np.cumsum([0] + [len(value) for value in encoded], dtype=np.int64)
+                arrays[f"{name}.null"] = np.array([value is None for value in values], dtype=bool)
+            else:
+                arrays[f"{name}.values"] = values
+                if mask is not None:
+                    arrays[f"{name}.mask"] = mask
+        meta = {"fields": self.fields,
+                "columns": [[name, column.kind, column.categories] for name, column in self.columns.items()]}
+        arrays["meta"] = np.array(json.dumps(meta))
+        # Written to a temporary file and renamed, so readers never load half a file
+        temporary = f"{path}.tmp.npz"
+        np.savez(temporary, **arrays)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str, chunk_size: int = None):
+        """Loads a store written by save(). Rows appended afterwards go into new chunks."""
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            store = cls.__new__(cls)
+            store.fields = meta["fields"]
+            store._init_columns([_Column(name, kind, categories) for name, kind, categories in meta["columns"]],
+                                chunk_size)
+            chunk = {}
+            for name, column in store.columns.items():
+                if column.kind == "string":
+                    raw, offsets, null = data[f"{name}.data"].tobytes(), data[f"{name}.offsets"], data[f"{name}.null"]
+                    values = np.empty(len(null), dtype=object)
+                    values[:] = [None if null[i] else raw[offsets[i]:offsets[i + 1]].decode("utf-8")
+                                 for i in range(len(null))]
+                    chunk[name] = (values, None)
+                else:
+                    chunk[name] = (data[f"{name}.values"], data[f"{name}.mask"] if column.kind == "int" else None)
+        store._rows = len(chunk["row"][0])
+        if store._rows:
+            store._chunks.append(chunk)
+        return store
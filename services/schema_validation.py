@@ -0,0 +1,164 @@
+# services/schema_validation.py
+
+import json
+import math
+import re
+import threading
+
+_NUMBER = re.compile(r"[-+]?\d+(?:\.\d+)?")
+_QUOTES = str.maketrans({"’": "'", "‘": "'", "“": '"', "”": '"'})
+
+JSON_TYPES = {"string": "string", "integer": "integer", "float": "number"}
+
+
+def _enum_key(value: str):
+    # Case, spacing and curly quotes don't make an enum value different
+    return " ".join(value.translate(_QUOTES).split()).lower()
+
+
+def _to_number(value):
+    """Reads a number out of an LLM value such as 7, "7", "7/10", "0.4" or "40%"."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value if math.isfinite(value) else None
+    if not isinstance(value, str):
+        return None
+    match = _NUMBER.search(value.replace(",", ""))
+    if not match:
+        return None
+    number = float(match.group())
+    if value.strip().endswith("%"):
+        number /= 100
+    return number
+
+
+def _compile_field(item: dict):
+    """Builds a coerce(value) -> (ok, value) function for one schema field."""
+    field_type = item.get("type", "string")
+    minimum, maximum = item.get("minimum"), item.get("maximum")
+
+    def in_range(number):
+        return (minimum is None or number >= minimum) and (maximum is None or number <= maximum)
+
+    if field_type == "integer":
+        def coerce(value):
+            number = _to_number(value)
+            if number is None or not float(number).is_integer() or not in_range(number):
+                return False, None
+            return True, int(number)
+        return coerce
+
+    if field_type == "float":
+        def coerce(value):
+            number = _to_number(value)
+            if number is None or not in_range(number):
+                return False, None
+            return True, float(number)
+        return coerce
+
+    if item.get("enum"):
+        allowed = {_enum_key(str(option)): option for option in item["enum"]}
+
+        def coerce(value):
+            if not isinstance(value, str):
+                return False, None
+            option = allowed.get(_enum_key(value).strip(" ."))
+            return (True, option) if option is not None else (False, None)
+        return coerce
+
+    def coerce(value):
+        if value is None:
+            return True, ""
+        if isinstance(value, list):
+            # Comma-separated fields sometimes come back as JSON arrays
+            return True, ", ".join(str(part) for part in value)
+        if isinstance(value, dict):
+            return False, None
+        return True, str(value)
+    return coerce
+
+
+def _field_json_schema(item: dict):
+    field_schema = {"type": JSON_TYPES.get(item.get("type", "string"), "string")}
+    if item.get("enum") and field_schema["type"] == "string":
+        field_schema["enum"] = list(item["enum"])
+    # Ranges are checked locally; strict structured output doesn't accept them everywhere
+    if item.get("minimum") is not None or item.get("maximum") is not None:
+        field_schema["description"] = f"Between {item.get('minimum', '-inf')} and {item.get('maximum', 'inf')}."
+    return field_schema
+
+
+class CompiledSchema:
+    """
+    An extraction schema compiled once into a JSON Schema for structured output
+    and a local validator that coerces each LLM value to the field's type.
+
+    Fields may carry, besides 'name', 'prompt' and 'type' (string, integer or
+    float), an optional 'enum' list of allowed string values and optional
+    'minimum' / 'maximum' bounds for numbers.
+    """
+
+    def __init__(self, schema: list):
+        self.names = [item["name"] for item in schema]
+        self._coercers = {item["name"]: _compile_field(item) for item in schema}
+        properties = {item["name"]: _field_json_schema(item) for item in schema}
+        self.json_schema = {
+            "type": "object",
+            "properties": properties,
+            "required": list(properties),
+            "additionalProperties": False,
+        }
+
+    def response_format(self, name: str = "call_extraction"):
+        """The OpenRouter/OpenAI response_format requesting strict structured output."""
+        return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": self.json_schema}}
+
+    def batch_response_format(self):
+        """Structured output for batched prompts: a 'results' array of entries keyed by 'id'."""
+        entry = {
+            **self.json_schema,
+            "properties": {"id": {"type": "integer"}, **self.json_schema["properties"]},
+            "required": ["id"] + self.json_schema["required"],
+        }
+        schema = {
+            "type": "object",
+            "properties": {"results": {"type": "array", "items": entry}},
+            "required": ["results"],
+            "additionalProperties": False,
+        }
+        return {"type": "json_schema", "json_schema": {"name": "call_extraction_batch", "strict": True, "schema": schema}}
+
+    def validate(self, data):
+        """
+        Coerces an LLM reply to the schema.
+
+        Returns:
+            tuple: (values, invalid) where values holds the coerced value of every
+                   field that validated and invalid is the list of field names that
+                   were missing or could not be coerced.
+        """
+        if not isinstance(data, dict):
+            return {}, list(self.names)
+        values = {}
+        invalid = []
+        for name, coerce in self._coercers.items():
+            ok, value = coerce(data[name]) if name in data else (False, None)
+            if ok:
+                values[name] = value
+            else:
+                invalid.append(name)
+        return values, invalid
+
+
+_lock = threading.Lock()
+_compiled = {}
+
+
+def compile_schema(schema: list):
+    """Returns the CompiledSchema for a schema, compiling it only the first time it is seen."""
+    key = json.dumps(schema, sort_keys=True, ensure_ascii=False)
+    with _lock:
+        if key not in _compiled:
+            _compiled[key] = CompiledSchema(schema)
+        return _compiled[key]
@@ -0,0 +1,181 @@
+# services/stages.py
+
+import os
+import queue
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from services.instrumentation import metrics
+
+# Load environment variables
+load_dotenv()
+
+# Items each stage's input queue holds before upstream workers block (backpressure)
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "200"))
+
+_DONE = object()
+
+
+class Stage:
+    """
+    One step of a StagedPipeline: a pool of worker threads pulling items from a
+    bounded input queue, applying `func`, and passing non-None results downstream.
+
+    Args:
+        name (str): Stage name used in stats.
+        func (callable): Called as func(item). Returns the item to forward, a list of
+                         items to forward one by one, or None if nothing moves on
+                         (the item finished, was reported, or is being held back).
+        workers (int): Number of worker threads.
+        on_close (callable): Optional hook run once after the last item has been
+                             processed, e.g. to flush a buffer. It may return items
+                             to forward, like func.
+    """
+
+    def __init__(self, name: str, func, workers: int = 1, on_close=None):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers or 1)
+        self.on_close = on_close
+        self.inbox = None
+        self.processed = 0
+        self.forwarded = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.max_depth = 0
+        self._finished_workers = 0
+        self._lock = threading.Lock()
+
+    def snapshot(self, elapsed: float):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self.inbox.qsize(),
+                "max_queue_depth": self.max_depth,
+                "processed": self.processed,
+                "forwarded": self.forwarded,
+                "errors": self.errors,
+                "throughput": self.processed / elapsed if elapsed else 0.0,
+                # Share of the pool's time spent working; near 1.0 marks the bottleneck
+                "utilization": self.busy_seconds / (elapsed * self.workers) if elapsed else 0.0,
+            }
+
+
+class StagedPipeline:
+    """
+    Chains Stages with bounded queues so slow stages overlap instead of adding up.
+
+    A full queue blocks the stage feeding it, which keeps memory bounded and makes
+    the slowest stage set the pace. Unexpected exceptions from a stage function are
+    passed to on_error(stage_name, item, exception) and the item is dropped.
+
+    Usage:
+        pipeline = StagedPipeline([Stage("a", f, 4), Stage("b", g, 1)])
+        pipeline.start()
+        for item in items:
+            pipeline.put(item)
+        pipeline.close()
+        pipeline.join()
+    """
+
+    def __init__(self, stages: list, queue_size: int = PIPELINE_QUEUE_SIZE, on_error=None):
+        self.stages = stages
+        self.on_error = on_error
+        for stage in stages:
+            stage.inbox = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._started_at = None
+        self._finished_at = None
+
+    def start(self):
+        self._started_at = time.monotonic()
+        for position, stage in enumerate(self.stages):
+            downstream = self.stages[position + 1] if position + 1 < len(self.stages) else None
+            for number in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work, args=(stage, downstream),
+                    name=f"{stage.name}-{number}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def put(self, item):
+        """Feeds an item into the first stage, blocking while its queue is full."""
+        self._enqueue(self.stages[0], item)
+
+    def close(self):
+        """Signals that no more items are coming."""
+        for _ in range(self.stages[0].workers):
+            self.stages[0].inbox.put(_DONE)
+
+    def join(self, timeout: float = None):
+        """Waits for every stage to drain. Returns True once all workers have exited."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+            if thread.is_alive():
+                return False
+        self._finished_at = self._finished_at or time.monotonic()
+        return True
+
+    def stats(self):
+        """Returns {stage name: snapshot} with queue depth, throughput and utilization."""
+        if self._started_at is None:
+            return {}
+        elapsed = (self._finished_at or time.monotonic()) - self._started_at
+        return {stage.name: stage.snapshot(elapsed) for stage in self.stages}
+
+    def _enqueue(self, stage: Stage, item):
+        stage.inbox.put(item)
+        depth = stage.inbox.qsize()
+        with stage._lock:
+            stage.max_depth = max(stage.max_depth, depth)
+
+    def _forward(self, stage: Stage, downstream: Stage, result):
+        if result is None:
+            return
+        items = result if isinstance(result, list) else [result]
+        with stage._lock:
+            stage.forwarded += len(items)
+        if downstream is not None:
+            for item in items:
+                self._enqueue(downstream, item)
+
+    def _work(self, stage: Stage, downstream: Stage):
+        while True:
+            item = stage.inbox.get()
+            if item is _DONE:
+                break
+
+            started = time.monotonic()
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                result = None
+                with stage._lock:
+                    stage.errors += 1
+                if self.on_error:
+                    self.on_error(stage.name, item, e)
+            elapsed = time.monotonic() - started
+            with stage._lock:
+                stage.processed += 1
+                stage.busy_seconds += elapsed
+            metrics.observe("stage_seconds", elapsed, stage=stage.name)
+            self._forward(stage, downstream, result)
+
+        # The last worker of a stage to finish closes it and passes the signal on
+        with stage._lock:
+            stage._finished_workers += 1
+            last = stage._finished_workers == stage.workers
+        if last:
+            if stage.on_close:
+                try:
+                    self._forward(stage, downstream, stage.on_close())
+                except Exception as e:
+                    if self.on_error:
+                        self.on_error(stage.name, None, e)
+            if downstream is not None:
+                for _ in range(downstream.workers):
+                    downstream.inbox.put(_DONE)
@@ -0,0 +1,89 @@
+# services/template_renderer.py
+
+import json
+import re
+
+_PLACEHOLDER = re.compile(r"\{\{([^{}]+)\}\}")
+
+
+def template_placeholders(template: str):
+    """Returns the names used as {{placeholders}} in an activity template, in order of appearance."""
+    return list(dict.fromkeys(_PLACEHOLDER.findall(template)))
+
+
+def _to_text(value):
+    # Missing values become empty strings, everything else is inserted as text
+    return "" if value is None or value != value else str(value)
+
+
+def _compile_string(text: str):
+    parts = _PLACEHOLDER.split(text)
+    if len(parts) == 1:
+        return lambda values: text
+
+    # split() alternates literal text and placeholder names: [lit, name, lit, name, lit]
+    literals, names = parts[0::2], parts[1::2]
+    if len(names) == 1 and not literals[0] and not literals[1]:
+        name = names[0]
+        fallback = text
+        return lambda values: _to_text(values[name]) if name in values else fallback
+
+    def render(values):
+        pieces = [literals[0]]
+        for name, literal in zip(names, literals[1:]):
+            # Placeholders with no matching value are left as-is
+            pieces.append(_to_text(values[name]) if name in values else f"{{{{{name}}}}}")
+            pieces.append(literal)
+        return "".join(pieces)
+    return render
+
+
+def _compile_node(node):
+    if isinstance(node, str):
+        return _compile_string(node)
+    if isinstance(node, list):
+        items = [_compile_node(item) for item in node]
+        return lambda values: [render(values) for render in items]
+    if isinstance(node, dict):
+        entries = [(_compile_string(key), _compile_node(value)) for key, value in node.items()]
+        return lambda values: {key(values): value(values) for key, value in entries}
+    # Numbers, booleans and null are copied through unchanged
+    return lambda values: node
+
+
+class CompiledTemplate:
+    """
+    An activity JSON template parsed once into a tree of placeholder slots.
+
+    render() fills the slots straight into a new Python structure, so values
+    containing quotes, backslashes or newlines need no escaping and the result
+    never has to be re-parsed.
+    """
+
+    def __init__(self, template: str):
+        self.source = template
+        self.placeholders = template_placeholders(template)
+        self._render = _compile_node(json.loads(template))
+
+    def render(self, values: dict):
+        """
+        Builds the activity fields for one row.
+
+        Args:
+            values (dict): Column and extracted-field values keyed by placeholder name.
+
+        Returns:
+            The template structure (usually a list of field dicts) with every
+            placeholder replaced by its value as text. None and NaN become "".
+        """
+        return self._render(values)
+
+
+def compile_template(template: str):
+    """
+    Parses an activity JSON template into a CompiledTemplate.
+
+    Raises:
+        json.JSONDecodeError: If the template is not valid JSON.
+    """
+    return CompiledTemplate(template)
@@ -0,0 +1,175 @@
+# services/transcript_compactor.py
+
+import os
+import re
+
+from dotenv import load_dotenv
+
+from services.llm_service import estimate_tokens
+
+# Load environment variables
+load_dotenv()
+
+# Compact transcripts before they are sent to the LLM
+TRANSCRIPT_COMPACTION = os.getenv("TRANSCRIPT_COMPACTION", "true").lower() in ("1", "true", "yes")
+# Estimated tokens a compacted transcript may use; longer calls keep their most informative turns
+TRANSCRIPT_TOKEN_BUDGET = int(os.getenv("TRANSCRIPT_TOKEN_BUDGET", "8000"))
+
+# Shares of the budget kept for the opening and closing of the call; the rest goes to
+# the middle turns with the most distinct words
+OPENING_SHARE = 0.35
+CLOSING_SHARE = 0.35
+
+_TIME = r"(?:\d{4}-\d{2}-\d{2}[ T])?\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d+)?"
+# A leading timestamp, only when it is bracketed or followed by a delimiter or a
+# speaker label, so a turn like "10:30 works for me" keeps its time
+_TIMESTAMP = re.compile(
+    rf"^\s*(?:[\[(]{_TIME}[\])]\s*(?:(?:-+>?|\|)\s*)?"
+    rf"|{_TIME}\s*(?:-+>?|\||\u2013|\u2014)\s*"
+    rf"|{_TIME}\s+(?=[A-Za-z][\w.'-]*(?: [A-Za-z][\w.'-]*){{0,2}}\s*:(?!\d)))"
+)
+# Header lines call-log exports put above the conversation; only stripped before the first turn
+_METADATA_LINE = re.compile(
+    r"^\s*(?:call ?id|call ?sid|duration|recording(?: url)?|start(?:ed)? (?:time|at)|end(?:ed)? (?:time|at)"
+    r"|date|time|caller ?id|campaign|agent ?id|direction|status)\s*[:=]",
+    re.IGNORECASE
+)
+_FILLER = re.compile(r"(?<![\w'])(?:u+h+|u+m+|h+m+|e+r+m*|a+h+)[,.]?(?=\s|$)", re.IGNORECASE)
+# The same word or short phrase three or more times in a row ("Hello? Hello? Hello?")
+_REPEATED_PHRASE = re.compile(r"\b(\w+(?: \w+){0,2}[?.!,]?)(?:\s+\1){2,}", re.IGNORECASE)
+_SPACES = re.compile(r"[ \t\u00a0]+")
+_WORD = re.compile(r"[a-z']{3,}")
+_SENTENCE_END = re.compile(r"(?<=[.?!])\s+")
+
+
+def _clean_turn(line: str):
+    line = _TIMESTAMP.sub("", line)
+    line = _FILLER.sub("", line)
+    line = _REPEATED_PHRASE.sub(r"\1", line)
+    line = _SPACES.sub(" ", line).strip()
+    # Drop punctuation left dangling by removed filler, e.g. "Agent: , so"
+    return re.sub(r"^([^:]{1,32}:)\s*[,.]\s*", r"\1 ", line).strip()
+
+
+def _is_empty_turn(line: str):
+    # A speaker label with nothing left after cleaning
+    return not line or (line.endswith(":") and len(line) <= 33)
+
+
+def normalize_transcript(transcript: str):
+    """
+    Removes content that costs tokens without informing the extraction: timestamps,
+    the export's metadata header, filler words, stuttered repeats, consecutive
+    duplicate turns and redundant whitespace.
+
+    Returns:
+        list: The remaining turns, one per line, in order.
+    """
+    turns = []
+    in_header = True
+    for line in transcript.splitlines():
+        if in_header:
+            if not line.strip() or _METADATA_LINE.match(line):
+                continue
+            in_header = False
+        line = _clean_turn(line)
+        if _is_empty_turn(line):
+            continue
+        if turns and line.lower() == turns[-1].lower():
+            continue
+        turns.append(line)
+    return turns
+
+
+def _omitted_marker(count: int):
+    return f"[... {count} turns omitted ...]"
+
+
+def _split_long_turns(turns: list, max_tokens: int):
+    """Splits turns longer than max_tokens into sentences, and overlong sentences into pieces."""
+    pieces = []
+    for turn in turns:
+        if estimate_tokens(turn) <= max_tokens:
+            pieces.append(turn)
+            continue
+        for sentence in _SENTENCE_END.split(turn):
+            step = max_tokens * 4
+            pieces.extend(sentence[start:start + step] for start in range(0, len(sentence), step))
+    return pieces
+
+
+def _fit_to_budget(turns: list, token_budget: int):
+    """Keeps the opening, the closing and the most informative middle turns within the budget."""
+    # Single-line transcripts, or one very long turn, still need something to choose between
+    turns = _split_long_turns(turns, max(int(token_budget * 0.1), 1))
+    costs = [estimate_tokens(turn) for turn in turns]
+    marker_cost = estimate_tokens(_omitted_marker(len(turns)))
+    keep = set()
+
+    # One omission marker between the opening and the closing is always needed
+    used = marker_cost
+    for index in range(len(turns)):
+        if used + costs[index] > token_budget * OPENING_SHARE:
+            break
+        keep.add(index)
+        used += costs[index]
+
+    closing_budget = token_budget * CLOSING_SHARE
+    closing_used = 0
+    for index in range(len(turns) - 1, -1, -1):
+        if index in keep or closing_used + costs[index] > closing_budget:
+            break
+        keep.add(index)
+        closing_used += costs[index]
+    used += closing_used
+
+    # Middle turns with the most distinct words fill what is left. Each may split an
+    # omitted stretch in two, so it is charged for one more marker.
+    middle = [index for index in range(len(turns)) if index not in keep]
+    middle.sort(key=lambda index: (-len(set(_WORD.findall(turns[index].lower()))), costs[index]))
+    for index in middle:
+        if used + costs[index] + marker_cost <= token_budget:
+            keep.add(index)
+            used += costs[index] + marker_cost
+
+    compacted = []
+    omitted = 0
+    for index, turn in enumerate(turns):
+        if index in keep:
+            if omitted:
+                compacted.append(_omitted_marker(omitted))
+                omitted = 0
+            compacted.append(turn)
+        else:
+            omitted += 1
+    if omitted:
+        compacted.append(_omitted_marker(omitted))
+    return compacted
+
+
+def compact_transcript(transcript: str, token_budget: int = None):
+    """
+    Shrinks a transcript before it is sent to the LLM.
+
+    The transcript is normalized first (see normalize_transcript). If it is still
+    over the token budget, the opening and closing of the call, where the
+    greeting and the agreed next step are, are kept in full. The remaining
+    budget goes to the middle turns with the most distinct words. Omitted
+    stretches are marked in the text.
+
+    Args:
+        transcript (str): The raw transcript.
+        token_budget (int): Defaults to TRANSCRIPT_TOKEN_BUDGET.
+
+    Returns:
+        tuple: (compacted transcript, estimated tokens before, estimated tokens after)
+    """
+    if not isinstance(transcript, str) or not transcript.strip():
+        return "", 0, 0
+    token_budget = token_budget or TRANSCRIPT_TOKEN_BUDGET
+
+    turns = normalize_transcript(transcript)
+    compacted = "\n".join(turns)
+    if estimate_tokens(compacted) > token_budget:
+        compacted = "\n".join(_fit_to_budget(turns, token_budget))
+    return compacted, estimate_tokens(transcript), estimate_tokens(compacted)